@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Company, Client, WorkOrder, BusinessType
+from .models import CustomUser, Company, Client, WorkOrder, WorkOrderCandidate, BusinessType, Job
 
 # Register Business Types (e.g., Plumbing, Electrical, etc.)
 @admin.register(BusinessType)
@@ -8,13 +8,20 @@ class BusinessTypeAdmin(admin.ModelAdmin):
     list_display = ['name']
     search_fields = ['name']
 
+# Candidate list (rejection cascade), in order
+class WorkOrderCandidateInline(admin.TabularInline):
+    model = WorkOrderCandidate
+    extra = 0
+    raw_id_fields = ['contractor']
+
 # Register Work Orders
 @admin.register(WorkOrder)
 class WorkOrderAdmin(admin.ModelAdmin):
     list_display = ['title', 'status', 'created_by', 'assigned_contractor', 'created_at']
     list_filter = ['status', 'priority', 'created_at']
     search_fields = ['title', 'description']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'candidate_position', 'offered_at']
+    inlines = [WorkOrderCandidateInline]
 
 # Register Companies
 @admin.register(Company)
@@ -29,6 +36,14 @@ class ClientAdmin(admin.ModelAdmin):
     list_display = ('name', 'company', 'address')
     search_fields = ('name', 'address')
 
+# Register Background Jobs (read-mostly: inspect failures, re-queue by editing status)
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'priority', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'result', 'last_error')
+
 # Register Custom Users
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
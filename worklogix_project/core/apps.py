@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Register signal handlers (cache invalidation etc.)
+        from core import signals  # noqa: F401
+        # Register background job handlers (core/services/jobs.py)
+        from core import tasks  # noqa: F401
@@ -0,0 +1,82 @@
+"""
+Cache-key versioning and per-model invalidation.
+
+The cache backend comes from CACHE_URL (see settings.py): Redis shared by
+all gunicorn workers in production, a file or database cache when there is
+no Redis, LocMem under tests.
+
+Cached data is grouped into namespaces ('units', 'clients', 'dashboard',
+...). Each namespace has a version number stored in the cache itself, and
+every key built with versioned_key() embeds it. Invalidating a namespace is
+a single increment of that number: old entries become unreachable for all
+workers at once and simply expire.
+
+Models declare which namespaces they feed with invalidate_on(); the
+post_save/post_delete hooks are connected in CoreConfig.ready() via
+core/signals.py. Writes that skip signals (bulk_create, queryset.update)
+must call bump_version() themselves.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+DEFAULT_TIMEOUT = 60 * 60
+
+# model class -> namespaces it invalidates
+MODEL_NAMESPACES = {}
+
+
+def _version_key(namespace):
+    return f'cache:version:{namespace}'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Start from a timestamp so an evicted version is never reused
+        version = time.time_ns()
+        cache.add(_version_key(namespace), version, None)
+        version = cache.get(_version_key(namespace), version)
+    return version
+
+
+def bump_version(*namespaces):
+    """Invalidate every cached entry in the given namespaces."""
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def versioned_key(namespace, *parts):
+    """'<namespace>:<version>:<digest of parts>'"""
+    digest = hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+    return f'{namespace}:{get_version(namespace)}:{digest}'
+
+
+def cached(namespace, parts, build, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value for (namespace, parts), calling build() on a miss."""
+    key = versioned_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+# --------------------------
+# Per-model invalidation hooks
+# --------------------------
+def _invalidate(sender, **kwargs):
+    bump_version(*MODEL_NAMESPACES.get(sender, ()))
+
+
+def invalidate_on(model, *namespaces):
+    """Bump `namespaces` whenever an instance of `model` is saved or deleted."""
+    MODEL_NAMESPACES.setdefault(model, set()).update(namespaces)
+    post_save.connect(_invalidate, sender=model, dispatch_uid=f'caching:{model._meta.label}:save')
+    post_delete.connect(_invalidate, sender=model, dispatch_uid=f'caching:{model._meta.label}:delete')
@@ -0,0 +1,46 @@
+"""
+Cached counts shown on the admin dashboard.
+
+Counts are computed on a cache miss and invalidated through their cache
+namespace (see core/caching.py and core/signals.py) whenever a counted
+model changes, so the dashboard does not COUNT every table on each page
+view, and every worker sees the invalidation at once.
+"""
+from django.db.models import Count, Q
+
+from core.caching import bump_version, cached
+from core.models import Client, Company, CustomUser, WorkOrder
+
+ENTITY_COUNTS = 'entity_counts'        # Company, CustomUser, Client
+WORK_ORDER_COUNTS = 'work_order_counts'  # WorkOrder
+COUNTS_TIMEOUT = 60 * 60  # safety net; invalidation normally happens sooner
+
+
+def get_entity_counts():
+    """Return {'users', 'managers', 'contractors', 'clients'} counts, cached."""
+    def build():
+        counts = Company.objects.aggregate(
+            managers=Count('id', filter=Q(is_property_manager=True)),
+            contractors=Count('id', filter=Q(is_contractor=True)),
+        )
+        counts['users'] = CustomUser.objects.count()
+        counts['clients'] = Client.objects.count()
+        return counts
+    return cached(ENTITY_COUNTS, (), build, COUNTS_TIMEOUT)
+
+
+def get_work_order_counts():
+    """Work order status buckets for the admin dashboard, in one query, cached."""
+    return cached(WORK_ORDER_COUNTS, (), lambda: WorkOrder.objects.aggregate(
+        open_work_count=Count('id', filter=Q(status__in=['new', 'assigned'])),
+        in_progress_count=Count('id', filter=Q(status='accepted')),
+        completed_work_count=Count('id', filter=Q(status='completed')),
+    ), COUNTS_TIMEOUT)
+
+
+def invalidate_entity_counts():
+    bump_version(ENTITY_COUNTS)
+
+
+def invalidate_work_order_counts():
+    bump_version(WORK_ORDER_COUNTS)
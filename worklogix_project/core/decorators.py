@@ -1,15 +1,22 @@
 from django.http import HttpResponseForbidden
 from functools import wraps
-from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.views import redirect_to_login
 
-def role_required(required_role):
+from core.permissions import get_principal
+
+def role_required(*roles):
     """
-    Returns a decorator that checks if the logged-in user has the specified role.
+    Returns a decorator that checks if the logged-in user has one of the given roles.
+    Uses the cached Principal (see core/permissions.py), so the check itself runs no queries.
     """
     def decorator(view_func):
-        return user_passes_test(
-            lambda user: user.is_authenticated and user.role == required_role
-        )(view_func)
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            principal = get_principal(request)
+            if principal is None or principal.role not in roles:
+                return redirect_to_login(request.get_full_path())
+            return view_func(request, *args, **kwargs)
+        return wrapper
     return decorator
 
 # Shorthand decorators for each role
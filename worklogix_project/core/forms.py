@@ -1,7 +1,10 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import CheckboxInput, Textarea, DateInput, ValidationError
-from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm, UserChangeForm
 from django.contrib.auth import get_user_model
+from django.template import loader
 from core.models import (
     CustomUser,
     Company,
@@ -11,6 +14,15 @@ from core.models import (
     Unit,
     UnitGroup,
 )
+from core.services import dispatch, jobs
+from core.services.lookups import business_type_choices, client_choices
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
 
 # ===============================================================
 # Shared Styling Base for Bootstrap 5
@@ -77,6 +89,28 @@ class CustomUserEditForm(UserChangeForm):
         if role != 'admin' and not company:
             raise forms.ValidationError("Non-admin users must be assigned to a company.")
         return company
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """
+    Password reset form that renders the email in the request but sends it
+    from a background job, so the page never waits on the SMTP server.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name, context,
+                  from_email, to_email, html_email_template_name=None):
+        subject = "".join(loader.render_to_string(subject_template_name, context).splitlines())
+        payload = {
+            'subject': subject,
+            'body': loader.render_to_string(email_template_name, context),
+            'to': [to_email],
+            'from_email': from_email,
+        }
+        if html_email_template_name is not None:
+            payload['html_body'] = loader.render_to_string(html_email_template_name, context)
+        jobs.enqueue('email.send', payload, priority=10)
+
+
 # ===============================================================
 # Company Form
 # ===============================================================
@@ -129,6 +163,20 @@ class ClientCreationForm(StyledModelForm):
         super().__init__(*args, **kwargs)
         self.fields['company'].queryset = Company.objects.filter(is_property_manager=True)
 
+# ===============================================================
+# Client/Unit CSV Import Form
+# ===============================================================
+class ClientUnitImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="CSV file",
+        help_text="One row per unit: client_name, client_address, company, client_notes, "
+                  "unit_name, unit_type, eircode, street, city, county, "
+                  "unit_contact_name, unit_contact_email, unit_contact_number",
+    )
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['csv_file'].widget.attrs.update({'class': 'form-control', 'accept': '.csv'})
+
 # ===============================================================
 # Unit Generator Form
 # ===============================================================
@@ -149,6 +197,10 @@ class UnitGeneratorForm(forms.Form):
 class WorkOrderForm(forms.ModelForm):
     # Not stored in DB; controls Unit visibility/requirement
     is_common_area = forms.BooleanField(required=False, label="Common area")
+    # Not stored in DB; opt-in to fill blank contractor fields from the dispatch ranking
+    auto_dispatch = forms.BooleanField(
+        required=False, label="Fill empty contractor fields with the best-ranked contractors",
+    )
 
     class Meta:
         model = WorkOrder
@@ -167,6 +219,9 @@ class WorkOrderForm(forms.ModelForm):
 
         self.fields['business_type'].queryset = BusinessType.objects.all()
         self.fields['client'].queryset = Client.objects.all()
+        # Render the long select lists from the shared cache; the querysets still validate
+        self.fields['business_type'].widget.choices = [('', '---------')] + business_type_choices()
+        self.fields['client'].widget.choices = [('', '---------')] + client_choices()
         self.fields['unit'].queryset = Unit.objects.none()
         self.fields['preferred_contractor'].queryset = Company.objects.none()
         self.fields['second_contractor'].queryset = Company.objects.none()
@@ -175,6 +230,7 @@ class WorkOrderForm(forms.ModelForm):
         for name, field in self.fields.items():
             field.widget.attrs.update({'class': 'form-control'})
         self.fields['is_common_area'].widget.attrs.update({'class': 'form-check-input'})
+        self.fields['auto_dispatch'].widget.attrs.update({'class': 'form-check-input'})
 
         # Populate Unit when client present
         if 'client' in self.data:
@@ -186,13 +242,21 @@ class WorkOrderForm(forms.ModelForm):
         elif self.instance.pk and self.instance.client:
             self.fields['unit'].queryset = Unit.objects.filter(client=self.instance.client)
 
-        # Populate contractors when business_type present
+        # Populate contractors when business_type present, best dispatch candidates first
+        self.ranked_contractors = []
         if 'business_type' in self.data:
             try:
                 bt_id = int(self.data.get('business_type'))
                 contractors = Company.objects.filter(is_contractor=True, business_type_id=bt_id)
                 self.fields['preferred_contractor'].queryset = contractors
                 self.fields['second_contractor'].queryset = contractors
+                self.ranked_contractors = dispatch.rank(
+                    bt_id, _int_or_none(self.data.get('client')), _int_or_none(self.data.get('unit')),
+                    limit=None,
+                )
+                choices = [('', '---------')] + [(c.company_id, c.name) for c in self.ranked_contractors]
+                self.fields['preferred_contractor'].widget.choices = choices
+                self.fields['second_contractor'].widget.choices = choices
             except (ValueError, TypeError):
                 pass
 
@@ -207,7 +271,7 @@ class WorkOrderForm(forms.ModelForm):
             'title', 'description', 'priority', 'business_type', 'client',
             'is_common_area',  # ← checkbox appears before Unit
             'unit',
-            'preferred_contractor', 'second_contractor', 'due_date', 'attachment',
+            'preferred_contractor', 'second_contractor', 'auto_dispatch', 'due_date', 'attachment',
         ])
 
     def clean(self):
@@ -215,8 +279,40 @@ class WorkOrderForm(forms.ModelForm):
         is_common = cleaned.get('is_common_area') is True
         if not is_common and not cleaned.get('unit'):
             self.add_error('unit', 'Unit is required when this is not a common area.')
+
+        # Auto-dispatch (when ticked): fill contractors left blank with the best-ranked ones
+        if cleaned.get('auto_dispatch') and not self.errors:
+            chosen = {c.pk for c in (cleaned.get('preferred_contractor'), cleaned.get('second_contractor')) if c}
+            for name in ('preferred_contractor', 'second_contractor'):
+                if cleaned.get(name):
+                    continue
+                for pick in self.ranked_contractors:
+                    if pick.company_id in chosen:
+                        continue
+                    # The snapshot may be a few seconds stale: skip a contractor that has gone
+                    company = self.fields[name].queryset.filter(pk=pick.company_id).first()
+                    if company is not None:
+                        cleaned[name] = company
+                        chosen.add(company.pk)
+                        break
         return cleaned
 
+    def save(self, commit=True):
+        upload = self.cleaned_data.get('attachment')
+        if isinstance(upload, UploadedFile):
+            self.instance.attachment_name = upload.name[:255]
+        return super().save(commit)
+
+    def extra_candidate_ids(self):
+        """
+        Best-ranked contractors after the preferred and second ones, up to
+        WORK_ORDER_CANDIDATES in total: who the order cascades to after them.
+        """
+        chosen = {c.pk for c in (self.cleaned_data.get('preferred_contractor'),
+                                 self.cleaned_data.get('second_contractor')) if c}
+        extra = [c.company_id for c in self.ranked_contractors if c.company_id not in chosen]
+        return extra[:max(settings.WORK_ORDER_CANDIDATES - 2, 0)]
+
         
 
 # ===============================================================
@@ -0,0 +1,77 @@
+"""
+Measure the CSV client/unit importer on a generated file.
+
+Writes a CSV with N units spread over M clients (a small share of rows
+deliberately invalid), imports it through core.services.importer, reports
+wall time, rows/s and query count, then rolls everything back.
+
+    python manage.py benchmark_client_import --units 100000 --clients 200
+"""
+import csv
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Company
+from core.services.importer import CLIENT_COLUMNS, UNIT_COLUMNS, import_clients_and_units
+
+UNIT_TYPES = ['apartment', 'apartment', 'apartment', 'duplex', 'house', 'commercial']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark the bulk client/unit CSV import (results are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units', type=int, default=100_000)
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--error-rate', type=float, default=0.01)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _write_csv(self, f, company_name, options):
+        rng = random.Random(options['seed'])
+        writer = csv.writer(f)
+        writer.writerow(CLIENT_COLUMNS + UNIT_COLUMNS)
+        per_client = max(options['units'] // options['clients'], 1)
+        for n in range(options['units']):
+            client = n // per_client
+            unit_type = UNIT_TYPES[n % len(UNIT_TYPES)]
+            if rng.random() < options['error_rate']:
+                unit_type = 'castle'  # invalid choice -> reported, not imported
+            writer.writerow([
+                f"Import Estate {client}", f"{client} Import Road", company_name, "",
+                f"Unit {n}", unit_type, "", "Main Street", "Dublin", "Dublin",
+                "", f"unit{n}@example.com", "",
+            ])
+
+    def handle(self, *args, **options):
+        with tempfile.NamedTemporaryFile('w+', suffix='.csv', newline='') as f:
+            try:
+                with transaction.atomic():
+                    company = Company.objects.create(name="Benchmark Import PM", is_property_manager=True)
+                    self._write_csv(f, company.name, options)
+                    f.seek(0)
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        result = import_clients_and_units(f, chunk_size=options['chunk_size'])
+                        elapsed = time.perf_counter() - started
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        self.stdout.write(
+            f"{result.rows} rows: {result.clients_created} clients, {result.units_created} units, "
+            f"{result.error_count} rejected rows, {len(queries)} queries"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{elapsed:.1f}s total, {result.rows / elapsed:,.0f} rows/s"
+        ))
@@ -0,0 +1,97 @@
+"""
+Time contractor ranking (core/services/dispatch.py).
+
+Builds a synthetic in-memory Snapshot of --contractors contractors spread
+over --business-types types (no database rows are written), then ranks
+--repeat times per business type and reports p50/p95 latency. With
+--live it also times build_snapshot() and rank() against the real data.
+
+    python manage.py benchmark_dispatch --contractors 1000
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services import dispatch
+
+
+def _synthetic_snapshot(contractors, business_types, clients, seed=1):
+    rng = random.Random(seed)
+    snapshot = dispatch.Snapshot()
+    for pk in range(1, contractors + 1):
+        offered = rng.randint(0, 200)
+        completed = rng.randint(0, offered)
+        snapshot.contractors[pk] = dispatch.ContractorStats(
+            company_id=pk,
+            name=f"Contractor {pk}",
+            business_type_id=rng.randint(1, business_types),
+            open_orders=rng.randint(0, 20),
+            offered=offered,
+            accepted=rng.randint(completed, offered),
+            completed=completed,
+            complete_seconds=completed * rng.uniform(3600, 14 * 86400),
+        )
+    for client_id in range(1, clients + 1):
+        snapshot.client_history[client_id] = {
+            rng.randint(1, contractors): rng.randint(1, 10) for _ in range(rng.randint(0, 15))
+        }
+    return snapshot.index()
+
+
+def _percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+class Command(BaseCommand):
+    help = "p50/p95 latency of dispatch.rank() over a synthetic (or the live) snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contractors', type=int, default=1000)
+        parser.add_argument('--business-types', type=int, default=10)
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--live', action='store_true',
+                            help="Also time build_snapshot() and rank() on the real database.")
+
+    def handle(self, *args, **options):
+        snapshot = _synthetic_snapshot(options['contractors'], options['business_types'], options['clients'])
+        self.report(
+            f"rank() synthetic, {options['contractors']} contractors",
+            lambda i: dispatch.rank(
+                i % options['business_types'] + 1, i % options['clients'] + 1,
+                limit=options['limit'], snapshot=snapshot,
+            ),
+            options['repeat'],
+        )
+        self.report(
+            "rank() synthetic, all types, full sort",
+            lambda i: dispatch.rank(client_id=i % options['clients'] + 1, limit=None, snapshot=snapshot),
+            options['repeat'],
+        )
+
+        if options['live']:
+            started = time.perf_counter()
+            live = dispatch.build_snapshot()
+            self.stdout.write(
+                f"build_snapshot() live, {len(live.contractors)} contractors: "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+            types = list(live.by_business_type) or [None]
+            self.report(
+                "rank() live",
+                lambda i: dispatch.rank(types[i % len(types)], limit=options['limit'], snapshot=live),
+                options['repeat'],
+            )
+
+    def report(self, label, func, repeat):
+        timings = []
+        for i in range(repeat):
+            started = time.perf_counter()
+            func(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        p50, p95 = _percentiles(timings)
+        self.stdout.write(f"{label}: p50 {p50:.3f} ms, p95 {p95:.3f} ms")
@@ -0,0 +1,85 @@
+"""
+Compare session engines on an authenticated request.
+
+For each engine it logs a throwaway admin in through the Django test
+client, requests --url --repeat times and reports the median number of
+queries per request and how many of them touched django_session. Users
+are created inside a transaction that is rolled back afterwards.
+
+    python manage.py benchmark_sessions --url /api/query-stats/ --repeat 20
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client as TestClient
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.models import CustomUser
+
+ENGINES = ('db', 'cached_db', 'cache', 'signed_cookies')
+ENGINE_PATHS = {name: f'django.contrib.sessions.backends.{name}' for name in ENGINES}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Queries per authenticated request for each session engine (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='',
+                            help="Path to request (default: the admin dashboard).")
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--engines', default=','.join(ENGINES))
+
+    def handle(self, *args, **options):
+        url = options['url'] or reverse('admin_dashboard')
+        engines = [name for name in options['engines'].split(',') if name]
+
+        self.stdout.write(f"GET {url}  (current SESSION_ENGINE: {settings.SESSION_ENGINE})")
+        header = f"{'engine':16} {'queries':>8} {'session':>8} {'p50 ms':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(
+                    username='bench_sessions_admin', password='x', role='admin',
+                )
+                for name in engines:
+                    self.run_engine(name, user, url, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run_engine(self, name, user, url, repeat):
+        overrides = dict(
+            SESSION_ENGINE=ENGINE_PATHS.get(name, name),
+            ALLOWED_HOSTS=['testserver'],
+            SECURE_SSL_REDIRECT=False,
+        )
+        with override_settings(**overrides):
+            client = TestClient(raise_request_exception=False)
+            client.force_login(user)
+            client.get(url)  # warm-up: first session load fills the cache
+
+            totals, session_counts, timings = [], [], []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                totals.append(len(queries))
+                session_counts.append(
+                    sum('django_session' in query['sql'] for query in queries.captured_queries)
+                )
+
+        self.stdout.write(
+            f"{name:16} {statistics.median(totals):>8.0f} "
+            f"{statistics.median(session_counts):>8.0f} {statistics.median(timings):>8.1f}"
+        )
@@ -0,0 +1,60 @@
+"""
+Measure the cost of bulk unit provisioning.
+
+Creates a throwaway PM company + client, provisions N units through
+core.services.units.provision_units, reports wall time and query count
+(total and per 1,000 units), then rolls everything back.
+
+    python manage.py benchmark_unit_provisioning --units 1000 --runs 3
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Client, Company
+from core.services.units import numbered_specs, provision_units
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk unit creation (results are rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units', type=int, default=1000)
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        units, runs = options['units'], options['runs']
+        timings = []
+
+        for run in range(1, runs + 1):
+            try:
+                with transaction.atomic():
+                    pm = Company.objects.create(name="Benchmark PM", is_property_manager=True)
+                    client = Client.objects.create(name="Benchmark Estate", address="-", company=pm)
+                    specs = numbered_specs("Apartment", 1, units, unit_type="apartment")
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        result = provision_units(client, specs, batch_size=options['batch_size'])
+                        elapsed = time.perf_counter() - started
+
+                    timings.append(elapsed)
+                    self.stdout.write(
+                        f"run {run}: {result.created} units in {elapsed * 1000:.1f} ms, "
+                        f"{len(queries)} queries"
+                    )
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        best = min(timings)
+        self.stdout.write(self.style.SUCCESS(
+            f"best: {best * 1000:.1f} ms total, {best * 1000 / units * 1000:.1f} ms per 1,000 units"
+        ))
@@ -0,0 +1,151 @@
+"""
+Drive every GET-able URL in core/urls.py through the Django test client at
+several data scales and report p50/p95 latency and query counts.
+
+Each scale is generated with core.synthetic inside a transaction that is
+rolled back afterwards, so the command can run against a dev database.
+Requests use a private in-memory cache (cleared before each one) and
+database sessions, so the shared cache is left alone.
+
+    python manage.py benchmark_views --scales 1000,10000,100000 --repeat 10
+"""
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client as TestClient
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+
+from core import urls as core_urls
+from core.models import BusinessType, Client, Company, CustomUser, Job, Unit, WorkOrder
+from core.synthetic import generate
+
+# URLs that change data on GET, end the session, or need tokens
+SKIP = {
+    'logout', 'password_reset_confirm',
+    'delete_unit', 'delete_client', 'delete_company', 'delete_user',
+}
+
+# Which role to log in as for each URL (admin by default)
+ROLE_FOR_URL = {
+    'pm_dashboard': 'property_manager',
+    'my_work_orders': 'property_manager',
+    'assistant_dashboard': 'assistant',
+    'contractor_dashboard': 'contractor',
+    'my_contractor_orders': 'contractor',
+}
+
+ANONYMOUS = {'login', 'password_reset', 'password_reset_done', 'password_reset_complete'}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark every core URL at several synthetic data scales (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000',
+                            help="Comma-separated work order counts.")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--only', default='', help="Comma-separated URL names to run.")
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(s) for s in options['scales'].split(',') if s]
+        except ValueError:
+            raise CommandError("--scales must be comma-separated integers")
+        only = {name for name in options['only'].split(',') if name}
+
+        names = [
+            p.name for p in core_urls.urlpatterns
+            if isinstance(p, URLPattern) and p.name and p.name not in SKIP
+            and (not only or p.name in only)
+        ]
+
+        for scale in scales:
+            try:
+                with transaction.atomic():
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {scale} work orders =="))
+                    generate(
+                        work_orders=scale,
+                        clients=max(10, scale // 100),
+                        contractors=max(10, scale // 500),
+                        log=lambda *_: None,
+                    )
+                    self.run_scale(names, options['repeat'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def sample_kwargs(self):
+        """One existing id for every URL parameter used in core/urls.py."""
+        order = WorkOrder.objects.filter(status='new').only('id').first()
+        job = Job.objects.only('id').last()
+        return {
+            'work_order_id': order.id if order else 0,
+            'client_id': Client.objects.only('id').last().id,
+            'company_id': Company.objects.only('id').last().id,
+            'user_id': CustomUser.objects.only('id').last().id,
+            'unit_id': Unit.objects.only('id').last().id,
+            'business_type_id': BusinessType.objects.only('id').first().id,
+            'job_id': job.id if job else 0,
+        }
+
+    def run_scale(self, names, repeat):
+        users = {
+            role: CustomUser.objects.filter(role=role, username__startswith='synth_').last()
+            for role in ('admin', 'property_manager', 'assistant', 'contractor')
+        }
+        samples = self.sample_kwargs()
+        resolver_patterns = {p.name: p for p in core_urls.urlpatterns if isinstance(p, URLPattern)}
+
+        header = f"{'url name':32} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        # A private cache, so clearing it between requests cannot wipe the
+        # shared cache (and the sessions in it) of a running dev server
+        isolated = override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            SECURE_SSL_REDIRECT=False,
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'benchmark-views',
+            }},
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+        )
+        with isolated:
+            for name in names:
+                params = resolver_patterns[name].pattern.converters.keys()
+                url = reverse(name, kwargs={key: samples[key] for key in params})
+
+                client = TestClient(raise_request_exception=False)
+                if name not in ANONYMOUS:
+                    client.force_login(users[ROLE_FOR_URL.get(name, 'admin')])
+
+                client.get(url)  # warm-up (template loading, first connection)
+                timings, query_counts, status = [], [], None
+                for _ in range(repeat):
+                    caches['default'].clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    query_counts.append(len(queries))
+                    status = response.status_code
+
+                self.stdout.write(
+                    f"{name:32} {status:>6} {percentile(timings, 50):>8.1f} "
+                    f"{percentile(timings, 95):>8.1f} {statistics.median(query_counts):>8.0f}"
+                )
@@ -0,0 +1,100 @@
+"""
+Benchmark WorkOrder.objects.visible_to() for each role.
+
+For a sample admin, property manager and contractor it times the first
+list page (visible_to(user).order_by('-created_at', '-id')[:page]) and the
+visible count, and checks with EXPLAIN that the page query does not fall
+back to a full scan of core_workorder.
+
+Use existing data, or generate a synthetic dataset first (rolled back):
+
+    python manage.py benchmark_visibility --work-orders 1000000
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.management.commands.check_query_plans import SEQ_SCAN_PATTERNS
+from core.models import Company, CustomUser, WorkOrder
+from core.permissions import Principal
+from core.synthetic import generate
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _best(runs, func):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+
+class Command(BaseCommand):
+    help = "Time and EXPLAIN the work order visibility scope per role."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--work-orders', type=int, default=0,
+                            help="Generate this many synthetic work orders first (rolled back).")
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def _principals(self):
+        admin = CustomUser.objects.filter(role='admin').only('id').first()
+        creator = (
+            CustomUser.objects.filter(role='property_manager', workorder__isnull=False)
+            .only('id').first()
+        )
+        contractor = Company.objects.filter(is_contractor=True).only('id').first()
+        if not (admin and creator and contractor):
+            raise CommandError("Need an admin, a property manager with orders and a contractor "
+                               "(or pass --work-orders).")
+        return {
+            'admin': Principal(user_id=admin.id, role='admin'),
+            'property_manager': Principal(user_id=creator.id, role='property_manager'),
+            'contractor': Principal(user_id=0, role='contractor', company_id=contractor.id),
+        }
+
+    def _run(self, options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        total = WorkOrder.objects.count()
+        self.stdout.write(f"{total:,} work orders ({connection.vendor})")
+
+        failures = []
+        for role, principal in self._principals().items():
+            scope = WorkOrder.objects.visible_to(principal)
+            page = scope.order_by('-created_at', '-id')[:options['page_size']]
+
+            page_ms, _ = _best(options['runs'], lambda: list(page.all()))
+            count_ms, count = _best(options['runs'], scope.count)
+            full_scan = bool(pattern and pattern.search(page.explain()))
+            if full_scan:
+                failures.append(role)
+
+            style = self.style.ERROR if full_scan else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{role:<17} visible={count:>9,}  first page {page_ms:8.2f} ms  "
+                f"count {count_ms:8.2f} ms  {'FULL SCAN' if full_scan else 'index'}"
+            ))
+        return failures
+
+    def handle(self, *args, **options):
+        failures = []
+        if options['work_orders']:
+            try:
+                with transaction.atomic():
+                    generate(work_orders=options['work_orders'], batch_size=5000,
+                             log=lambda message: None)
+                    failures = self._run(options)
+                    raise _Rollback
+            except _Rollback:
+                pass
+        else:
+            failures = self._run(options)
+
+        if failures:
+            raise CommandError(f"Full table scan for: {', '.join(failures)}")
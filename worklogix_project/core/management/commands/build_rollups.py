@@ -0,0 +1,31 @@
+"""
+Update the daily reporting rollups (core/services/reporting.py).
+
+Only creation days with work orders changed since the last run are
+rebuilt, so this is cheap to run every few minutes from cron:
+
+    python manage.py build_rollups
+    python manage.py build_rollups --full    # rebuild everything (after deletes)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.reporting import build_rollups
+
+
+class Command(BaseCommand):
+    help = "Incrementally rebuild the daily work order rollups used by the SLA report."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Drop and rebuild every day instead of only changed ones.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = build_rollups(full=options['full'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full rebuild' if result.full else 'Incremental build'}: "
+            f"{result.days} day(s), {result.rows} rollup row(s) in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,101 @@
+"""
+Run EXPLAIN on the work order querysets behind each list/dashboard view and
+fail if any of them falls back to a full table scan of the work order
+or work queue tables, or does not use the index it was written for
+(EXPECTED_INDEXES, e.g. the partial offer index on PostgreSQL and SQLite).
+
+Run it against a database seeded with a realistic amount of data; on a tiny
+table the planner will (correctly) prefer a sequential scan.
+
+    python manage.py check_query_plans
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Company, CustomUser, WorkOrder, WorkQueueEntry
+from core.permissions import Principal
+from core.services.work_queue import contractor_queue
+
+TABLES = f"(?:{WorkOrder._meta.db_table}|{WorkQueueEntry._meta.db_table})"
+
+# Plan lines that mean "read the whole table"
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(rf'Seq Scan on {TABLES}\b'),
+    # SQLite reports "SCAN core_workorder" for a full scan and
+    # "SCAN core_workorder USING INDEX ..." / "SEARCH ..." otherwise.
+    'sqlite': re.compile(rf'\bSCAN {TABLES}\b(?! USING (COVERING )?INDEX)'),
+}
+
+# URL name -> index its plan must name (both planners print the index name)
+EXPECTED_INDEXES = {
+    'offer_sweep': 'wo_offer_open_idx',
+}
+
+
+def view_querysets(contractor_id, creator_id):
+    """The WorkOrder querysets each view issues, keyed by URL name."""
+    creator = Principal(user_id=creator_id, role='property_manager')
+    contractor = Principal(user_id=0, role='contractor', company_id=contractor_id)
+    return {
+        'admin_work_orders': (
+            WorkOrder.objects.order_by('-created_at', '-id')[:51]
+        ),
+        'my_work_orders': (
+            WorkOrder.objects.visible_to(creator).order_by('-created_at')
+        ),
+        'my_contractor_orders': (
+            WorkOrder.objects.visible_to(contractor).filter(
+                assigned_contractor_id=contractor_id,
+                status__in=['accepted', 'rejected', 'completed'],
+            ).order_by('-created_at')
+        ),
+        'contractor_search_scope': (
+            WorkOrder.objects.visible_to(contractor).order_by('-created_at', '-id')[:25]
+        ),
+        'contractor_dashboard': contractor_queue(contractor_id),
+        # Not a view: the offer timeout sweep job (workflow.expire_offers)
+        'offer_sweep': (
+            WorkOrder.objects.awaiting_acceptance().filter(offered_at__lt=timezone.now())
+            .order_by('offered_at').values_list('id', flat=True)[:500]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the work order view queries and fail on sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help="Print the full plan for every query.")
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Unsupported database vendor: {connection.vendor}")
+
+        contractor = Company.objects.filter(is_contractor=True).only('id').first()
+        creator = CustomUser.objects.filter(role='property_manager').only('id').first()
+        if not contractor or not creator:
+            raise CommandError("Seed contractors and property managers before checking plans.")
+
+        failures = []
+        for name, queryset in view_querysets(contractor.id, creator.id).items():
+            plan = queryset.explain()
+            if options['verbose_plans']:
+                self.stdout.write(f"--- {name}\n{plan}\n")
+
+            index = EXPECTED_INDEXES.get(name)
+            if pattern.search(plan):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"SEQ SCAN  {name}"))
+            elif index and index not in plan:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"NO INDEX  {name} (expected {index})"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK        {name}"))
+
+        if failures:
+            raise CommandError(f"Sequential scan or missing index in: {', '.join(failures)}")
@@ -0,0 +1,40 @@
+"""
+Generate a synthetic dataset for load testing (bulk inserts).
+
+    python manage.py generate_synthetic_data --work-orders 100000 --clients 500
+
+All users get the password "ChangeMe!2025".
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = "Create synthetic companies, users, clients, units and work orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contractors', type=int, default=20)
+        parser.add_argument('--property-managers', type=int, default=3)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--units-per-client', type=int, default=40)
+        parser.add_argument('--users-per-company', type=int, default=2)
+        parser.add_argument('--work-orders', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = generate(
+                contractors=options['contractors'],
+                property_managers=options['property_managers'],
+                clients=options['clients'],
+                units_per_client=options['units_per_client'],
+                users_per_company=options['users_per_company'],
+                work_orders=options['work_orders'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                log=self.stdout.write,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Done: {counts}"))
@@ -0,0 +1,64 @@
+"""
+Move work order attachments saved before content-addressed storage
+(MEDIA_ROOT/workorder_attachments/...) into the attachment store
+(core/storage.py), deduplicating identical files, and point the orders
+at the stored blobs. Safe to re-run: orders already on a blob are skipped.
+
+    python manage.py import_legacy_attachments
+    python manage.py import_legacy_attachments --source /old/media --delete
+"""
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+
+from core.models import WorkOrder
+
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}$')
+
+
+class Command(BaseCommand):
+    help = "Copy pre-existing work order attachments into the content-addressed attachment store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.MEDIA_ROOT),
+                            help="Directory the legacy attachment names are relative to (default: MEDIA_ROOT).")
+        parser.add_argument('--delete', action='store_true',
+                            help="Delete each legacy file once every order using it is moved.")
+
+    def handle(self, *args, **options):
+        source = FileSystemStorage(location=options['source'])
+        storage = WorkOrder._meta.get_field('attachment').storage
+        moved = missing = 0
+        imported = {}  # legacy name -> blob name (orders sharing a file)
+
+        legacy = WorkOrder.objects.exclude(attachment='').exclude(attachment__isnull=True).only(
+            'id', 'attachment', 'attachment_name',
+        )
+        for order in legacy.iterator(chunk_size=500):
+            name = order.attachment.name
+            if BLOB_NAME_RE.match(name):
+                continue
+            if not source.exists(name):
+                missing += 1
+                self.stderr.write(f"#{order.id}: {name} not found in {options['source']}")
+                continue
+
+            with source.open(name, 'rb') as legacy_file:
+                blob = storage.save(name, legacy_file)  # one reference per order
+            WorkOrder.objects.filter(pk=order.pk).update(
+                attachment=blob,
+                attachment_name=order.attachment_name or os.path.basename(name),
+            )
+            imported[name] = blob
+            moved += 1
+
+        if options['delete']:
+            for name in imported:
+                source.delete(name)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} attachment(s) ({len(set(imported.values()))} distinct file(s)); {missing} missing."
+        ))
@@ -0,0 +1,61 @@
+"""
+Background job worker (core/services/jobs.py).
+
+Runs due jobs until the queue is empty, then polls every --sleep seconds.
+While idle it deletes finished jobs past JOB_RETENTION_DAYS (at most once
+an hour). Several workers can run side by side; SIGTERM/SIGINT finish the
+current job and exit.
+
+    python manage.py run_jobs              # worker loop (Procfile `worker:`)
+    python manage.py run_jobs --once       # drain the queue and exit (cron, tests)
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services.jobs import default_worker_id, prune_finished, run_pending
+
+PRUNE_INTERVAL = 3600  # seconds
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Run every due job, then exit.")
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="Seconds between polls when the queue is empty.")
+        parser.add_argument('--max-jobs', type=int, default=None,
+                            help="Exit after this many jobs (recycle long-lived workers).")
+        parser.add_argument('--worker-id', default='')
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        self.stopping = False
+        if not options['once']:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        total = 0
+        pruned_at = None
+        while not self.stopping:
+            close_old_connections()
+            ran = run_pending(worker_id, limit=1)  # one at a time: check for a stop signal between jobs
+            total += ran
+            if options['max_jobs'] is not None and total >= options['max_jobs']:
+                break
+            if not ran:
+                if pruned_at is None or time.monotonic() - pruned_at > PRUNE_INTERVAL:
+                    prune_finished()
+                    pruned_at = time.monotonic()
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+
+        self.stdout.write(f"{worker_id}: ran {total} job(s).")
+
+    def stop(self, signum, frame):
+        self.stopping = True
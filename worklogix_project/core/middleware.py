@@ -0,0 +1,127 @@
+"""
+Opt-in per-request SQL profiler.
+
+Enable with QUERY_PROFILER=true in the environment (see settings.py).
+For every request it records:
+  - number of queries and total DB time,
+  - duplicate query fingerprints (same SQL shape run many times),
+and flags a likely N+1 when one fingerprint repeats at least
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD times (e.g. `order.created_by` looked
+up once per table row).
+
+Results are exposed as a Server-Timing header (visible in browser
+devtools), logged to the 'core.profiler' logger when an N+1 is found, and
+aggregated per URL name in `query_stats` (per process) for the admin
+stats endpoint.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('core.profiler')
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+
+# url_name -> rolling summary; shared by all threads of this process
+query_stats = {}
+# One bucket for 404s and other unrouted requests, so scanners probing
+# random paths cannot grow query_stats without bound
+UNRESOLVED = '<unresolved>'
+_stats_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """Collapse variable parts of a SQL string so identical shapes compare equal."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _NUMBER.sub('N', sql)
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper hook that times every query."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+def _record(url_name, recorder, n_plus_one):
+    with _stats_lock:
+        stats = query_stats.setdefault(url_name, {
+            'requests': 0,
+            'queries': 0,
+            'db_ms': 0.0,
+            'max_queries': 0,
+            'n_plus_one_requests': 0,
+            'last_n_plus_one': [],
+        })
+        stats['requests'] += 1
+        stats['queries'] += recorder.count
+        stats['db_ms'] += recorder.duration * 1000
+        stats['max_queries'] = max(stats['max_queries'], recorder.count)
+        if n_plus_one:
+            stats['n_plus_one_requests'] += 1
+            stats['last_n_plus_one'] = n_plus_one
+
+
+def summary():
+    """Per-URL-name stats with averages, most queries per request first."""
+    with _stats_lock:
+        rows = [
+            {
+                'url_name': url_name,
+                **stats,
+                'avg_queries': round(stats['queries'] / stats['requests'], 1),
+                'avg_db_ms': round(stats['db_ms'] / stats['requests'], 2),
+                'db_ms': round(stats['db_ms'], 2),
+            }
+            for url_name, stats in query_stats.items()
+        ]
+    return sorted(rows, key=lambda row: row['avg_queries'], reverse=True)
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        recorder = _QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        n_plus_one = [
+            {'sql': sql[:200], 'count': count}
+            for sql, count in recorder.fingerprints.most_common()
+            if count >= self.threshold
+        ]
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = (match.view_name if match else None) or UNRESOLVED
+        _record(url_name, recorder, n_plus_one)
+
+        timing = f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"'
+        if n_plus_one:
+            timing += f', n1;desc="{len(n_plus_one)} repeated queries"'
+            logger.warning(
+                "Possible N+1 in %s (%s): %s",
+                url_name, request.path,
+                "; ".join(f"{q['count']}x {q['sql']}" for q in n_plus_one),
+            )
+        response['Server-Timing'] = timing
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_workorder_is_common_area_alter_workorder_unit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['-created_at', '-id'], name='wo_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['created_by', '-created_at'], name='wo_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['assigned_contractor', 'status', '-created_at'], name='wo_assigned_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'assigned', 'accepted'])), fields=['preferred_contractor', 'status', 'due_date'], name='wo_open_preferred_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'assigned', 'accepted'])), fields=['second_contractor', 'status', 'due_date'], name='wo_open_second_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'assigned', 'accepted'])), fields=['assigned_contractor', 'status', 'due_date'], name='wo_open_assigned_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_workorder_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('eircode', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('street', models.CharField(blank=True, max_length=255)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('county', models.CharField(blank=True, max_length=100)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Geocode cache entries',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_work_queue(apps, schema_editor):
+    """Build queue rows for the work orders that are still open."""
+    WorkOrder = apps.get_model('core', 'WorkOrder')
+    WorkQueueEntry = apps.get_model('core', 'WorkQueueEntry')
+
+    entries = []
+    open_orders = WorkOrder.objects.filter(status__in=['new', 'assigned', 'accepted']).only(
+        'id', 'title', 'status', 'due_date', 'preferred_contractor_id', 'second_contractor_id',
+        'assigned_contractor_id', 'rejected_by_first', 'rejected_by_second',
+    )
+    for order in open_orders.iterator(chunk_size=2000):
+        if order.status == 'new':
+            owners = set()
+            if order.preferred_contractor_id and not order.rejected_by_first:
+                owners.add(order.preferred_contractor_id)
+            if order.second_contractor_id and not order.rejected_by_second:
+                owners.add(order.second_contractor_id)
+        else:
+            owners = {order.assigned_contractor_id} if order.assigned_contractor_id else set()
+
+        entries += [
+            WorkQueueEntry(contractor_id=owner, work_order_id=order.id, title=order.title,
+                           status=order.status, due_date=order.due_date)
+            for owner in owners
+        ]
+        if len(entries) >= 2000:
+            WorkQueueEntry.objects.bulk_create(entries)
+            entries = []
+    WorkQueueEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('status', models.CharField(max_length=50)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('contractor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_queue', to='core.company')),
+                ('work_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_entries', to='core.workorder')),
+            ],
+            options={
+                'verbose_name_plural': 'Work queue entries',
+                'indexes': [models.Index(fields=['contractor', 'due_date', 'work_order'], name='queue_contractor_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('contractor', 'work_order'), name='unique_queue_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_work_queue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    PostgreSQL: tsvector column + GIN index on core_workorder.
+    SQLite: FTS5 shadow table keyed by work order id.
+    Both are filled for existing rows; see core/services/search.py.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE core_workorder ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX wo_search_vector_gin ON core_workorder USING GIN (search_vector)"
+        )
+        schema_editor.execute("""
+            UPDATE core_workorder AS target SET search_vector = sub.vector
+            FROM (
+                SELECT w.id,
+                    setweight(to_tsvector('english', coalesce(w.title, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(c.name, '') || ' ' || coalesce(u.name, '')), 'B') ||
+                    setweight(to_tsvector('english', coalesce(w.description, '')), 'C') ||
+                    setweight(to_tsvector('english', coalesce(w.completion_notes, '')), 'D') AS vector
+                FROM core_workorder w
+                LEFT JOIN core_client c ON c.id = w.client_id
+                LEFT JOIN core_unit u ON u.id = w.unit_id
+            ) AS sub
+            WHERE target.id = sub.id
+        """)
+    elif vendor == 'sqlite':
+        schema_editor.execute("""
+            CREATE VIRTUAL TABLE core_workorder_fts USING fts5(
+                title, description, completion_notes, client_name, unit_name,
+                tokenize = 'porter unicode61'
+            )
+        """)
+        schema_editor.execute("""
+            INSERT INTO core_workorder_fts (rowid, title, description, completion_notes, client_name, unit_name)
+            SELECT w.id, w.title, w.description, coalesce(w.completion_notes, ''),
+                   coalesce(c.name, ''), coalesce(u.name, '')
+            FROM core_workorder w
+            LEFT JOIN core_client c ON c.id = w.client_id
+            LEFT JOIN core_unit u ON u.id = w.unit_id
+        """)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS wo_search_vector_gin")
+        schema_editor.execute("ALTER TABLE core_workorder DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS core_workorder_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_workqueueentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_events(apps, schema_editor):
+    """Seed a history for existing orders from their created/accepted/completed timestamps."""
+    WorkOrder = apps.get_model('core', 'WorkOrder')
+    WorkOrderEvent = apps.get_model('core', 'WorkOrderEvent')
+
+    events = []
+    orders = WorkOrder.objects.only(
+        'id', 'created_at', 'accepted_at', 'completed_at', 'assigned_contractor_id',
+    )
+    for order in orders.iterator(chunk_size=2000):
+        events.append(WorkOrderEvent(work_order_id=order.id, event_type='created',
+                                     to_status='new', created_at=order.created_at))
+        if order.accepted_at:
+            events.append(WorkOrderEvent(work_order_id=order.id, event_type='accepted',
+                                         to_status='accepted', created_at=order.accepted_at,
+                                         company_id=order.assigned_contractor_id))
+        if order.completed_at:
+            events.append(WorkOrderEvent(work_order_id=order.id, event_type='completed',
+                                         to_status='completed', created_at=order.completed_at,
+                                         company_id=order.assigned_contractor_id))
+        if len(events) >= 2000:
+            WorkOrderEvent.objects.bulk_create(events)
+            events = []
+    WorkOrderEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_workorder_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkOrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('created', 'Created'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('completed', 'Completed')], max_length=20)),
+                ('to_status', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.company')),
+                ('work_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='core.workorder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['work_order', 'created_at'], name='event_order_created_idx'), models.Index(fields=['event_type', 'created_at'], name='event_type_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
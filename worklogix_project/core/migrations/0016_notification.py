@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('kind', models.CharField(choices=[('assigned', 'Assigned'), ('rejected', 'Rejected'), ('returned', 'Returned'), ('completed', 'Completed')], max_length=20)),
+                ('message', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+                ('work_order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.workorder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sent_at', 'recipient', 'created_at'], name='notification_pending_idx')],
+            },
+        ),
+    ]
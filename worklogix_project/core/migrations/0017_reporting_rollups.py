@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWorkOrderStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('contractor', 'Contractor'), ('business_type', 'Business type'), ('client', 'Client'), ('priority', 'Priority')], max_length=20)),
+                ('day', models.DateField()),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('accepted_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('rejected_count', models.PositiveIntegerField(default=0)),
+                ('returned_count', models.PositiveIntegerField(default=0)),
+                ('overdue_count', models.PositiveIntegerField(default=0)),
+                ('accept_seconds', models.FloatField(default=0)),
+                ('complete_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily work order stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField()),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['updated_at'], name='wo_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyworkorderstats',
+            constraint=models.UniqueConstraint(fields=('dimension', 'day', 'key'), name='unique_rollup_row'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+
+def backfill_candidates(apps, schema_editor):
+    """Candidate lists (preferred at 0, second at 1) for orders still waiting to be accepted."""
+    WorkOrder = apps.get_model('core', 'WorkOrder')
+    WorkOrderCandidate = apps.get_model('core', 'WorkOrderCandidate')
+
+    candidates = []
+    waiting = WorkOrder.objects.filter(status__in=['new', 'assigned']).only(
+        'id', 'preferred_contractor_id', 'second_contractor_id',
+    )
+    for order in waiting.iterator(chunk_size=2000):
+        if order.preferred_contractor_id:
+            candidates.append(WorkOrderCandidate(
+                work_order_id=order.id, contractor_id=order.preferred_contractor_id, position=0,
+            ))
+        if order.second_contractor_id and order.second_contractor_id != order.preferred_contractor_id:
+            candidates.append(WorkOrderCandidate(
+                work_order_id=order.id, contractor_id=order.second_contractor_id, position=1,
+            ))
+        if len(candidates) >= 2000:
+            WorkOrderCandidate.objects.bulk_create(candidates)
+            candidates = []
+    WorkOrderCandidate.objects.bulk_create(candidates)
+
+    # Orders already passed on to the second contractor
+    WorkOrder.objects.filter(
+        status='assigned', assigned_contractor_id=models.F('second_contractor_id'),
+    ).update(candidate_position=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_reporting_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkOrderCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'ordering': ['work_order', 'position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='candidate_position',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='offered_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='workorderevent',
+            name='event_type',
+            field=models.CharField(choices=[('created', 'Created'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('expired', 'Offer expired'), ('completed', 'Completed')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['status', 'offered_at'], name='wo_status_offered_idx'),
+        ),
+        migrations.AddField(
+            model_name='workordercandidate',
+            name='contractor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.company'),
+        ),
+        migrations.AddField(
+            model_name='workordercandidate',
+            name='work_order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='core.workorder'),
+        ),
+        migrations.AddConstraint(
+            model_name='workordercandidate',
+            constraint=models.UniqueConstraint(fields=('work_order', 'position'), name='unique_candidate_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='workordercandidate',
+            constraint=models.UniqueConstraint(fields=('work_order', 'contractor'), name='unique_candidate_contractor'),
+        ),
+        migrations.RunPython(backfill_candidates, migrations.RunPython.noop),
+    ]
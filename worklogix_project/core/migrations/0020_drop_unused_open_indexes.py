@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='workorder',
+            name='wo_open_preferred_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workorder',
+            name='wo_open_second_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workorder',
+            name='wo_open_assigned_idx',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_drop_unused_open_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='locked_by',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
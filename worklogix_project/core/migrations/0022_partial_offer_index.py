@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_notification_claims'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='workorder',
+            name='wo_status_offered_idx',
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'assigned'])), fields=['offered_at'], name='wo_offer_open_idx'),
+        ),
+    ]
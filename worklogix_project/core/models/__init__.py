@@ -5,3 +5,11 @@ from .client import Client              # Client entity (e.g. OMC, RMC, etc.)
 from .unit import Unit, UnitGroup       # Physical units (apartments, houses), and groups
 from .work_order import WorkOrder       # Work order/request model
 from .business_type import BusinessType # Enum-like model for contractor specialization
+from .geocode import GeocodeCacheEntry  # Cached Eircode -> address lookups
+from .work_queue import WorkQueueEntry  # Denormalized per-contractor work queue
+from .work_order_event import WorkOrderEvent  # Append-only work order history
+from .job import Job                    # Background job queue (core/services/jobs.py)
+from .notification import Notification  # Email outbox (core/services/notifications.py)
+from .reporting import DailyWorkOrderStats, ReportWatermark  # SLA reporting rollups
+from .work_order_candidate import WorkOrderCandidate  # Ordered contractor candidates per work order
+from .attachment import AttachmentBlob  # Content-addressed attachment files (core/storage.py)
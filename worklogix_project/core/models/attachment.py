@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class AttachmentBlob(models.Model):
+    """
+    One stored attachment file, keyed by the SHA-256 of its content, with
+    the number of work order attachments pointing at it. Maintained by
+    core.storage.ContentAddressedStorage; the file and row are deleted
+    after ref_count drops to zero.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class GeocodeCacheEntry(models.Model):
+    """
+    Cached geocoder result for one Eircode.
+    `eircode` is normalized (upper case, no spaces); entries older than
+    settings.GEOCODE_CACHE_TTL are refreshed on the next lookup.
+    """
+    eircode = models.CharField(max_length=10, primary_key=True)
+    street = models.CharField(max_length=255, blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    county = models.CharField(max_length=100, blank=True)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Geocode cache entries"
+
+    def __str__(self):
+        return self.eircode
+
+    def as_address(self):
+        return {'street': self.street, 'city': self.city, 'county': self.county}
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import models
+
+
+class Notification(models.Model):
+    """
+    Outbox row: one work order update to email to one user.
+
+    Written in the same transaction as the workflow change that caused it
+    (core/services/notifications.py) and marked sent by the delivery job,
+    which folds every pending row for a recipient into one email. The job
+    claims rows (locked_by/locked_at) and commits before it talks to SMTP.
+    """
+    ASSIGNED = 'assigned'
+    REJECTED = 'rejected'
+    RETURNED = 'returned'
+    COMPLETED = 'completed'
+    KIND_CHOICES = [
+        (ASSIGNED, 'Assigned'),
+        (REJECTED, 'Rejected'),
+        (RETURNED, 'Returned'),
+        (COMPLETED, 'Completed'),
+    ]
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                  related_name='notifications')
+    email = models.EmailField()  # address at the time of the event
+    work_order = models.ForeignKey('core.WorkOrder', on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Pending rows (sent_at IS NULL) grouped by recipient
+            models.Index(fields=['sent_at', 'recipient', 'created_at'], name='notification_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.work_order_id} -> {self.email}"
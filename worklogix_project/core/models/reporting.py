@@ -0,0 +1,59 @@
+from django.db import models
+
+
+class DailyWorkOrderStats(models.Model):
+    """
+    Pre-aggregated work order figures for the orders created on one day,
+    grouped by one dimension: per contractor, per business type, per client
+    and per priority are separate rollups in the same table.
+
+    Built by `manage.py build_rollups` (core/services/reporting.py) and read
+    by the SLA report, so reports never scan core_workorder. Latencies are
+    stored as totals in seconds together with the counts they cover, so any
+    date range can be averaged exactly by summing rows.
+
+    `key` is the grouped value: a Company / BusinessType / Client id, or the
+    priority itself; '' for orders without one. Contractor rows count
+    offers rather than orders (created_count is the offers made to that
+    company) and are built from the WorkOrderEvent log, so each rejection
+    or acceptance belongs to the company that made it.
+    """
+    CONTRACTOR = 'contractor'
+    BUSINESS_TYPE = 'business_type'
+    CLIENT = 'client'
+    PRIORITY = 'priority'
+    DIMENSION_CHOICES = [
+        (CONTRACTOR, 'Contractor'),
+        (BUSINESS_TYPE, 'Business type'),
+        (CLIENT, 'Client'),
+        (PRIORITY, 'Priority'),
+    ]
+
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    day = models.DateField()
+    key = models.CharField(max_length=50, blank=True)
+
+    created_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)   # rejected at least once
+    returned_count = models.PositiveIntegerField(default=0)   # returned to the creator
+    overdue_count = models.PositiveIntegerField(default=0)    # completed after, or still open past, the due date
+    accept_seconds = models.FloatField(default=0)    # sum of accepted_at - created_at
+    complete_seconds = models.FloatField(default=0)  # sum of completed_at - created_at
+
+    class Meta:
+        verbose_name_plural = "Daily work order stats"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'day', 'key'], name='unique_rollup_row'),
+        ]
+
+
+class ReportWatermark(models.Model):
+    """Highest WorkOrder.updated_at already folded into a rollup (one row per rollup)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    updated_at = models.DateTimeField()
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.updated_at}"
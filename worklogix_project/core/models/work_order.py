@@ -1,4 +1,5 @@
 from django.db import models 
+from django.db.models.expressions import RawSQL
 from django.conf import settings
 from django.utils import timezone
 from enum import Enum
@@ -6,6 +7,7 @@ from enum import Enum
 from core.models.client import Client
 from core.models.company import Company
 from core.models.business_type import BusinessType
+from core.storage import attachment_storage
 
 # ---------------------------------------------------
 # ENUM FOR STATUS – improves maintainability
@@ -21,6 +23,12 @@ class WorkOrderStatus(Enum):
 # Convert Enum to Django-friendly choices
 WORK_ORDER_STATUSES = [(status.name, status.value) for status in WorkOrderStatus]
 
+# Statuses that still need contractor action (as stored by the workflow views)
+OPEN_STATUSES = ['new', 'assigned', 'accepted']
+
+# Statuses in which an offer is waiting for a contractor to accept it
+OFFER_STATUSES = ['new', 'assigned']
+
 # ---------------------------------------------------
 # PRIORITY CHOICES
 # ---------------------------------------------------
@@ -31,6 +39,50 @@ PRIORITY_CHOICES = [
     ('critical', 'Critical'),
 ]
 
+# ---------------------------------------------------
+# VISIBILITY (who may see which work orders)
+# ---------------------------------------------------
+class WorkOrderQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Work orders `user` may see, as one predicate per role:
+          admin                        -> everything
+          property_manager / assistant -> orders they created (wo_creator_created_idx)
+          contractor                   -> orders where their company is preferred,
+                                          second or assigned (one FK index per column)
+          anyone else                  -> nothing
+        `user` is a CustomUser or a core.permissions.Principal. The result is
+        a normal queryset: filter, order and paginate it as usual.
+        """
+        role = getattr(user, 'role', None)
+        user_id = getattr(user, 'user_id', None) or getattr(user, 'pk', None)
+        company_id = getattr(user, 'company_id', None)
+
+        if role == 'admin':
+            return self.all()
+        if role in ('property_manager', 'assistant') and user_id:
+            return self.filter(created_by_id=user_id)
+        if role == 'contractor' and company_id:
+            return self.filter(
+                models.Q(preferred_contractor_id=company_id)
+                | models.Q(second_contractor_id=company_id)
+                | models.Q(assigned_contractor_id=company_id)
+            )
+        return self.none()
+
+    def awaiting_acceptance(self):
+        """
+        Orders whose offer is open (OFFER_STATUSES). The status test is
+        inlined with literal values, the same predicate as the partial
+        index wo_offer_open_idx, so the planner can prove the index covers
+        the query (SQLite never matches a partial index against bound
+        parameters).
+        """
+        statuses = ", ".join(f"'{status}'" for status in OFFER_STATUSES)
+        column = f'"{self.model._meta.db_table}"."status"'
+        return self.filter(RawSQL(f"{column} IN ({statuses})", (), output_field=models.BooleanField()))
+
+
 # ---------------------------------------------------
 # WORK ORDER MODEL
 # ---------------------------------------------------
@@ -110,13 +162,21 @@ class WorkOrder(models.Model):
     accepted_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     completion_notes = models.TextField(blank=True, null=True)
-    attachment = models.FileField(upload_to='workorder_attachments/', null=True, blank=True)
+    # Stored by content hash (core/storage.py); the uploaded file name is kept for downloads
+    attachment = models.FileField(upload_to='workorder_attachments/', storage=attachment_storage,
+                                  null=True, blank=True)
+    attachment_name = models.CharField(max_length=255, blank=True)
 
     # Track rejection logic
     rejected_by_first = models.BooleanField(default=False)
     rejected_by_second = models.BooleanField(default=False)
     returned_to_creator = models.BooleanField(default=False)
 
+    # Rejection cascade: index into `candidates` of the contractor holding
+    # the offer, and when that offer was made (for the timeout sweep)
+    candidate_position = models.PositiveSmallIntegerField(default=0)
+    offered_at = models.DateTimeField(default=timezone.now)
+
     # ---------------------------
     # Time tracking
     # ---------------------------
@@ -124,5 +184,27 @@ class WorkOrder(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WorkOrderQuerySet.as_manager()
+
+    # ---------------------------
+    # Indexes for the hot list/dashboard queries
+    # ---------------------------
+    class Meta:
+        indexes = [
+            # Admin list: keyset pagination on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='wo_created_id_idx'),
+            # PM/assistant "my work orders"
+            models.Index(fields=['created_by', '-created_at'], name='wo_creator_created_idx'),
+            # Contractor "my work orders": assigned + status__in + -created_at
+            models.Index(fields=['assigned_contractor', 'status', '-created_at'],
+                         name='wo_assigned_status_idx'),
+            # Reporting rollups: rows changed since the last watermark
+            models.Index(fields=['updated_at'], name='wo_updated_idx'),
+            # Offer timeout sweep: only orders with an open offer, by offered_at.
+            # Queried through awaiting_acceptance(), which repeats the condition with literals.
+            models.Index(fields=['offered_at'], name='wo_offer_open_idx',
+                         condition=models.Q(status__in=OFFER_STATUSES)),
+        ]
+
     def __str__(self):
         return self.title
@@ -0,0 +1,29 @@
+from django.db import models
+
+from core.models.company import Company
+
+
+class WorkOrderCandidate(models.Model):
+    """
+    One contractor in a work order's ordered candidate list.
+
+    Position 0 is the preferred contractor, 1 the second, and 2+ the extra
+    dispatch candidates. WorkOrder.candidate_position points at the
+    candidate currently holding the offer; a rejection or an expired offer
+    moves it to the next higher position (core/services/workflow.py).
+    Positions may have gaps (no second contractor, a deleted company).
+    """
+    work_order = models.ForeignKey('core.WorkOrder', on_delete=models.CASCADE, related_name='candidates')
+    contractor = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    position = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['work_order', 'position']
+        constraints = [
+            # Also the index the "next candidate" subquery reads
+            models.UniqueConstraint(fields=['work_order', 'position'], name='unique_candidate_position'),
+            models.UniqueConstraint(fields=['work_order', 'contractor'], name='unique_candidate_contractor'),
+        ]
+
+    def __str__(self):
+        return f"{self.work_order_id} #{self.position}: {self.contractor_id}"
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+EVENT_TYPES = [
+    ('created', 'Created'),
+    ('accepted', 'Accepted'),
+    ('rejected', 'Rejected'),
+    ('expired', 'Offer expired'),
+    ('completed', 'Completed'),
+]
+
+
+class WorkOrderEvent(models.Model):
+    """
+    Append-only history of a work order: one row per transition, holding the
+    status the order moved to. The status it came from is the previous
+    event's `to_status`. Rows are never updated or deleted individually
+    (see save/delete below); they only go away with their work order.
+    """
+    work_order = models.ForeignKey('core.WorkOrder', on_delete=models.CASCADE, related_name='events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    to_status = models.CharField(max_length=50)
+
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='+',
+    )
+    company = models.ForeignKey(
+        'core.Company',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['work_order', 'created_at'], name='event_order_created_idx'),
+            models.Index(fields=['event_type', 'created_at'], name='event_type_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.work_order_id}: {self.event_type} -> {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Work order events are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Work order events are append-only.")
@@ -0,0 +1,33 @@
+from django.db import models
+
+from core.models.company import Company
+
+
+class WorkQueueEntry(models.Model):
+    """
+    Denormalized contractor work queue: one row per (contractor, open work order)
+    the contractor currently owns or has been offered.
+
+    Kept in sync from WorkOrder state by core.services.work_queue, so the
+    contractor dashboard is a single index range scan on (contractor, due_date)
+    instead of OR-ing three predicates over the whole work order table.
+    """
+    contractor = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='work_queue')
+    work_order = models.ForeignKey('core.WorkOrder', on_delete=models.CASCADE, related_name='queue_entries')
+
+    # Copies of the WorkOrder fields the dashboard renders
+    title = models.CharField(max_length=255)
+    status = models.CharField(max_length=50)
+    due_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Work queue entries"
+        constraints = [
+            models.UniqueConstraint(fields=['contractor', 'work_order'], name='unique_queue_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['contractor', 'due_date', 'work_order'], name='queue_contractor_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.contractor_id} -> {self.work_order_id}"
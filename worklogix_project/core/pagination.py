@@ -0,0 +1,74 @@
+"""
+Keyset (cursor) pagination helpers.
+
+OFFSET pagination gets slower the deeper you go, because the database still
+has to walk every skipped row. Keyset pagination remembers the last row we
+showed and asks for "rows after this one", so page N costs the same as page 1.
+
+Cursors are opaque, URL-safe strings that encode the sort key of the last row
+of the previous page: (created_at, id).
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, pk):
+    """Encode a (created_at, id) pair as an opaque URL-safe cursor."""
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by `encode_cursor`.
+    Returns (created_at, id) or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a user-supplied page size to [1, MAX_PAGE_SIZE]."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of `queryset` ordered newest first by (created_at, id).
+
+    Returns a tuple (rows, next_cursor). `next_cursor` is None on the last page.
+    Fetches page_size + 1 rows so we know whether another page exists without
+    running a separate COUNT query.
+    """
+    queryset = queryset.order_by("-created_at", "-id")
+
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return rows, next_cursor
@@ -0,0 +1,87 @@
+"""
+Authorization helpers.
+
+Checks compare foreign-key ids (`order.assigned_contractor_id`) with the
+user's `company_id`, never model instances, so no Company row is loaded
+just to be compared. Which work orders a user may see at all is
+WorkOrder.objects.visible_to(user) (core/models/work_order.py).
+
+What a request knows about its user (role, company id and the company's
+contractor / property manager flags) is a Principal. It is built once per
+request and kept in the session, so after the first request it costs no
+queries at all. The session copy is dropped when the user's role or company
+changes (both are on the user row the auth middleware already loaded) and
+when any Company is saved (the 'companies' cache version, see
+core/signals.py).
+"""
+from dataclasses import asdict, dataclass
+
+from core.models import Company
+from core.caching import get_version
+
+SESSION_KEY = 'auth:principal'
+VERSION_NAME = 'companies'
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    role: str
+    company_id: int = None
+    is_contractor: bool = False
+    is_property_manager: bool = False
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def in_company(self, *company_ids):
+        """True if the user's company is one of `company_ids` (ids, not instances)."""
+        return self.company_id is not None and self.company_id in company_ids
+
+
+def _build(user):
+    flags = {}
+    if user.company_id:
+        flags = dict(
+            Company.objects.filter(pk=user.company_id)
+            .values('is_contractor', 'is_property_manager')
+            .first() or {}
+        )
+    return Principal(user_id=user.pk, role=user.role, company_id=user.company_id, **flags)
+
+
+def get_principal(request):
+    """The request user's Principal (None for anonymous users)."""
+    if hasattr(request, '_principal'):
+        return request._principal
+
+    user = request.user
+    principal = None
+    if user.is_authenticated:
+        version = get_version(VERSION_NAME)
+        stored = request.session.get(SESSION_KEY)
+        if (
+            stored
+            and stored.get('version') == version
+            and stored.get('user_id') == user.pk
+            and stored.get('role') == user.role
+            and stored.get('company_id') == user.company_id
+        ):
+            stored = dict(stored)
+            stored.pop('version')
+            principal = Principal(**stored)
+        else:
+            principal = _build(user)
+            request.session[SESSION_KEY] = {**asdict(principal), 'version': version}
+
+    request._principal = principal
+    return principal
+
+
+# --------------------------
+# Work order checks
+# --------------------------
+def work_order_company_ids(order):
+    """Contractor company ids attached to an order (preferred, second, assigned)."""
+    return (order.preferred_contractor_id, order.second_contractor_id, order.assigned_contractor_id)
@@ -0,0 +1,4 @@
+"""
+Domain services shared by several views (bulk writes, external lookups, ...).
+Views stay thin and call into these modules.
+"""
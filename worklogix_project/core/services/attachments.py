@@ -0,0 +1,129 @@
+"""
+Serving work order attachments.
+
+attachment_response() answers a download that the caller has already
+authorised (see download_work_order_attachment):
+
+  - ATTACHMENT_SENDFILE set and the file is on local disk: an empty
+    response with X-Accel-Redirect / X-Sendfile, so the web server streams
+    the file (and handles Range itself);
+  - otherwise the file is streamed from storage by Django: FileResponse for
+    the whole file, or 206 Partial Content for a single `Range: bytes=`
+    request (resumed downloads, video seeking), read in
+    ATTACHMENT_CHUNK_SIZE chunks.
+
+Blob names are content hashes, so the hash is a strong ETag: a client
+that already has the file gets a 304 without the file being opened.
+"""
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from core.storage import blob_hash
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+SENDFILE_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single `bytes=` range, or None to send the
+    whole file (no header, or a multi-range / malformed one, which RFC 9110
+    lets us ignore). Raises RangeNotSatisfiable past the end of the file.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _read_range(file, start, length, chunk_size):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _sendfile(storage, name, content_type):
+    header = SENDFILE_HEADERS.get(settings.ATTACHMENT_SENDFILE)
+    if header is None:
+        return None
+    path = storage.local_path(name)
+    if path is None:  # not on local disk (S3): stream it ourselves
+        return None
+    response = HttpResponse(content_type=content_type)
+    if header == 'X-Accel-Redirect':
+        response[header] = settings.ATTACHMENT_SENDFILE_PREFIX.rstrip('/') + '/' + name
+    else:
+        response[header] = path
+    return response
+
+
+def attachment_response(request, attachment, filename, as_attachment=False):
+    """Response for a stored attachment (a FieldFile, e.g. order.attachment), downloaded as `filename`."""
+    storage, name = attachment.storage, attachment.name
+    etag = f'"{blob_hash(name)}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = _sendfile(storage, name, content_type)
+    if response is None:
+        size = storage.size(name)
+        # If-Range: only honour the range when the client's copy is this content
+        if_range = request.headers.get('If-Range')
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size) if if_range in (None, etag) else None
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        file = storage.open(name, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+            response['Content-Length'] = size
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(file, start, end - start + 1, settings.ATTACHMENT_CHUNK_SIZE),
+                status=206, content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=86400'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
@@ -0,0 +1,208 @@
+"""
+Contractor auto-dispatch: rank contractors for a new work order.
+
+Each contractor of the order's business type gets a score in [0, 1], a
+weighted sum (WEIGHTS) of:
+
+  load        fewer open orders in its work queue is better
+  acceptance  share of the offers made to it that it accepted, wherever
+              it stood in the candidate list (smoothed towards 0.5 so a
+              contractor with two offers is not "100%")
+  speed       average hours from creation to completion
+  history     completed work at the same unit (best) or the same client
+
+Ranking must not touch the database: the figures come from a Snapshot
+held in process memory, built with a handful of GROUP BY queries from the
+work queue, the contractor rollups (core/services/reporting.py, last
+DISPATCH_HISTORY_DAYS) and completed orders. The snapshot is rebuilt after
+DISPATCH_STATS_TTL seconds, or as soon as any Company is saved (the
+'contractors' cache version, see core/signals.py), so ranking 1,000
+contractors is a pure-Python loop of well under a few milliseconds.
+
+Used by WorkOrderForm (choice order, and filling empty contractor fields
+when the user ticks auto-dispatch) and by /api/dispatch/rank/.
+"""
+import heapq
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from core.caching import get_version
+from core.models import Company, DailyWorkOrderStats, WorkOrder, WorkQueueEntry
+
+WEIGHTS = {'load': 0.3, 'acceptance': 0.3, 'speed': 0.2, 'history': 0.2}
+
+LOAD_HALF = 5             # open orders at which the load score is 0.5
+SPEED_HALF_HOURS = 72     # average completion time at which the speed score is 0.5
+PRIOR_RATE, PRIOR_WEIGHT = 0.5, 5   # acceptance smoothing: 5 imaginary offers at 50%
+CLIENT_HISTORY_FULL = 3   # completed orders at a client for the full client score
+CLIENT_HISTORY_MAX = 0.6  # a client match counts at most this much; a unit match is 1.0
+
+
+@dataclass(slots=True)
+class ContractorStats:
+    company_id: int
+    name: str
+    business_type_id: int = None
+    open_orders: int = 0
+    offered: int = 0
+    accepted: int = 0
+    completed: int = 0
+    complete_seconds: float = 0.0
+
+
+@dataclass
+class Snapshot:
+    contractors: dict = field(default_factory=dict)        # company_id -> ContractorStats
+    by_business_type: dict = field(default_factory=dict)   # business_type_id -> [ContractorStats]
+    client_history: dict = field(default_factory=dict)     # client_id -> {company_id: completed orders}
+    unit_history: dict = field(default_factory=dict)       # unit_id -> {company_id: completed orders}
+    version: object = None
+    built_at: float = 0.0
+
+    def index(self):
+        by_type = defaultdict(list)
+        for stats in self.contractors.values():
+            by_type[stats.business_type_id].append(stats)
+        self.by_business_type = dict(by_type)
+        return self
+
+
+@dataclass
+class Candidate:
+    company_id: int
+    name: str
+    score: float
+    components: dict
+
+    def as_dict(self):
+        return {
+            'id': self.company_id,
+            'name': self.name,
+            'score': round(self.score, 4),
+            'components': {name: round(value, 4) for name, value in self.components.items()},
+        }
+
+
+# --------------------------
+# Snapshot
+# --------------------------
+def build_snapshot():
+    """Load every contractor's figures (a few GROUP BY queries)."""
+    snapshot = Snapshot(version=get_version('contractors'), built_at=time.monotonic())
+    contractors = snapshot.contractors
+    for pk, name, business_type_id in (
+        Company.objects.filter(is_contractor=True).values_list('id', 'name', 'business_type_id')
+    ):
+        contractors[pk] = ContractorStats(pk, name, business_type_id)
+
+    for company_id, count in (
+        WorkQueueEntry.objects.values('contractor_id').annotate(n=Count('id')).values_list('contractor_id', 'n')
+    ):
+        if company_id in contractors:
+            contractors[company_id].open_orders = count
+
+    # Contractor rollups count offers per company from the event log: created_count
+    # is the offers made to it, accepted_count the ones it accepted itself
+    since = timezone.localdate() - timedelta(days=settings.DISPATCH_HISTORY_DAYS)
+    rollups = (
+        DailyWorkOrderStats.objects
+        .filter(dimension=DailyWorkOrderStats.CONTRACTOR, day__gte=since)
+        .exclude(key='')
+        .values('key')
+        .annotate(
+            offered=Sum('created_count'), accepted=Sum('accepted_count'),
+            completed=Sum('completed_count'), seconds=Sum('complete_seconds'),
+        )
+    )
+    for row in rollups:
+        stats = contractors.get(int(row['key']))
+        if stats:
+            stats.offered, stats.accepted = row['offered'], row['accepted']
+            stats.completed, stats.complete_seconds = row['completed'], row['seconds']
+
+    completed = WorkOrder.objects.filter(status='completed', assigned_contractor__isnull=False)
+    for target, column in ((snapshot.client_history, 'client_id'), (snapshot.unit_history, 'unit_id')):
+        rows = (
+            completed.exclude(**{f'{column}__isnull': True})
+            .values(column, 'assigned_contractor_id')
+            .annotate(n=Count('id'))
+            .values_list(column, 'assigned_contractor_id', 'n')
+            .order_by()
+        )
+        for key, company_id, count in rows:
+            target.setdefault(key, {})[company_id] = count
+
+    return snapshot.index()
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """The process-wide Snapshot, rebuilt when stale or when contractors changed."""
+    global _snapshot
+    snapshot = _snapshot
+    if (
+        snapshot is None
+        or time.monotonic() - snapshot.built_at > settings.DISPATCH_STATS_TTL
+        or snapshot.version != get_version('contractors')
+    ):
+        with _lock:
+            if _snapshot is snapshot:  # nobody rebuilt it while we waited
+                _snapshot = build_snapshot()
+            snapshot = _snapshot
+    return snapshot
+
+
+# --------------------------
+# Scoring
+# --------------------------
+def score(stats, client_counts, unit_counts):
+    """(score, components) for one contractor."""
+    components = {
+        'load': LOAD_HALF / (LOAD_HALF + stats.open_orders),
+        'acceptance': (stats.accepted + PRIOR_RATE * PRIOR_WEIGHT) / (stats.offered + PRIOR_WEIGHT),
+        'speed': (
+            SPEED_HALF_HOURS / (SPEED_HALF_HOURS + stats.complete_seconds / stats.completed / 3600)
+            if stats.completed else 0.5
+        ),
+    }
+    if unit_counts.get(stats.company_id):
+        components['history'] = 1.0
+    else:
+        client_orders = client_counts.get(stats.company_id, 0)
+        components['history'] = CLIENT_HISTORY_MAX * min(1.0, client_orders / CLIENT_HISTORY_FULL)
+    return sum(WEIGHTS[name] * value for name, value in components.items()), components
+
+
+def rank(business_type_id=None, client_id=None, unit_id=None, limit=10, exclude=(), snapshot=None):
+    """
+    The best `limit` contractors for an order (all of them for None),
+    highest score first, as Candidates. Only contractors of
+    `business_type_id` are considered when it is given; ids in `exclude`
+    are skipped.
+    """
+    snapshot = snapshot or get_snapshot()
+    if business_type_id is None:
+        pool = snapshot.contractors.values()
+    else:
+        pool = snapshot.by_business_type.get(business_type_id, ())
+    client_counts = snapshot.client_history.get(client_id, {})
+    unit_counts = snapshot.unit_history.get(unit_id, {})
+    excluded = set(exclude)
+
+    scored = (
+        (*score(stats, client_counts, unit_counts), stats)
+        for stats in pool if stats.company_id not in excluded
+    )
+    order = lambda item: (item[0], -item[2].company_id)  # ties: lower id first
+    best = sorted(scored, key=order, reverse=True) if limit is None else heapq.nlargest(limit, scored, key=order)
+    return [Candidate(stats.company_id, stats.name, total, components) for total, components, stats in best]
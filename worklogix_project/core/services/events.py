@@ -0,0 +1,113 @@
+"""
+Work order history (core.WorkOrderEvent).
+
+Every workflow transition appends one event in the same transaction as the
+status UPDATE (see core/services/workflow.py); create_work_order appends the
+'created' event. Events are never edited, so a timeline is simply the
+order's events sorted by (created_at, id).
+
+Reading histories:
+  - timeline(order_id)          -> compact list for one order
+  - timelines_for(order_ids)    -> {order_id: [...]} for many orders, ONE query
+  - with_events(queryset)       -> prefetch `order.events` for templates
+  - time_in_status(timeline)    -> seconds spent in each status
+"""
+from collections import defaultdict
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from core.models import WorkOrderEvent
+
+TIMELINE_FIELDS = (
+    'work_order_id', 'event_type', 'to_status', 'created_at',
+    'actor__username', 'company__name',
+)
+
+
+def record(work_order_id, event_type, to_status, actor=None, company_id=None, at=None):
+    """Append one event. Call inside the transaction that changed the order."""
+    return WorkOrderEvent.objects.create(
+        work_order_id=work_order_id,
+        event_type=event_type,
+        to_status=to_status,
+        actor=actor if actor is not None and actor.is_authenticated else None,
+        company_id=company_id,
+        created_at=at or timezone.now(),
+    )
+
+
+def events_from_timestamps(order):
+    """
+    Best-effort history for an order that predates the event log (or was
+    bulk-created): rebuilt from created_at/accepted_at/completed_at.
+    Returns unsaved events for bulk_create.
+    """
+    history = [WorkOrderEvent(work_order_id=order.id, event_type='created',
+                              to_status='new', created_at=order.created_at)]
+    if order.accepted_at:
+        history.append(WorkOrderEvent(
+            work_order_id=order.id, event_type='accepted', to_status='accepted',
+            company_id=order.assigned_contractor_id, created_at=order.accepted_at,
+        ))
+    if order.completed_at:
+        history.append(WorkOrderEvent(
+            work_order_id=order.id, event_type='completed', to_status='completed',
+            company_id=order.assigned_contractor_id, created_at=order.completed_at,
+        ))
+    return history
+
+
+# --------------------------
+# Reading
+# --------------------------
+def _compact(row):
+    return {
+        'type': row['event_type'],
+        'status': row['to_status'],
+        'at': row['created_at'],
+        'actor': row['actor__username'],
+        'company': row['company__name'],
+    }
+
+
+def timelines_for(work_order_ids):
+    """{work_order_id: [event, ...]} oldest first, for all ids in one query."""
+    ids = list(work_order_ids)
+    timelines = {pk: [] for pk in ids}
+    if not ids:
+        return timelines
+    rows = (
+        WorkOrderEvent.objects
+        .filter(work_order_id__in=ids)
+        .order_by('work_order_id', 'created_at', 'id')
+        .values(*TIMELINE_FIELDS)
+    )
+    for row in rows:
+        timelines[row['work_order_id']].append(_compact(row))
+    return timelines
+
+
+def timeline(work_order_id):
+    return timelines_for([work_order_id])[work_order_id]
+
+
+def with_events(queryset):
+    """Prefetch `events` (with actor/company) in one extra query for the whole queryset."""
+    return queryset.prefetch_related(Prefetch(
+        'events',
+        queryset=WorkOrderEvent.objects.select_related('actor', 'company').order_by('created_at', 'id'),
+    ))
+
+
+def time_in_status(events, until=None):
+    """
+    Seconds spent in each status for one timeline (as returned above).
+    The last status counts up to `until` (default: now).
+    """
+    until = until or timezone.now()
+    totals = defaultdict(float)
+    for current, following in zip(events, events[1:] + [None]):
+        end = following['at'] if following else until
+        totals[current['status']] += max((end - current['at']).total_seconds(), 0)
+    return dict(totals)
@@ -0,0 +1,194 @@
+"""
+Streaming work order export (CSV and XLSX).
+
+Rows are read with values_list(...).iterator(chunk_size=...) — a server-side
+cursor on PostgreSQL, chunked fetches elsewhere — with client, unit,
+contractor and creator names joined in the same query. Output is produced
+one batch of rows at a time, so memory stays flat no matter how many orders
+are exported.
+
+XLSX is written without a spreadsheet library: an .xlsx file is a zip of a
+few XML parts, and zipfile can write to an unseekable stream (it falls back
+to data descriptors), so the sheet is compressed and yielded as it goes.
+"""
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+CHUNK_SIZE = 2000
+BATCH_ROWS = 500
+
+# (header, values_list field)
+EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Title', 'title'),
+    ('Status', 'status'),
+    ('Priority', 'priority'),
+    ('Client', 'client__name'),
+    ('Unit', 'unit__name'),
+    ('Common Area', 'is_common_area'),
+    ('Created By', 'created_by__username'),
+    ('Preferred Contractor', 'preferred_contractor__name'),
+    ('Second Contractor', 'second_contractor__name'),
+    ('Assigned Contractor', 'assigned_contractor__name'),
+    ('Due Date', 'due_date'),
+    ('Created At', 'created_at'),
+    ('Accepted At', 'accepted_at'),
+    ('Completed At', 'completed_at'),
+]
+
+# Characters XML 1.0 does not allow (a stray one would corrupt the workbook)
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Cells starting with these are evaluated as formulas by spreadsheet apps
+_FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+
+def export_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Yield one tuple per work order (EXPORT_COLUMNS order), newest first."""
+    fields = [field for _, field in EXPORT_COLUMNS]
+    return (
+        queryset
+        .order_by('-created_at', '-id')
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat(sep=' ', timespec='seconds') if hasattr(value, 'hour') else value.isoformat()
+    return str(value)
+
+
+def _batches(rows, size=BATCH_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --------------------------
+# CSV
+# --------------------------
+def _csv_cell(value):
+    text = _text(value)
+    if text.startswith(_FORMULA_PREFIXES) and not isinstance(value, (int, float)):
+        text = "'" + text
+    return text
+
+
+def stream_csv(rows):
+    """Yield CSV text: a header line, then one chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    yield buffer.getvalue()
+
+    for batch in _batches(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+
+# --------------------------
+# XLSX
+# --------------------------
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+class _StreamSink:
+    """Write-only file object for zipfile; drain() hands back what was written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub('', _text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(rows, sheet_name='Work Orders'):
+    """Yield the bytes of a single-sheet .xlsx workbook (inline strings, no styles)."""
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name)))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _xlsx_row([h for h, _ in EXPORT_COLUMNS])).encode())
+            for batch in _batches(rows):
+                sheet.write(''.join(_xlsx_row(row) for row in batch).encode())
+                yield sink.drain()
+            sheet.write(_SHEET_END.encode())
+    yield sink.drain()
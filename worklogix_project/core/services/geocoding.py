@@ -0,0 +1,177 @@
+"""
+Eircode geocoding with a persistent cache.
+
+- Results are stored in GeocodeCacheEntry keyed by normalized Eircode and
+  reused until settings.GEOCODE_CACHE_TTL expires.
+- All HTTP calls share one pooled requests.Session with strict
+  (connect, read) timeouts, so a slow geocoder cannot stall a worker.
+- resolve_eircodes() looks up many Eircodes at once: one query for the
+  cached ones, concurrent requests for the rest, one upsert to store them.
+
+settings.GEOCODER_URL can point at a local stub that speaks the Google
+Geocoding JSON format.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from core.models import GeocodeCacheEntry
+
+logger = logging.getLogger(__name__)
+
+EMPTY_ADDRESS = {'street': '', 'city': '', 'county': ''}
+ADDRESS_FIELDS = tuple(EMPTY_ADDRESS)
+
+_session = None
+
+
+def normalize_eircode(eircode):
+    """'d02 x285 ' -> 'D02X285'"""
+    return "".join((eircode or "").split()).upper()
+
+
+def get_session():
+    """Process-wide HTTP session with a connection pool sized for batch lookups."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.GEOCODER_MAX_WORKERS,
+            max_retries=1,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+def parse_geocode_response(data):
+    """Turn a Google-style geocode JSON payload into street/city/county."""
+    if data.get("status") != "OK" or not data.get("results"):
+        return None
+
+    result = data["results"][0]
+    components = result.get("address_components", [])
+    formatted = result.get("formatted_address", "")
+    street = city = county = ""
+
+    for comp in components:
+        if "route" in comp["types"] or "premise" in comp["types"]:
+            street = comp["long_name"]
+        elif "locality" in comp["types"] and not city:
+            city = comp["long_name"]
+        elif "administrative_area_level_1" in comp["types"]:
+            county = comp["long_name"]
+
+    if not street and formatted:
+        street = formatted.split(",")[0].strip()
+
+    return {
+        "street": street or "Unknown Street",
+        "city": city or "Unknown City",
+        "county": county or "Unknown County",
+    }
+
+
+def fetch_address(eircode):
+    """
+    Call the geocoder for one (normalized) Eircode, bypassing the cache.
+    Returns an address dict, or None if the lookup failed.
+    """
+    params = {"address": eircode, "key": settings.GOOGLE_MAPS_API_KEY}
+    timeout = (settings.GEOCODER_CONNECT_TIMEOUT, settings.GEOCODER_READ_TIMEOUT)
+
+    try:
+        response = get_session().get(settings.GEOCODER_URL, params=params, timeout=timeout)
+        response.raise_for_status()
+        return parse_geocode_response(response.json())
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("Geocoding %s failed: %s", eircode, e)
+        return None
+
+
+def _fresh_after():
+    return timezone.now() - timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+
+
+def resolve_eircodes(eircodes):
+    """
+    Resolve many Eircodes. Returns {normalized_eircode: address_dict};
+    Eircodes that could not be resolved map to EMPTY_ADDRESS.
+    """
+    wanted = {normalize_eircode(e) for e in eircodes} - {""}
+    if not wanted:
+        return {}
+
+    cached = {
+        entry.eircode: entry.as_address()
+        for entry in GeocodeCacheEntry.objects.filter(
+            eircode__in=wanted, fetched_at__gte=_fresh_after()
+        )
+    }
+
+    missing = sorted(wanted - cached.keys())
+    if missing:
+        workers = min(settings.GEOCODER_MAX_WORKERS, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = dict(zip(missing, pool.map(fetch_address, missing)))
+
+        now = timezone.now()
+        entries = [
+            GeocodeCacheEntry(eircode=eircode, fetched_at=now, **address)
+            for eircode, address in fetched.items()
+            if address  # don't cache failures; retry next time
+        ]
+        GeocodeCacheEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['eircode'],
+            update_fields=['street', 'city', 'county', 'fetched_at'],
+        )
+        cached.update({e.eircode: e.as_address() for e in entries})
+
+    return {eircode: cached.get(eircode, dict(EMPTY_ADDRESS)) for eircode in wanted}
+
+
+def lookup_eircode(eircode):
+    """Resolve a single Eircode (cached). Returns street/city/county strings."""
+    key = normalize_eircode(eircode)
+    if not key:
+        return dict(EMPTY_ADDRESS)
+    return resolve_eircodes([key])[key]
+
+
+def cached_address(eircode):
+    """
+    The stored address for an Eircode, without calling the geocoder
+    (EMPTY_ADDRESS if it has not been resolved yet). For request handlers;
+    lookups that may go to the network belong in a background job.
+    """
+    key = normalize_eircode(eircode)
+    entry = GeocodeCacheEntry.objects.filter(eircode=key, fetched_at__gte=_fresh_after()).first() if key else None
+    return entry.as_address() if entry else dict(EMPTY_ADDRESS)
+
+
+def fill_addresses(records):
+    """
+    Fill blank street/city/county in unit dicts from their 'eircode',
+    with one resolve_eircodes() call for all of them.
+    """
+    needs_lookup = [
+        data for data in records
+        if data.get('eircode') and not all(data.get(name) for name in ADDRESS_FIELDS)
+    ]
+    if not needs_lookup:
+        return
+    addresses = resolve_eircodes(data['eircode'] for data in needs_lookup)
+    for data in needs_lookup:
+        address = addresses.get(normalize_eircode(data['eircode']), {})
+        for name in ADDRESS_FIELDS:
+            if not data.get(name):
+                data[name] = address.get(name) or None
@@ -0,0 +1,292 @@
+"""
+Bulk import of clients and units from CSV.
+
+One CSV row per unit; the client columns repeat on every row of that
+client (a row with no unit_name just creates/reuses the client):
+
+    client_name, client_address, company, client_notes,
+    unit_name, unit_type, eircode, street, city, county,
+    unit_contact_name, unit_contact_email, unit_contact_number
+
+`company` is the property manager company name (or id).
+
+Rows are read as a stream and processed in chunks:
+  1. validate each row with the ClientCreationForm / UnitForm field rules
+     (clients once per distinct client, units through the form's fields
+     directly so 100k rows don't build 100k form instances),
+  2. fill street/city/county for Eircodes with one resolve_eircodes() call
+     per chunk (cached, see core/services/geocoding.py),
+  3. reuse existing clients and skip units that already exist (one query each),
+  4. bulk_create the chunk's clients and units in one transaction.
+
+Bad rows never abort the import: they are collected in ImportResult.errors
+with their CSV line number, and write_report() turns them into a CSV.
+
+Uploads from the admin page are imported by the 'clients.import' job
+(core/tasks.py), never in the request: a 100k-row file and its geocoder
+lookups take far longer than a page load. The job stores
+ImportResult.as_dict() (counts and every row error) as its result.
+"""
+import csv
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from core.caching import bump_version
+from core.counters import invalidate_entity_counts
+from core.forms import ClientCreationForm, UnitForm
+from core.models import Client, Company, Unit
+from core.services.geocoding import fill_addresses
+
+DEFAULT_CHUNK_SIZE = 1000
+
+CLIENT_COLUMNS = ('client_name', 'client_address', 'company', 'client_notes')
+UNIT_COLUMNS = (
+    'unit_name', 'unit_type', 'eircode', 'street', 'city', 'county',
+    'unit_contact_name', 'unit_contact_email', 'unit_contact_number',
+)
+REQUIRED_COLUMNS = ('client_name', 'client_address', 'company')
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    clients_created: int = 0
+    units_created: int = 0
+    units_skipped: int = 0  # already existed (or repeated in the file)
+    errors: list = field(default_factory=list)
+
+    @property
+    def error_count(self):
+        return len(self.errors)
+
+    def as_dict(self):
+        """JSON-serialisable form, for Job.result."""
+        return {
+            'rows': self.rows,
+            'clients_created': self.clients_created,
+            'units_created': self.units_created,
+            'units_skipped': self.units_skipped,
+            'errors': [[error.line, error.message] for error in self.errors],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            rows=data['rows'],
+            clients_created=data['clients_created'],
+            units_created=data['units_created'],
+            units_skipped=data['units_skipped'],
+            errors=[RowError(line, message) for line, message in data['errors']],
+        )
+
+
+class ImportFormatError(Exception):
+    """The file is not a usable import CSV (e.g. required columns missing)."""
+
+
+# --------------------------
+# Validation
+# --------------------------
+def _error_text(errors):
+    return "; ".join(
+        f"{name}: {' '.join(messages)}" if name != '__all__' else ' '.join(messages)
+        for name, messages in errors.items()
+    )
+
+
+def _clean_fields(fields, data):
+    """Run form field rules without building a form. Returns (cleaned, errors)."""
+    cleaned, errors = {}, {}
+    for name, form_field in fields.items():
+        try:
+            cleaned[name] = form_field.clean(data.get(name, ''))
+        except ValidationError as e:
+            errors[name] = e.messages
+    return cleaned, errors
+
+
+UNIT_FIELDS = UnitForm.base_fields
+
+
+def _unit_data(row):
+    data = {name: (row.get(name) or '').strip() for name in UNIT_COLUMNS}
+    data['name'] = data.pop('unit_name')
+    data['unit_type'] = data['unit_type'].lower() or 'apartment'
+    return data
+
+
+class _ClientResolver:
+    """
+    Validates each distinct client once (ClientCreationForm rules) and
+    remembers its outcome for the rest of the file.
+    """
+
+    def __init__(self):
+        self.pm_companies = {}   # lowercase name / str(id) -> id
+        for pk, name in Company.objects.filter(is_property_manager=True).values_list('id', 'name'):
+            self.pm_companies[name.strip().lower()] = pk
+            self.pm_companies[str(pk)] = pk
+        self.validated = {}      # (company_id, name) -> cleaned data or error text
+        self.client_ids = {}     # (company_id, name) -> Client id
+
+    def key_and_data(self, row):
+        company_ref = (row.get('company') or '').strip()
+        company_id = self.pm_companies.get(company_ref.lower())
+        name = (row.get('client_name') or '').strip()
+        if company_id is None:
+            return None, f"company: unknown property manager company '{company_ref}'."
+
+        key = (company_id, name)
+        if key not in self.validated:
+            form = ClientCreationForm({
+                'name': name,
+                'address': (row.get('client_address') or '').strip(),
+                'company': company_id,
+                'notes': (row.get('client_notes') or '').strip(),
+                # unit counts are form-only fields; units come from the rows
+                'num_apartments': 0, 'num_duplexes': 0,
+                'num_houses': 0, 'num_commercial_units': 0,
+            })
+            self.validated[key] = (
+                {name_: form.cleaned_data[name_] for name_ in ('name', 'address', 'notes')}
+                if form.is_valid() else _error_text(form.errors)
+            )
+        outcome = self.validated[key]
+        return (key, outcome) if isinstance(outcome, dict) else (None, outcome)
+
+    def load_existing(self, keys):
+        """Record the ids of clients in `keys` that already exist (one query)."""
+        missing = [key for key in keys if key not in self.client_ids]
+        if not missing:
+            return
+        rows = Client.objects.filter(
+            company_id__in={company_id for company_id, _ in missing},
+            name__in={name for _, name in missing},
+        ).order_by('id').values_list('company_id', 'name', 'id')
+        for company_id, name, pk in rows:
+            self.client_ids.setdefault((company_id, name), pk)
+
+
+# --------------------------
+# Import
+# --------------------------
+def _chunks(reader, size):
+    chunk = []
+    for row in reader:
+        chunk.append((reader.line_num, row))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _import_chunk(chunk, clients, result):
+    valid_units = []   # (line, client_key, cleaned unit data)
+    client_keys = {}   # client_key -> cleaned client data (clients touched by this chunk)
+
+    for line, row in chunk:
+        result.rows += 1
+        key, client = clients.key_and_data(row)
+        if key is None:
+            result.errors.append(RowError(line, client))
+            continue
+        client_keys.setdefault(key, client)
+
+        if not (row.get('unit_name') or '').strip():
+            continue
+        unit, errors = _clean_fields(UNIT_FIELDS, _unit_data(row))
+        if errors:
+            result.errors.append(RowError(line, _error_text(errors)))
+            continue
+        valid_units.append((line, key, unit))
+
+    fill_addresses([unit for _, _, unit in valid_units])
+
+    try:
+        with transaction.atomic():
+            clients.load_existing(client_keys)
+            new_clients = [
+                Client(company_id=key[0], **data)
+                for key, data in client_keys.items()
+                if key not in clients.client_ids
+            ]
+            for created in Client.objects.bulk_create(new_clients):
+                clients.client_ids[(created.company_id, created.name)] = created.id
+
+            client_ids = {clients.client_ids[key] for _, key, _ in valid_units}
+            existing = set(
+                Unit.objects.filter(
+                    client_id__in=client_ids,
+                    name__in={unit['name'] for _, _, unit in valid_units},
+                ).values_list('client_id', 'name')
+            )
+            new_units = []
+            for _, key, unit in valid_units:
+                identity = (clients.client_ids[key], unit['name'])
+                if identity in existing:
+                    result.units_skipped += 1
+                    continue
+                existing.add(identity)
+                new_units.append(Unit(client_id=identity[0], **unit))
+            Unit.objects.bulk_create(new_units)
+    except DatabaseError as e:
+        # Nothing from this chunk was written; report every row in it
+        for key in client_keys:
+            clients.client_ids.pop(key, None)
+        result.errors.extend(RowError(line, f"not imported, database error: {e}") for line, _ in chunk)
+        return
+
+    result.clients_created += len(new_clients)
+    result.units_created += len(new_units)
+
+
+def _checked_header(fieldnames):
+    header = [name.strip() for name in (fieldnames or [])]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}")
+    return header
+
+
+def check_header(first_line):
+    """Raise ImportFormatError unless the CSV header line has the required columns."""
+    _checked_header(next(csv.reader([first_line]), []))
+
+
+def import_clients_and_units(lines, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Import from an iterable of CSV text lines (an open file, or a decoded
+    upload). Returns an ImportResult; raises ImportFormatError only when
+    the header is unusable.
+    """
+    reader = csv.DictReader(lines)
+    reader.fieldnames = _checked_header(reader.fieldnames)
+
+    result = ImportResult()
+    clients = _ClientResolver()
+    for chunk in _chunks(reader, chunk_size):
+        _import_chunk(chunk, clients, result)
+
+    # bulk_create skips post_save: refresh the caches the signals would have
+    if result.clients_created:
+        invalidate_entity_counts()
+        bump_version('clients')
+    if result.units_created:
+        bump_version('units')
+    return result
+
+
+def write_report(result, out):
+    """Write the row-level error report as CSV (line, error) to a text stream."""
+    writer = csv.writer(out)
+    writer.writerow(['line', 'error'])
+    writer.writerows((error.line, error.message) for error in result.errors)
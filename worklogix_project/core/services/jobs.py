@@ -0,0 +1,202 @@
+"""
+Database-backed background jobs.
+
+Slow side effects (geocoder calls, SMTP, large unit batches) are written
+as Job rows in the request's transaction and run later by
+`manage.py run_jobs`, so a request never waits on an external service and
+a job is only visible to workers once the request has committed.
+
+    @task('units.provision')
+    def provision(client_id, specs): ...
+
+    enqueue('units.provision', {'client_id': 1, 'specs': [...]}, priority=5)
+
+Claiming: the worker selects candidate rows with
+select_for_update(skip_locked=True) (PostgreSQL: concurrent workers skip
+each other's rows instead of waiting) and marks them 'running' with one
+conditional UPDATE ... WHERE status = 'queued', the same pattern as the
+work order state machine, so two workers can never run the same job even
+on SQLite, where row locks do not exist.
+
+Failures are retried with exponential backoff (settings.JOB_RETRY_BASE_DELAY
+doubled per attempt, capped at JOB_RETRY_MAX_DELAY) until max_attempts.
+A job left 'running' by a worker that died is picked up again after
+JOB_LOCK_TIMEOUT seconds.
+
+An idempotency key only holds while its job is queued or running: it is
+cleared when the job finishes, so the same key can be enqueued again
+later. Finished jobs are deleted after JOB_RETENTION_DAYS (prune_finished(),
+called by the worker when the queue is empty).
+
+Tests run the worker in-process with run_pending().
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+# task name -> function(**payload)
+TASKS = {}
+
+
+def task(name, atomic=True):
+    """
+    Register the decorated function as the handler for jobs named `name`.
+    Handlers run in one transaction unless `atomic=False` (for handlers
+    that commit their own progress, e.g. batch by batch).
+    """
+    def register(func):
+        func.job_atomic = atomic
+        TASKS[name] = func
+        return func
+    return register
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# --------------------------
+# Enqueueing
+# --------------------------
+def enqueue(name, payload=None, priority=0, key=None, delay=0, max_attempts=None):
+    """
+    Queue job `name` with JSON `payload` and return the Job. With an
+    idempotency `key`, a job still queued or running under that key is
+    returned instead of a new one.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown job: {name}")
+    fields = dict(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(idempotency_key=key, **fields)
+    except IntegrityError:
+        existing = Job.objects.filter(idempotency_key=key).first()
+        if existing is not None:
+            return existing
+    # The other job finished (and released the key) in the meantime
+    with transaction.atomic():
+        return Job.objects.create(idempotency_key=key, **fields)
+
+
+# --------------------------
+# Claiming and running
+# --------------------------
+def _claimable(now):
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale)
+
+
+def claim(worker_id, limit=1):
+    """Mark up to `limit` due jobs as running for `worker_id` and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by('-priority', 'run_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # Re-check the state in the UPDATE itself: another worker may have
+        # claimed some of these between the SELECT and here (no row locks on SQLite)
+        claimed = Job.objects.filter(_claimable(now), pk__in=ids).update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            return []
+    return list(
+        Job.objects.filter(pk__in=ids, status=Job.RUNNING, locked_by=worker_id, locked_at=now)
+        .order_by('-priority', 'run_at', 'id')
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt `attempts + 1` (exponential, +/-10% jitter)."""
+    delay = min(settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.9, 1.1)
+
+
+def _finish(job, **values):
+    """Write the outcome, unless another worker has reclaimed the job meanwhile."""
+    if values['status'] in (Job.DONE, Job.FAILED):
+        values['idempotency_key'] = None  # the key may be enqueued again
+    return (
+        Job.objects
+        .filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by, locked_at=job.locked_at)
+        .update(locked_by='', locked_at=None, **values)
+    )
+
+
+def run_job(job):
+    """Run one claimed job and record the result. Returns True on success."""
+    func = TASKS.get(job.name)
+    try:
+        if func is None:
+            raise KeyError(f"Unknown job: {job.name}")
+        with transaction.atomic() if func.job_atomic else nullcontext():
+            result = func(**job.payload)
+    except Exception as e:
+        error = f"{e.__class__.__name__}: {e}\n{traceback.format_exc()}"
+        if func is not None and job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            logger.warning("Job %s failed (attempt %s), retrying in %.0fs: %s", job, job.attempts, delay, e)
+            _finish(job, status=Job.QUEUED, last_error=error,
+                    run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            logger.error("Job %s failed permanently: %s", job, e)
+            _finish(job, status=Job.FAILED, last_error=error, finished_at=timezone.now())
+        return False
+
+    _finish(job, status=Job.DONE, result=result, finished_at=timezone.now())
+    return True
+
+
+def run_pending(worker_id=None, limit=None):
+    """
+    Run due jobs until none are left (or `limit` have run), in this process.
+    Returns the number of jobs run. Used by the worker loop and by tests.
+    """
+    worker_id = worker_id or default_worker_id()
+    count = 0
+    while limit is None or count < limit:
+        jobs = claim(worker_id, limit=1)
+        if not jobs:
+            break
+        run_job(jobs[0])
+        count += 1
+    return count
+
+
+def prune_finished(days=None):
+    """Delete jobs that finished more than `days` (JOB_RETENTION_DAYS) ago. Returns the count."""
+    days = settings.JOB_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status__in=(Job.DONE, Job.FAILED), finished_at__lt=cutoff).delete()
+    return deleted
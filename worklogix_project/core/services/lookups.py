@@ -0,0 +1,125 @@
+"""
+Cached id/name lookups behind the create-work-order AJAX endpoints and the
+work order form's choice lists.
+
+Entries live in versioned cache namespaces ('units', 'contractors',
+'clients', 'business_types'; see core/caching.py). Saving or deleting a
+Unit, Company, Client or BusinessType bumps its namespace (core/signals.py),
+which makes every old entry unreachable for all workers without having to
+find and delete them.
+
+Payloads are stored together with a content hash that the views use as a
+strong ETag, so a browser revalidation costs one cache read and no SQL.
+"""
+import hashlib
+import json
+
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+
+from core.caching import cached
+from core.models import BusinessType, Client, Company, Unit
+
+LOOKUP_TIMEOUT = 60 * 60
+MAX_LIMIT = 500
+
+
+def _cached(name, parts, build):
+    """Return (rows, etag) for a lookup, building and caching it on a miss."""
+    def build_entry():
+        rows = build()
+        body = json.dumps(rows, separators=(',', ':'))
+        return (rows, '"%s"' % hashlib.sha1(body.encode()).hexdigest())
+    return cached(name, parts, build_entry, LOOKUP_TIMEOUT)
+
+
+def _page(queryset, q, limit, offset):
+    if q:
+        queryset = queryset.filter(name__icontains=q)
+    queryset = queryset.order_by('name', 'id').values_list('id', 'name')
+    if limit is not None:
+        queryset = queryset[offset:offset + limit]
+    elif offset:
+        queryset = queryset[offset:]
+    return [{'id': pk, 'name': name} for pk, name in queryset]
+
+
+def units_for_client(client_id, q='', limit=None, offset=0):
+    """Units of a client as [{'id', 'name'}], optionally searched/paged."""
+    return _cached(
+        'units', ('client', client_id, q, limit, offset),
+        lambda: _page(Unit.objects.filter(client_id=client_id), q, limit, offset),
+    )
+
+
+def contractors_for_business_type(business_type_id, q='', limit=None, offset=0):
+    """Contractor companies of a business type as [{'id', 'name'}]."""
+    return _cached(
+        'contractors', ('business_type', business_type_id, q, limit, offset),
+        lambda: _page(
+            Company.objects.filter(is_contractor=True, business_type_id=business_type_id),
+            q, limit, offset,
+        ),
+    )
+
+
+def _choices(queryset):
+    return [(pk, name) for pk, name in queryset.order_by('name', 'id').values_list('id', 'name')]
+
+
+def client_choices():
+    """(id, name) for every client, for form select widgets."""
+    return cached('clients', ('choices',), lambda: _choices(Client.objects.all()), LOOKUP_TIMEOUT)
+
+
+def business_type_choices():
+    return cached('business_types', ('choices',), lambda: _choices(BusinessType.objects.all()),
+                  LOOKUP_TIMEOUT)
+
+
+def contractor_choices():
+    """(id, name) for every contractor company."""
+    return cached('contractors', ('choices',),
+                  lambda: _choices(Company.objects.filter(is_contractor=True)), LOOKUP_TIMEOUT)
+
+
+# The Company fields the contractor dashboard's profile card shows
+COMPANY_CARD_FIELDS = ('id', 'name', 'email', 'phone', 'website', 'address')
+
+
+def company_card(company_id):
+    """{field: value} of COMPANY_CARD_FIELDS for one company, or None."""
+    return cached('companies', ('card', company_id),
+                  lambda: Company.objects.filter(pk=company_id).values(*COMPANY_CARD_FIELDS).first(),
+                  LOOKUP_TIMEOUT)
+
+
+def parse_paging(params):
+    """Read q/limit/offset from GET params (limit is optional and capped)."""
+    q = params.get('q', '').strip()
+    try:
+        limit = max(1, min(int(params['limit']), MAX_LIMIT)) if params.get('limit') else None
+    except ValueError:
+        limit = None
+    try:
+        offset = max(int(params.get('offset', 0)), 0)
+    except ValueError:
+        offset = 0
+    return q, limit, offset
+
+
+def lookup_response(request, key, rows, etag, limit):
+    """
+    JSON response with a strong ETag. Browsers revalidate on every use
+    (no-cache) and get a 304 with no body while the data is unchanged.
+    """
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        payload = {key: rows}
+        if limit is not None:
+            payload['has_more'] = len(rows) == limit
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
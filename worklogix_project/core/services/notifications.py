@@ -0,0 +1,207 @@
+"""
+Work order email notifications through an outbox.
+
+Workflow changes call notify(), which writes Notification rows in the same
+transaction as the change (nothing is sent for a transition that rolled
+back) and schedules one 'notifications.deliver' job per
+NOTIFICATION_DIGEST_WINDOW. The job key is the window, so a burst of 500
+assignments queues one job, not 500.
+
+Who hears about what:
+  created                 -> the preferred contractor's users   (assigned)
+  rejected, passed on     -> the second contractor's users      (assigned)
+                             and the creator                    (rejected)
+  rejected, returned      -> the creator                        (returned)
+  offer expired, passed on -> the next candidate's users       (assigned)
+                             and the creator                    (rejected)
+  offer expired, returned -> the creator                        (returned)
+  completed               -> the creator                        (completed)
+
+deliver_pending() folds every pending row for a recipient into one email
+(a digest when there is more than one update) and sends them in batches
+of NOTIFICATION_BATCH_SIZE recipients over a single backend connection
+(get_connection().send_messages), so a burst costs one SMTP handshake per
+delivery run instead of one per email. Each batch is claimed (locked_by /
+locked_at, like a job) in a short transaction that commits before SMTP is
+touched, so no row lock is held while the mail server is slow. Rows are
+marked sent once their batch went out; if sending fails the claim is
+released and the job is retried. A claim left by a worker that died is
+taken over after JOB_LOCK_TIMEOUT seconds.
+"""
+import time
+import uuid
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import CustomUser, Notification
+from core.services import jobs
+
+ASSIGNED = 'assigned'
+RETURNED = 'returned'
+
+
+def _company_users(company_id):
+    if not company_id:
+        return CustomUser.objects.none()
+    return CustomUser.objects.filter(company_id=company_id, role='contractor')
+
+
+def _creator(order):
+    return CustomUser.objects.filter(pk=order.created_by_id)
+
+
+def recipients_for(order, event_type):
+    """[(kind, user queryset)] to notify after `event_type` left `order` in its current status."""
+    if event_type == 'created':
+        return [(Notification.ASSIGNED, _company_users(order.preferred_contractor_id))]
+    if event_type == 'rejected' and order.status == ASSIGNED:
+        return [
+            (Notification.ASSIGNED, _company_users(order.assigned_contractor_id)),
+            (Notification.REJECTED, _creator(order)),
+        ]
+    if event_type == 'rejected' and order.status == RETURNED:
+        return [(Notification.RETURNED, _creator(order))]
+    if event_type == 'expired' and order.status == ASSIGNED:
+        return [
+            (Notification.ASSIGNED, _company_users(order.assigned_contractor_id)),
+            (Notification.REJECTED, _creator(order)),
+        ]
+    if event_type == 'expired' and order.status == RETURNED:
+        return [(Notification.RETURNED, _creator(order))]
+    if event_type == 'completed':
+        return [(Notification.COMPLETED, _creator(order))]
+    return []
+
+
+MESSAGES = {
+    Notification.ASSIGNED: "Work order #{id} “{title}” has been assigned to your company.",
+    Notification.REJECTED: "Work order #{id} “{title}” was rejected and passed to the next contractor.",
+    Notification.RETURNED: "Work order #{id} “{title}” was rejected and returned to you.",
+    Notification.COMPLETED: "Work order #{id} “{title}” has been completed.",
+}
+
+# (kind, event type) -> message, where the event changes the wording
+EVENT_MESSAGES = {
+    (Notification.REJECTED, 'expired'): "Work order #{id} “{title}” was not accepted in time and passed to the next contractor.",
+    (Notification.RETURNED, 'expired'): "Work order #{id} “{title}” was not accepted in time and returned to you.",
+}
+
+
+def notify(order, event_type, actor=None):
+    """Queue notifications for a workflow event. Call inside the transaction that changed the order."""
+    rows = []
+    for kind, users in recipients_for(order, event_type):
+        users = users.filter(is_active=True).exclude(email='')
+        if actor is not None and actor.pk:
+            users = users.exclude(pk=actor.pk)
+        template = EVENT_MESSAGES.get((kind, event_type), MESSAGES[kind])
+        message = template.format(id=order.id, title=order.title)[:255]
+        rows.extend(
+            Notification(recipient_id=pk, email=email, work_order_id=order.id, kind=kind, message=message)
+            for pk, email in users.values_list('id', 'email')
+        )
+    if rows:
+        Notification.objects.bulk_create(rows)
+        schedule_delivery()
+    return len(rows)
+
+
+def schedule_delivery():
+    """One delivery job per digest window (the job key makes repeats a no-op)."""
+    window = settings.NOTIFICATION_DIGEST_WINDOW
+    now = time.time()
+    window_end = (int(now // window) + 1) * window if window else now
+    jobs.enqueue(
+        'notifications.deliver', priority=1,
+        key=f"notifications.deliver:{window_end:.0f}" if window else None,
+        delay=window_end - now,
+    )
+
+
+# --------------------------
+# Delivery
+# --------------------------
+def _link(work_order_id):
+    path = reverse('view_work_order_detail', args=[work_order_id])
+    return settings.APP_BASE_URL.rstrip('/') + path if settings.APP_BASE_URL else path
+
+
+def build_message(email, notifications):
+    """One EmailMessage for a recipient: the single update, or a digest of all of them."""
+    items = [{'message': n.message, 'link': _link(n.work_order_id)} for n in notifications]
+    if len(items) == 1:
+        subject = items[0]['message']
+    else:
+        subject = f"{len(items)} work order updates"
+    body = render_to_string('core/email/work_order_notification.txt', {'items': items})
+    return EmailMessage(f"Work Logix: {subject}", body, settings.DEFAULT_FROM_EMAIL, [email])
+
+
+def _claimable(now):
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Notification.objects.filter(Q(locked_at__isnull=True) | Q(locked_at__lt=stale), sent_at__isnull=True)
+
+
+def _claim(token, batch_size):
+    """
+    Claim every pending row of the next `batch_size` recipients for `token`
+    and return them, grouped by recipient; None when nothing is pending.
+    Whole recipients are claimed, so one person's updates are never split
+    over two emails.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        recipients = list(
+            _claimable(now).order_by('recipient_id').values_list('recipient_id', flat=True).distinct()[:batch_size]
+        )
+        if not recipients:
+            return None
+        # Conditional UPDATE: a concurrent run that claimed some of these first keeps them
+        _claimable(now).filter(recipient_id__in=recipients).update(locked_by=token, locked_at=now)
+    return list(
+        Notification.objects.filter(locked_by=token, locked_at=now, sent_at__isnull=True)
+        .order_by('recipient_id', 'created_at', 'id')
+    )
+
+
+def deliver_pending(batch_size=None):
+    """
+    Send every pending notification, one email per recipient, reusing one
+    backend connection. Returns (emails sent, notifications delivered).
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    token = uuid.uuid4().hex
+    emails = delivered = 0
+    connection = get_connection()
+    connection.open()
+    try:
+        while True:
+            pending = _claim(token, batch_size)
+            if pending is None:
+                break
+            if not pending:
+                continue  # another run claimed them first
+            messages = [
+                build_message(group[0].email, group)
+                for group in (list(rows) for _, rows in groupby(pending, key=lambda n: n.recipient_id))
+            ]
+            claimed = Notification.objects.filter(pk__in=[n.pk for n in pending])
+            try:
+                connection.send_messages(messages)
+            except Exception:
+                claimed.update(locked_by='', locked_at=None)
+                raise
+            claimed.update(sent_at=timezone.now(), locked_by='', locked_at=None)
+            emails += len(messages)
+            delivered += len(pending)
+    finally:
+        connection.close()
+    return emails, delivered
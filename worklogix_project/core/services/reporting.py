@@ -0,0 +1,320 @@
+"""
+SLA / contractor performance reporting from daily rollups.
+
+build_rollups() keeps DailyWorkOrderStats in step with core_workorder
+incrementally: it finds the creation days of orders whose updated_at is
+past the stored watermark (less WATERMARK_OVERLAP, so an order whose
+updated_at was set by a transaction that committed after the last build
+read the watermark is still seen), and rebuilds exactly those days with one
+GROUP BY per dimension (contractor, business type, client, priority) and
+chunk of days. Each dimension is its own rollup rather than one cube over
+all four, so a report reads one row per day per contractor, not per
+contractor x client x type x priority. Workflow transitions set updated_at in their
+UPDATE, so accepting or completing an old order refreshes its day. Days
+with open orders that fell overdue since the last build are rebuilt too,
+because no row changes when a due date simply passes.
+
+The contractor rollup counts offers, not orders: an order passed down its
+candidate list is offered to several contractors, so it is built from the
+WorkOrderEvent log of those days' orders, grouped by the event's company.
+Every offer ends in that company's 'accepted', 'rejected' or 'expired'
+event, or is still open (then held by the preferred contractor of a 'new'
+order or the assigned one of an 'assigned' order), so created_count is
+offers = those three events + open offers, and a rejection is charged to
+the company that rejected, whatever its place in the cascade. Accepting,
+completing and returning are likewise credited to the event's company;
+overdue orders to the contractor they are assigned to.
+
+Deleted work orders leave no updated_at trace; `build_rollups --full`
+rebuilds everything in one transaction, so reports never see the table
+half-empty.
+
+sla_report() reads only the rollup table (plus one name lookup for the
+row labels), so a report over months of history sums a few rows per day
+instead of scanning work orders.
+"""
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, DurationField, F, Max, Q, Sum, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from core.models import (
+    BusinessType, Client, Company, DailyWorkOrderStats, ReportWatermark, WorkOrder, WorkOrderEvent,
+)
+from core.models.work_order import OPEN_STATUSES, WorkOrderStatus
+
+# Status values as stored by the workflow
+NEW = WorkOrderStatus.NEW.name.lower()
+RETURNED = WorkOrderStatus.RETURNED.name.lower()
+
+WATERMARK_NAME = 'daily_work_order_stats'
+DAYS_PER_CHUNK = 31
+# Re-scan this far behind the watermark: updated_at is set when the UPDATE
+# runs, not when its transaction commits
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+COUNT_FIELDS = (
+    'created_count', 'accepted_count', 'completed_count',
+    'rejected_count', 'returned_count', 'overdue_count',
+)
+
+# Events that end an offer to the event's company
+OFFER_OUTCOMES = ('accepted', 'rejected', 'expired')
+
+# dimension -> WorkOrder expression grouped on (None: from the event log, see _contractor_stats)
+DIMENSIONS = {
+    DailyWorkOrderStats.CONTRACTOR: None,
+    DailyWorkOrderStats.BUSINESS_TYPE: F('business_type'),
+    DailyWorkOrderStats.CLIENT: F('client'),
+    DailyWorkOrderStats.PRIORITY: F('priority'),
+}
+
+# dimension -> model whose names label the report rows (priority labels itself)
+LABEL_MODELS = {
+    DailyWorkOrderStats.CONTRACTOR: Company,
+    DailyWorkOrderStats.BUSINESS_TYPE: BusinessType,
+    DailyWorkOrderStats.CLIENT: Client,
+}
+
+
+@dataclass
+class BuildResult:
+    days: int = 0
+    rows: int = 0
+    full: bool = False
+
+
+# --------------------------
+# Building
+# --------------------------
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _overdue(today, prefix=''):
+    """Q for orders completed after, or still open past, their due date (`prefix` for a related order)."""
+    due = F(f'{prefix}due_date')
+    return Q(**{f'{prefix}due_date__isnull': False}) & (
+        Q(**{f'{prefix}completed_at__isnull': False, f'{prefix}completed_at__date__gt': due})
+        | Q(**{f'{prefix}completed_at__isnull': True, f'{prefix}status__in': OPEN_STATUSES,
+               f'{prefix}due_date__lt': today})
+    )
+
+
+def _orders_created_on(days, prefix=''):
+    """Filter kwargs for the orders created on `days`; the range lets the created_at index narrow the scan."""
+    return {
+        f'{prefix}created_at__gte': _day_start(min(days)),
+        f'{prefix}created_at__lt': _day_start(max(days) + timedelta(days=1)),
+        f'{prefix}created_at__date__in': days,
+    }
+
+
+def _contractor_stats(days, today):
+    """
+    CONTRACTOR rows (unsaved) for the orders created on `days`: offers and
+    their outcomes per company, from the event log (see module docstring).
+    """
+    since_created = F('created_at') - F('work_order__created_at')
+    outcomes = (
+        WorkOrderEvent.objects
+        .filter(company__isnull=False, event_type__in=OFFER_OUTCOMES + ('completed',),
+                **_orders_created_on(days, 'work_order__'))
+        .annotate(day=TruncDate('work_order__created_at'))
+        .values('day', 'company_id')
+        .annotate(
+            offers=Count('id', filter=Q(event_type__in=OFFER_OUTCOMES)),
+            accepted=Count('id', filter=Q(event_type='accepted')),
+            rejected=Count('id', filter=Q(event_type='rejected')),
+            returned=Count('id', filter=Q(event_type__in=OFFER_OUTCOMES, to_status=RETURNED)),
+            completed=Count('id', filter=Q(event_type='completed')),
+            accept_time=Sum(since_created, filter=Q(event_type='accepted'), output_field=DurationField()),
+            complete_time=Sum(since_created, filter=Q(event_type='completed'), output_field=DurationField()),
+        )
+        .order_by()
+    )
+    orders = WorkOrder.objects.filter(**_orders_created_on(days)).annotate(day=TruncDate('created_at'))
+    open_offers = (
+        orders.awaiting_acceptance()
+        .annotate(company_id=Case(When(status=NEW, then=F('preferred_contractor')),
+                                  default=F('assigned_contractor')))
+        .filter(company_id__isnull=False)
+        .values('day', 'company_id').annotate(n=Count('id')).order_by()
+    )
+    overdue = (
+        orders.filter(_overdue(today), assigned_contractor__isnull=False)
+        .values('day', 'assigned_contractor_id').annotate(n=Count('id')).order_by()
+    )
+
+    stats = {}
+
+    def row(day, company_id):
+        if (day, company_id) not in stats:
+            stats[day, company_id] = DailyWorkOrderStats(
+                dimension=DailyWorkOrderStats.CONTRACTOR, day=day, key=str(company_id),
+            )
+        return stats[day, company_id]
+
+    for figures in outcomes:
+        stat = row(figures['day'], figures['company_id'])
+        stat.created_count += figures['offers']
+        stat.accepted_count = figures['accepted']
+        stat.rejected_count = figures['rejected']
+        stat.returned_count = figures['returned']
+        stat.completed_count = figures['completed']
+        stat.accept_seconds = figures['accept_time'].total_seconds() if figures['accept_time'] else 0
+        stat.complete_seconds = figures['complete_time'].total_seconds() if figures['complete_time'] else 0
+    for figures in open_offers:
+        row(figures['day'], figures['company_id']).created_count += figures['n']
+    for figures in overdue:
+        row(figures['day'], figures['assigned_contractor_id']).overdue_count = figures['n']
+    return list(stats.values())
+
+
+def _aggregate_days(days, today):
+    """DailyWorkOrderStats rows (unsaved) for the orders created on `days`, every dimension."""
+    overdue = _overdue(today)
+    figures = dict(
+        created=Count('id'),
+        accepted=Count('id', filter=Q(accepted_at__isnull=False)),
+        completed=Count('id', filter=Q(completed_at__isnull=False)),
+        rejected=Count('id', filter=Q(rejected_by_first=True) | Q(rejected_by_second=True)),
+        returned=Count('id', filter=Q(returned_to_creator=True)),
+        overdue=Count('id', filter=overdue),
+        accept_time=Sum(F('accepted_at') - F('created_at'), output_field=DurationField()),
+        complete_time=Sum(F('completed_at') - F('created_at'), output_field=DurationField()),
+    )
+    orders = WorkOrder.objects.filter(**_orders_created_on(days)).annotate(day=TruncDate('created_at'))
+
+    stats = _contractor_stats(days, today)
+    for dimension, expression in DIMENSIONS.items():
+        if expression is None:
+            continue
+        rows = (
+            orders.annotate(group=expression)
+            .values('day', 'group')
+            .annotate(**figures)
+            .order_by()
+        )
+        stats.extend(
+            DailyWorkOrderStats(
+                dimension=dimension,
+                day=row['day'],
+                key='' if row['group'] is None else str(row['group']),
+                created_count=row['created'],
+                accepted_count=row['accepted'],
+                completed_count=row['completed'],
+                rejected_count=row['rejected'],
+                returned_count=row['returned'],
+                overdue_count=row['overdue'],
+                accept_seconds=row['accept_time'].total_seconds() if row['accept_time'] else 0,
+                complete_seconds=row['complete_time'].total_seconds() if row['complete_time'] else 0,
+            )
+            for row in rows
+        )
+    return stats
+
+
+def _days_of(queryset):
+    return set(
+        queryset.annotate(day=TruncDate('created_at'))
+        .order_by().values_list('day', flat=True).distinct()
+    )
+
+
+def rebuild_days(days, today=None):
+    """Replace the rollup rows of `days`, DAYS_PER_CHUNK days per transaction. Returns rows written."""
+    today = today or timezone.localdate()
+    days = sorted(days)
+    written = 0
+    for start in range(0, len(days), DAYS_PER_CHUNK):
+        chunk = days[start:start + DAYS_PER_CHUNK]
+        with transaction.atomic():
+            DailyWorkOrderStats.objects.filter(day__in=chunk).delete()
+            written += len(DailyWorkOrderStats.objects.bulk_create(_aggregate_days(chunk, today)))
+    return written
+
+
+def build_rollups(full=False):
+    """Bring the rollups up to date (everything when `full`). Returns a BuildResult."""
+    now = timezone.now()
+    today = timezone.localdate()
+    mark = ReportWatermark.objects.filter(name=WATERMARK_NAME).first()
+    full = full or mark is None
+
+    if full:
+        changed = WorkOrder.objects.all()
+    else:
+        changed = WorkOrder.objects.filter(updated_at__gt=mark.updated_at - WATERMARK_OVERLAP)
+    new_mark = changed.aggregate(latest=Max('updated_at'))['latest']
+    if mark and (new_mark is None or new_mark < mark.updated_at):
+        new_mark = mark.updated_at
+    new_mark = new_mark or now
+
+    with transaction.atomic() if full else nullcontext():
+        if full:
+            DailyWorkOrderStats.objects.all().delete()
+            days = _days_of(changed)
+        else:
+            days = _days_of(changed) | _days_of(WorkOrder.objects.filter(
+                status__in=OPEN_STATUSES,
+                due_date__gte=timezone.localtime(mark.built_at).date(),
+                due_date__lt=today,
+            ))
+
+        result = BuildResult(days=len(days), full=full)
+        result.rows = rebuild_days(days, today)
+
+        ReportWatermark.objects.update_or_create(
+            name=WATERMARK_NAME, defaults={'updated_at': new_mark, 'built_at': now},
+        )
+    return result
+
+
+# --------------------------
+# Reading
+# --------------------------
+def _rates(row):
+    created = row['created_count']
+    row['avg_accept_hours'] = (
+        row['accept_seconds'] / row['accepted_count'] / 3600 if row['accepted_count'] else None
+    )
+    row['avg_complete_hours'] = (
+        row['complete_seconds'] / row['completed_count'] / 3600 if row['completed_count'] else None
+    )
+    row['rejection_rate'] = row['rejected_count'] / created if created else None
+    row['overdue_rate'] = row['overdue_count'] / created if created else None
+    return row
+
+
+def _labels(dimension, keys):
+    model = LABEL_MODELS.get(dimension)
+    if model is None:
+        return {key: key.title() for key in keys}
+    ids = [int(key) for key in keys if key]
+    return {str(pk): name for pk, name in model.objects.filter(pk__in=ids).values_list('pk', 'name')}
+
+
+def sla_report(start, end, group_by=DailyWorkOrderStats.CONTRACTOR):
+    """
+    Totals per `group_by` (a DIMENSIONS key) for orders created between
+    `start` and `end` inclusive. Returns (rows, totals); each row has a
+    'label', the summed counts and latencies, and the derived averages/rates.
+    """
+    sums = {name: Coalesce(Sum(name), 0) for name in COUNT_FIELDS}
+    sums.update(accept_seconds=Coalesce(Sum('accept_seconds'), 0.0),
+                complete_seconds=Coalesce(Sum('complete_seconds'), 0.0))
+
+    base = DailyWorkOrderStats.objects.filter(dimension=group_by, day__range=(start, end))
+    rows = list(base.values('key').annotate(**sums).order_by())
+    labels = _labels(group_by, [row['key'] for row in rows])
+    for row in rows:
+        row['label'] = labels.get(row['key'], '')
+        _rates(row)
+    rows.sort(key=lambda row: (not row['label'], row['label'].lower()))
+    totals = _rates(base.aggregate(**sums))
+    return rows, totals
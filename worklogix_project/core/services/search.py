@@ -0,0 +1,153 @@
+"""
+Ranked full-text search over work orders.
+
+Indexed text: title, description, completion_notes, client name, unit name.
+
+- PostgreSQL: a `search_vector` tsvector column on core_workorder with a GIN
+  index (created by migration 0013, not declared on the model so the ORM
+  never reads or writes it). Ranked with ts_rank.
+- SQLite: an FTS5 shadow table `core_workorder_fts` keyed by work order id.
+  Ranked with bm25.
+- Any other backend falls back to icontains matching without ranking.
+
+The index is refreshed from the WorkOrder/Client/Unit post_save signals
+(see core/signals.py) with one set-based statement per save.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'core_workorder_fts'
+
+# Weights: title > client/unit names > description > completion notes
+PG_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce(w.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(c.name, '') || ' ' || coalesce(u.name, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(w.description, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(w.completion_notes, '')), 'D')
+"""
+BM25_WEIGHTS = '10.0, 2.0, 1.0, 5.0, 5.0'  # title, description, notes, client, unit
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+# --------------------------
+# Index maintenance
+# --------------------------
+def _reindex(where_sql, params):
+    """Refresh the search index for work orders matching `where_sql` (alias w)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"""
+                UPDATE core_workorder AS target SET search_vector = sub.vector
+                FROM (
+                    SELECT w.id, {PG_VECTOR_SQL} AS vector
+                    FROM core_workorder w
+                    LEFT JOIN core_client c ON c.id = w.client_id
+                    LEFT JOIN core_unit u ON u.id = w.unit_id
+                    WHERE {where_sql}
+                ) AS sub
+                WHERE target.id = sub.id
+            """, params)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT w.id FROM core_workorder w WHERE {where_sql})",
+                params,
+            )
+            cursor.execute(f"""
+                INSERT INTO {FTS_TABLE} (rowid, title, description, completion_notes, client_name, unit_name)
+                SELECT w.id, w.title, w.description, coalesce(w.completion_notes, ''),
+                       coalesce(c.name, ''), coalesce(u.name, '')
+                FROM core_workorder w
+                LEFT JOIN core_client c ON c.id = w.client_id
+                LEFT JOIN core_unit u ON u.id = w.unit_id
+                WHERE {where_sql}
+            """, params)
+
+
+def index_work_orders(work_order_ids):
+    ids = list(work_order_ids)
+    if ids:
+        _reindex(f"w.id IN ({', '.join(['%s'] * len(ids))})", ids)
+
+
+def index_work_order(work_order_id):
+    _reindex("w.id = %s", [work_order_id])
+
+
+def index_client_work_orders(client_id):
+    """Refresh every order of a client (e.g. after the client is renamed)."""
+    _reindex("w.client_id = %s", [client_id])
+
+
+def index_unit_work_orders(unit_id):
+    _reindex("w.unit_id = %s", [unit_id])
+
+
+def unindex_work_order(work_order_id):
+    # On PostgreSQL the vector lives on the row and goes away with it
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [work_order_id])
+
+
+def rebuild_index():
+    _reindex("1 = 1", [])
+
+
+# --------------------------
+# Querying
+# --------------------------
+def _fts5_query(text):
+    """User text -> FTS5 query: every word must match, as a prefix."""
+    return " ".join(f'"{word}"*' for word in _WORD.findall(text))
+
+
+def search_work_orders(queryset, text):
+    """
+    Filter `queryset` (already scoped to what the user may see) to work
+    orders matching `text`, annotated with `rank` and ordered best first.
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('english', %s)"
+        return (
+            queryset
+            .filter(RawSQL(f"core_workorder.search_vector @@ {tsquery}", [text],
+                           output_field=BooleanField()))
+            .annotate(rank=RawSQL(f"ts_rank(core_workorder.search_vector, {tsquery})", [text],
+                                  output_field=FloatField()))
+            .order_by('-rank', '-created_at')
+        )
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(text)
+        if not match:
+            return queryset.none()
+        # bm25() is lower-is-better; negate it so higher rank = better everywhere
+        return (
+            queryset
+            .filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+            .annotate(rank=RawSQL(
+                f"(SELECT -bm25({FTS_TABLE}, {BM25_WEIGHTS}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = core_workorder.id)",
+                [match], output_field=FloatField(),
+            ))
+            .order_by('-rank', '-created_at')
+        )
+
+    return (
+        queryset
+        .filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+            | Q(completion_notes__icontains=text) | Q(client__name__icontains=text)
+            | Q(unit__name__icontains=text)
+        )
+        .annotate(rank=Value(0.0, output_field=FloatField()))
+        .order_by('-created_at')
+    )
@@ -0,0 +1,47 @@
+"""
+State handed from create_client to review_units.
+
+The wizard used to write nine separate session keys. It now keeps one
+compact value under a single key: a list of the values in WIZARD_FIELDS
+order, so the session stays small with the signed-cookie engine and is
+written once. review_units clears it after the units are created.
+"""
+SESSION_KEY = 'wizard:units'
+
+WIZARD_FIELDS = (
+    'client_id', 'default_eircode',
+    'num_apartments', 'num_duplexes', 'num_houses', 'num_commercial_units',
+    'unit_contact_name', 'unit_contact_email', 'unit_contact_number',
+)
+
+# (unit_type, count field, name prefix) for the generated review rows
+UNIT_COUNTS = (
+    ('apartment', 'num_apartments', 'Apartment'),
+    ('duplex', 'num_duplexes', 'Duplex'),
+    ('house', 'num_houses', 'House'),
+    ('commercial', 'num_commercial_units', 'Commercial'),
+)
+
+
+def save_wizard(session, client_id, cleaned_data):
+    """Store the unit wizard inputs for `client_id` (ClientCreationForm cleaned_data)."""
+    values = {**cleaned_data, 'client_id': client_id}
+    session[SESSION_KEY] = [values.get(name) for name in WIZARD_FIELDS]
+
+
+def load_wizard(session):
+    """The stored wizard state as a dict, or None if there is none."""
+    stored = session.get(SESSION_KEY)
+    if not stored or len(stored) != len(WIZARD_FIELDS):
+        return None
+    state = dict(zip(WIZARD_FIELDS, stored))
+    if not state['client_id']:
+        return None
+    count_fields = {name for _, name, _ in UNIT_COUNTS}
+    for name in WIZARD_FIELDS[1:]:
+        state[name] = state[name] or (0 if name in count_fields else '')
+    return state
+
+
+def clear_wizard(session):
+    session.pop(SESSION_KEY, None)
@@ -0,0 +1,150 @@
+"""
+Unit provisioning and bulk editing.
+
+provision_units() creates many units for a client in one transaction.
+Used by review_units, unit_generator and create_unit_group. Duplicates
+(same client + name) are detected with one set-based query and skipped,
+and inserts go through bulk_create in batches, so a 400-apartment estate
+is a handful of statements instead of 400 round trips, and either all of
+it is created or none of it is.
+
+apply_unit_edits() saves the client_units editor: only the rows that
+changed, as one bulk_update plus one delete. Each row carries a hash of
+the values it was rendered with (unit_row_hash), so an edit made on top of
+someone else's newer change is refused instead of silently overwriting it.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from core.caching import bump_version
+from core.models import Unit, WorkOrder
+from core.services import search
+
+DEFAULT_BATCH_SIZE = 500
+
+# Unit fields a spec may set (client and group are passed separately)
+UNIT_SPEC_FIELDS = (
+    'name', 'unit_type', 'eircode', 'street', 'city', 'county',
+    'unit_contact_name', 'unit_contact_email', 'unit_contact_number',
+)
+
+
+@dataclass
+class ProvisionResult:
+    created: int = 0
+    skipped: list = field(default_factory=list)  # names that already existed
+
+    @property
+    def skipped_count(self):
+        return len(self.skipped)
+
+
+def numbered_specs(prefix, start, end, **defaults):
+    """Specs for "<prefix> <n>" units, n from start to end inclusive."""
+    return [{'name': f"{prefix} {i}", **defaults} for i in range(start, end + 1)]
+
+
+def provision_units(client, specs, group=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create one Unit per spec dict for `client`, skipping names that already
+    exist for that client (or repeat within `specs`).
+
+    Returns a ProvisionResult with the created count and skipped names.
+    """
+    names = [spec['name'] for spec in specs]
+    result = ProvisionResult()
+
+    with transaction.atomic():
+        existing = set(
+            Unit.objects.filter(client=client, name__in=names).values_list('name', flat=True)
+        )
+
+        to_create = []
+        for spec in specs:
+            name = spec['name']
+            if name in existing:
+                result.skipped.append(name)
+                continue
+            existing.add(name)
+            values = {key: spec[key] for key in UNIT_SPEC_FIELDS if key in spec}
+            to_create.append(Unit(client=client, group=group, **values))
+
+        Unit.objects.bulk_create(to_create, batch_size=batch_size)
+
+    # bulk_create skips post_save, so invalidate the unit lookups here
+    if to_create:
+        bump_version('units')
+
+    result.created = len(to_create)
+    return result
+
+
+# --------------------------
+# Bulk editing
+# --------------------------
+def unit_row_hash(unit):
+    """Short hash of a unit's editable values, used as a per-row version."""
+    values = [getattr(unit, name) or '' for name in UNIT_SPEC_FIELDS]
+    return hashlib.sha1(json.dumps(values).encode()).hexdigest()[:16]
+
+
+@dataclass
+class EditResult:
+    updated: int = 0
+    deleted: int = 0
+    conflicts: list = field(default_factory=list)  # unit names changed by someone else
+    protected: list = field(default_factory=list)  # unit names still used by work orders
+
+
+def apply_unit_edits(client, edits, delete_ids=()):
+    """
+    `edits` is a list of (unit, rendered_hash) for units whose fields have
+    already been changed in memory (but not saved). Units whose current DB
+    values no longer match `rendered_hash` are reported as conflicts and not
+    written. `delete_ids` are removed with one DELETE, except units that
+    work orders still point at.
+    """
+    result = EditResult()
+    delete_ids = set(delete_ids)
+    edit_ids = [unit.id for unit, _ in edits]
+
+    with transaction.atomic():
+        current = {
+            unit.id: unit
+            for unit in Unit.objects.select_for_update().filter(client=client, id__in=edit_ids)
+        }
+        to_update, renamed = [], []
+        for unit, rendered_hash in edits:
+            stored = current.get(unit.id)
+            if stored is None or unit.id in delete_ids:
+                continue
+            if unit_row_hash(stored) != rendered_hash:
+                result.conflicts.append(stored.name)
+                continue
+            to_update.append(unit)
+            if unit.name != stored.name:
+                renamed.append(unit.id)
+        Unit.objects.bulk_update(to_update, UNIT_SPEC_FIELDS)
+        result.updated = len(to_update)
+
+        if delete_ids:
+            in_use = set(
+                WorkOrder.objects.filter(unit_id__in=delete_ids)
+                .values_list('unit_id', flat=True).distinct()
+            )
+            deletable = Unit.objects.filter(client=client, id__in=delete_ids - in_use)
+            result.protected = list(
+                Unit.objects.filter(client=client, id__in=in_use).values_list('name', flat=True)
+            )
+            _, deleted = deletable.delete()
+            result.deleted = deleted.get(Unit._meta.label, 0)
+
+    # bulk_update skips post_save: refresh lookups, and search text for renamed units
+    if to_update:
+        bump_version('units')
+    for unit_id in renamed:
+        search.index_unit_work_orders(unit_id)
+    return result
@@ -0,0 +1,63 @@
+"""
+Maintain the per-contractor work queue (WorkQueueEntry).
+
+Who owns an order in the queue, by status:
+  new       -> the preferred and second contractors (whoever hasn't rejected it)
+  assigned  -> the assigned contractor
+  accepted  -> the assigned contractor
+  anything else (completed, returned, ...) -> nobody
+
+sync_work_queue() is called from the WorkOrder post_save signal, so every
+transition that saves the order keeps the queue current. Code that writes
+with queryset.update() must call it explicitly.
+"""
+from django.db import transaction
+
+from core.models import WorkQueueEntry
+
+
+def queue_owner_ids(order):
+    """Company ids that should see `order` in their work queue."""
+    if order.status == 'new':
+        owners = []
+        if order.preferred_contractor_id and not order.rejected_by_first:
+            owners.append(order.preferred_contractor_id)
+        if order.second_contractor_id and not order.rejected_by_second:
+            owners.append(order.second_contractor_id)
+        return set(owners)
+    if order.status in ('assigned', 'accepted') and order.assigned_contractor_id:
+        return {order.assigned_contractor_id}
+    return set()
+
+
+def sync_work_queue(orders):
+    """Rebuild the queue rows for the given work orders (one delete + one insert)."""
+    orders = list(orders)
+    if not orders:
+        return
+
+    entries = [
+        WorkQueueEntry(
+            contractor_id=contractor_id,
+            work_order_id=order.id,
+            title=order.title,
+            status=order.status,
+            due_date=order.due_date,
+        )
+        for order in orders
+        for contractor_id in queue_owner_ids(order)
+    ]
+
+    with transaction.atomic():
+        WorkQueueEntry.objects.filter(work_order_id__in=[o.id for o in orders]).delete()
+        WorkQueueEntry.objects.bulk_create(entries)
+
+
+def contractor_queue(contractor_id):
+    """The dashboard rows for one contractor, soonest due first."""
+    return (
+        WorkQueueEntry.objects
+        .filter(contractor_id=contractor_id)
+        .order_by('due_date', 'work_order_id')
+        .values('work_order_id', 'title', 'status', 'due_date')
+    )
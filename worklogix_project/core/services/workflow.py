@@ -0,0 +1,377 @@
+"""
+Work order state machine.
+
+Every transition is applied as ONE conditional UPDATE:
+
+    UPDATE core_workorder SET status = ..., ...
+    WHERE id = %s AND <order is in a source status AND the company may act>
+
+so two contractors accepting the same order at the same moment cannot both
+win: the second UPDATE matches no row and reports 0. Only the columns the
+transition changes are written (no full-row save()).
+
+Who may act on an order, by current status (ACTOR_RULES):
+  new       -> the preferred or second contractor (unless they already rejected)
+  assigned  -> the assigned contractor (the second one, after a rejection)
+  accepted  -> the assigned contractor
+
+queryset.update() sends no post_save signal, so after a successful
+transition we refresh the work queue, search index and cached dashboard
+counts explicitly, and append a WorkOrderEvent and any email
+notifications (outbox rows) in the same transaction.
+
+Rejection cascade: each order has an ordered candidate list
+(WorkOrderCandidate: preferred at 0, second at 1, extra dispatch
+candidates from 2) and a cursor, WorkOrder.candidate_position. When the
+contractor holding the offer rejects it, one UPDATE moves the cursor to
+the next candidate and assigns the order to it, with the next candidate
+looked up by a correlated subquery on (work_order, position); with no
+candidate left the same UPDATE returns the order to its creator. Companies
+deleted since the list was made are gone from it (CASCADE), and companies
+no longer flagged is_contractor are skipped.
+
+An offer nobody accepts within WORK_ORDER_OFFER_TIMEOUT_HOURS is advanced
+the same way by expire_offers(), run as the 'work_orders.expire_offers'
+job. Every new offer schedules that job for the sweep window in which it
+expires (one job per window, like notification delivery); the sweep reads
+the (status, offered_at) index and advances WORK_ORDER_OFFER_SWEEP_BATCH
+orders per transaction.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.counters import invalidate_work_order_counts
+from core.models import WorkOrder, WorkOrderCandidate, WorkOrderEvent
+from core.models.work_order import WorkOrderStatus
+from core.services import events, jobs, notifications, search
+from core.services.work_queue import sync_work_queue
+
+# Status values as stored by the workflow ('new', 'accepted', ...)
+NEW = WorkOrderStatus.NEW.name.lower()
+ASSIGNED = WorkOrderStatus.ASSIGNED.name.lower()
+ACCEPTED = WorkOrderStatus.ACCEPTED.name.lower()
+COMPLETED = WorkOrderStatus.COMPLETED.name.lower()
+RETURNED = WorkOrderStatus.RETURNED.name.lower()
+
+
+@dataclass(frozen=True)
+class Transition:
+    name: str
+    sources: tuple
+    target: str
+    event: str
+
+
+# The allowed transitions; `event` is the WorkOrderEvent type each one logs.
+# A rejection by the contractor holding the offer passes the order to the
+# next candidate (target ASSIGNED) when there is one; every other rejection
+# returns it to the creator. 'expire' is applied by the timeout sweep only.
+TRANSITIONS = {
+    'accept': Transition('accept', (NEW, ASSIGNED), ACCEPTED, 'accepted'),
+    'reject': Transition('reject', (NEW, ASSIGNED), RETURNED, 'rejected'),
+    'expire': Transition('expire', (NEW, ASSIGNED), RETURNED, 'expired'),
+    'complete': Transition('complete', (ACCEPTED,), COMPLETED, 'completed'),
+}
+
+
+class TransitionError(Exception):
+    """Raised for an unknown transition name."""
+
+
+# --------------------------
+# Who may act
+# --------------------------
+ACTOR_RULES = {
+    NEW: lambda c: (
+        Q(preferred_contractor_id=c, rejected_by_first=False)
+        | Q(second_contractor_id=c, rejected_by_second=False)
+    ),
+    ASSIGNED: lambda c: Q(assigned_contractor_id=c),
+    ACCEPTED: lambda c: Q(assigned_contractor_id=c),
+}
+
+
+def _actor_q(transition, company_id):
+    return reduce(or_, (
+        Q(status=status) & ACTOR_RULES[status](company_id)
+        for status in transition.sources
+    ))
+
+
+def _is_actor(order, status, company_id):
+    """Python mirror of ACTOR_RULES for an already-loaded order."""
+    if status == NEW:
+        return (
+            (order.preferred_contractor_id == company_id and not order.rejected_by_first)
+            or (order.second_contractor_id == company_id and not order.rejected_by_second)
+        )
+    return order.assigned_contractor_id == company_id
+
+
+def can_apply(name, order, company_id):
+    """True if `company_id` may apply transition `name` to `order` right now."""
+    transition = get_transition(name)
+    return (
+        company_id is not None
+        and order.status in transition.sources
+        and _is_actor(order, order.status, company_id)
+    )
+
+
+def get_transition(name):
+    try:
+        return TRANSITIONS[name]
+    except KeyError:
+        raise TransitionError(f"Unknown work order transition: {name}")
+
+
+# --------------------------
+# Candidate list and cascade
+# --------------------------
+def candidate_rows(order, extra_ids=()):
+    """Unsaved WorkOrderCandidates for `order`: preferred (0), second (1), then `extra_ids` from 2."""
+    rows, seen = [], set()
+    slots = [(0, order.preferred_contractor_id), (1, order.second_contractor_id)]
+    slots += [(position, company_id) for position, company_id in enumerate(extra_ids, start=2)]
+    for position, company_id in slots:
+        if company_id and company_id not in seen:
+            seen.add(company_id)
+            rows.append(WorkOrderCandidate(work_order_id=order.id, contractor_id=company_id, position=position))
+    return rows
+
+
+def set_candidates(order):
+    """
+    Store the preferred and second candidates of a new order and schedule
+    the sweep for its first offer. Called from the WorkOrder post_save signal.
+    """
+    WorkOrderCandidate.objects.bulk_create(candidate_rows(order))
+    schedule_offer_sweep(order.offered_at)
+
+
+def extend_candidates(order, extra_ids):
+    """Append `extra_ids` (positions 2+) to the candidate list of `order`."""
+    WorkOrderCandidate.objects.bulk_create(
+        [row for row in candidate_rows(order, extra_ids) if row.position >= 2]
+    )
+
+
+def _next_candidate():
+    """The candidate after the cursor of the outer WorkOrder row (uses unique_candidate_position)."""
+    return (
+        WorkOrderCandidate.objects
+        .filter(work_order=OuterRef('pk'), position__gt=OuterRef('candidate_position'),
+                contractor__is_contractor=True)
+        .order_by('position')
+    )
+
+
+def _advance(queryset, now, **values):
+    """
+    Move every order in `queryset` to its next candidate, or back to the
+    creator when none is left, in ONE UPDATE. Returns the row count.
+    """
+    has_next = Exists(_next_candidate())
+    return queryset.update(
+        status=Case(When(has_next, then=Value(ASSIGNED)), default=Value(RETURNED)),
+        assigned_contractor_id=Subquery(_next_candidate().values('contractor_id')[:1]),
+        candidate_position=Coalesce(
+            Subquery(_next_candidate().values('position')[:1]), F('candidate_position'),
+        ),
+        returned_to_creator=Case(When(has_next, then=F('returned_to_creator')), default=Value(True)),
+        offered_at=now,
+        updated_at=now,
+        **values,
+    )
+
+
+def _holder_q(company_id):
+    """Orders whose current offer is held by `company_id` (the preferred one, while 'new')."""
+    return (
+        Q(status=NEW, preferred_contractor_id=company_id, rejected_by_first=False, candidate_position=0)
+        | Q(status=ASSIGNED, assigned_contractor_id=company_id)
+    )
+
+
+def _rejected_flags(company_id):
+    """UPDATE values marking `company_id` as having rejected, as preferred and/or second."""
+    return {
+        'rejected_by_first': Case(
+            When(preferred_contractor_id=company_id, then=Value(True)),
+            default=F('rejected_by_first'),
+        ),
+        'rejected_by_second': Case(
+            When(second_contractor_id=company_id, then=Value(True)),
+            default=F('rejected_by_second'),
+        ),
+    }
+
+
+def schedule_offer_sweep(offered_at):
+    """Queue the timeout sweep for the window in which an offer made at `offered_at` expires."""
+    interval = settings.WORK_ORDER_OFFER_SWEEP_INTERVAL
+    expires = (offered_at + timedelta(hours=settings.WORK_ORDER_OFFER_TIMEOUT_HOURS)).timestamp()
+    window_end = (int(expires // interval) + 1) * interval
+    jobs.enqueue(
+        'work_orders.expire_offers', priority=1,
+        key=f"work_orders.expire_offers:{window_end}",
+        delay=max(window_end - timezone.now().timestamp(), 0),
+    )
+
+
+# --------------------------
+# Applying transitions
+# --------------------------
+def _conditional_update(transition, work_order_id, company_id, **values):
+    """Run the transition's UPDATE; returns the number of rows changed (0 or 1)."""
+    return (
+        WorkOrder.objects
+        .filter(pk=work_order_id)
+        .filter(_actor_q(transition, company_id))
+        .update(updated_at=timezone.now(), **values)
+    )
+
+
+def _after_transition(transition, work_order_id, company_id, actor):
+    order = WorkOrder.objects.get(pk=work_order_id)
+    # order.status, not transition.target: a rejection may pass the order on
+    events.record(order.id, transition.event, order.status, actor=actor, company_id=company_id)
+    notifications.notify(order, transition.event, actor=actor)
+    sync_work_queue([order])
+    search.index_work_order(order.id)
+    invalidate_work_order_counts()
+
+
+def apply_transition(name, work_order_id, company_id, actor=None, **values):
+    """
+    Apply transition `name` for contractor `company_id` (`actor` is the
+    user, for the event log). Extra `values` are written in the same
+    UPDATE. Returns the row count.
+    """
+    transition = get_transition(name)
+    with transaction.atomic():
+        rows = _conditional_update(
+            transition, work_order_id, company_id, status=transition.target, **values
+        )
+        if rows:
+            _after_transition(transition, work_order_id, company_id, actor)
+    return rows
+
+
+def accept(work_order_id, company_id, actor=None):
+    return apply_transition(
+        'accept', work_order_id, company_id, actor,
+        assigned_contractor_id=company_id,
+        accepted_at=timezone.now(),
+    )
+
+
+def reject(work_order_id, company_id, actor=None):
+    """
+    The contractor holding the offer rejecting it: pass the order to the
+    next candidate (status 'assigned'), or return it to the creator when
+    there is none. Otherwise (the second contractor of a 'new' order)
+    return it to the creator.
+    """
+    transition = get_transition('reject')
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _advance(
+            WorkOrder.objects.filter(_holder_q(company_id), pk=work_order_id),
+            now,
+            **_rejected_flags(company_id),
+        )
+        if rows:
+            schedule_offer_sweep(now)
+        else:
+            rows = _conditional_update(
+                transition, work_order_id, company_id,
+                status=transition.target,
+                assigned_contractor_id=None,
+                returned_to_creator=True,
+                **_rejected_flags(company_id),
+            )
+        if rows:
+            _after_transition(transition, work_order_id, company_id, actor)
+    return rows
+
+
+def complete(work_order_id, company_id, notes, uploaded_file=None, actor=None):
+    """
+    Mark an accepted order completed. The attachment is written to storage
+    first and released again if the transition loses a race; on success
+    the reference to any attachment it replaces is released.
+    """
+    values = {'completion_notes': notes, 'completed_at': timezone.now()}
+    storage = WorkOrder._meta.get_field('attachment').storage
+
+    stored_name = previous_name = None
+    if uploaded_file is not None:
+        field = WorkOrder._meta.get_field('attachment')
+        stored_name = storage.save(field.generate_filename(None, uploaded_file.name), uploaded_file)
+        values['attachment'] = stored_name
+        values['attachment_name'] = uploaded_file.name[:255]
+        previous_name = WorkOrder.objects.filter(pk=work_order_id).values_list('attachment', flat=True).first()
+
+    rows = apply_transition('complete', work_order_id, company_id, actor, **values)
+    if not rows and stored_name:
+        storage.delete(stored_name)
+    elif rows and previous_name:
+        storage.delete(previous_name)
+    return rows
+
+
+# --------------------------
+# Offer timeout sweep
+# --------------------------
+def expire_offers(batch_size=None):
+    """
+    Pass every order whose offer is older than WORK_ORDER_OFFER_TIMEOUT_HOURS
+    to its next candidate (or back to the creator), `batch_size` orders per
+    transaction. Returns the number of orders moved.
+    """
+    batch_size = batch_size or settings.WORK_ORDER_OFFER_SWEEP_BATCH
+    transition = get_transition('expire')
+    cutoff = timezone.now() - timedelta(hours=settings.WORK_ORDER_OFFER_TIMEOUT_HOURS)
+    # A range scan of the partial index wo_offer_open_idx, up to the cutoff
+    expired = WorkOrder.objects.awaiting_acceptance().filter(offered_at__lt=cutoff)
+    holder = Case(When(status=NEW, then=F('preferred_contractor_id')), default=F('assigned_contractor_id'))
+
+    moved = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            holders = dict(
+                expired.select_for_update(skip_locked=True)
+                .annotate(holder=holder)
+                .order_by('offered_at')
+                .values_list('id', 'holder')[:batch_size]
+            )
+            if not holders:
+                break
+            _advance(expired.filter(pk__in=holders), now)
+
+            # Rows an accept did not win in the meantime
+            orders = list(WorkOrder.objects.filter(pk__in=holders, updated_at=now))
+            WorkOrderEvent.objects.bulk_create([
+                WorkOrderEvent(work_order_id=order.id, event_type=transition.event, to_status=order.status,
+                               company_id=holders[order.id], created_at=now)
+                for order in orders
+            ])
+            for order in orders:
+                notifications.notify(order, transition.event)
+            sync_work_queue(orders)
+            search.index_work_orders(order.id for order in orders)
+            if any(order.status == ASSIGNED for order in orders):
+                schedule_offer_sweep(now)
+        invalidate_work_order_counts()
+        moved += len(orders)
+    return moved
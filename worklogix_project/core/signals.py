@@ -0,0 +1,63 @@
+"""
+Signal handlers for the core app. Connected in CoreConfig.ready().
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.caching import invalidate_on
+from core.counters import ENTITY_COUNTS, WORK_ORDER_COUNTS
+from core.models import BusinessType, Client, Company, CustomUser, Unit, WorkOrder
+from core.services.work_queue import sync_work_queue
+from core.services import search, workflow
+
+
+# Cache namespaces each model feeds (see core/caching.py)
+invalidate_on(Company, ENTITY_COUNTS, 'contractors', 'companies')
+invalidate_on(CustomUser, ENTITY_COUNTS)
+invalidate_on(Client, ENTITY_COUNTS, 'clients')
+invalidate_on(Unit, 'units')
+invalidate_on(BusinessType, 'business_types')
+invalidate_on(WorkOrder, WORK_ORDER_COUNTS)
+
+
+@receiver(post_save, sender=WorkOrder)
+def update_work_queue(sender, instance, **kwargs):
+    """Keep the contractor work queue in step with every saved transition."""
+    sync_work_queue([instance])
+
+
+@receiver(post_save, sender=WorkOrder)
+def seed_candidates(sender, instance, created, **kwargs):
+    """Start the rejection cascade with the preferred and second contractors."""
+    if created:
+        workflow.set_candidates(instance)
+
+
+@receiver(post_save, sender=WorkOrder)
+def update_search_index(sender, instance, **kwargs):
+    search.index_work_order(instance.id)
+
+
+@receiver(post_delete, sender=WorkOrder)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_work_order(instance.id)
+
+
+@receiver(post_delete, sender=WorkOrder)
+def release_attachment(sender, instance, **kwargs):
+    """Drop the order's reference to its (shared, content-addressed) attachment file."""
+    if instance.attachment:
+        instance.attachment.storage.delete(instance.attachment.name)
+
+
+@receiver(post_save, sender=Client)
+def reindex_client_work_orders(sender, instance, created, **kwargs):
+    # Client and unit names are part of the indexed text
+    if not created:
+        search.index_client_work_orders(instance.id)
+
+
+@receiver(post_save, sender=Unit)
+def reindex_unit_work_orders(sender, instance, created, **kwargs):
+    if not created:
+        search.index_unit_work_orders(instance.id)
@@ -1,65 +1,58 @@
+// Contractor dropdowns on the create work order form, ordered by the
+// dispatch ranking (/api/dispatch/rank/). Units are loaded by filter_units.js.
 document.addEventListener('DOMContentLoaded', function () {
-    const businessTypeSelect = document.getElementById('id_business_type');
-    const preferredSelect = document.getElementById('id_preferred_contractor');
-    const secondSelect = document.getElementById('id_second_contractor');
-  
-    function updateContractors(businessTypeId) {
-      fetch(`/api/contractors/${businessTypeId}/`)
-        .then(response => response.json())
-        .then(data => {
-          // Clear existing options
-          preferredSelect.innerHTML = '<option value="">---------</option>';
-          secondSelect.innerHTML = '<option value="">---------</option>';
-  
-          // Populate both dropdowns
-          data.contractors.forEach(contractor => {
-            const option1 = new Option(contractor.name, contractor.id);
-            const option2 = new Option(contractor.name, contractor.id);
-            preferredSelect.add(option1);
-            secondSelect.add(option2);
-          });
-        });
+  const businessTypeSelect = document.getElementById('id_business_type');
+  const clientSelect = document.getElementById('id_client');
+  const unitSelect = document.getElementById('id_unit');
+  const preferredSelect = document.getElementById('id_preferred_contractor');
+  const secondSelect = document.getElementById('id_second_contractor');
+
+  if (!businessTypeSelect || !preferredSelect || !secondSelect) return;
+
+  function fill(select, candidates) {
+    const current = select.value;
+    select.innerHTML = '<option value="">---------</option>';
+    candidates.forEach(candidate => {
+      select.add(new Option(candidate.name, candidate.id));
+    });
+    // Keep the user's pick if it is still a candidate
+    if (candidates.some(candidate => String(candidate.id) === current)) {
+      select.value = current;
     }
-  
-    if (businessTypeSelect) {
-      businessTypeSelect.addEventListener('change', function () {
-        const selectedId = this.value;
-        if (selectedId) {
-          updateContractors(selectedId);
-        } else {
-          preferredSelect.innerHTML = '<option value="">---------</option>';
-          secondSelect.innerHTML = '<option value="">---------</option>';
-        }
-      });
+  }
+
+  function updateContractors() {
+    const businessTypeId = businessTypeSelect.value;
+    if (!businessTypeId) {
+      fill(preferredSelect, []);
+      fill(secondSelect, []);
+      return;
     }
 
-    document.addEventListener('DOMContentLoaded', function () {
-        const clientSelect = document.getElementById('id_client');
-        const unitSelect = document.getElementById('id_unit');
-      
-        function updateUnits(clientId) {
-          fetch(`/api/units/${clientId}/`)
-            .then(response => response.json())
-            .then(data => {
-              unitSelect.innerHTML = '<option value="">---------</option>';
-              data.units.forEach(unit => {
-                const option = new Option(unit.name, unit.id);
-                unitSelect.add(option);
-              });
-            });
+    const params = new URLSearchParams({ business_type: businessTypeId, limit: 100 });
+    if (clientSelect && clientSelect.value) params.set('client', clientSelect.value);
+    if (unitSelect && unitSelect.value) params.set('unit', unitSelect.value);
+
+    fetch(`/api/dispatch/rank/?${params}`)
+      .then(response => response.json())
+      .then(data => {
+        const candidates = data.candidates || [];
+        fill(preferredSelect, candidates);
+        fill(secondSelect, candidates);
+
+        // Suggest the two best candidates when nothing is chosen yet
+        if (!preferredSelect.value && candidates.length) {
+          preferredSelect.value = candidates[0].id;
         }
-      
-        if (clientSelect) {
-          clientSelect.addEventListener('change', function () {
-            const clientId = this.value;
-            if (clientId) {
-              updateUnits(clientId);
-            } else {
-              unitSelect.innerHTML = '<option value="">---------</option>';
-            }
-          });
+        if (!secondSelect.value) {
+          const next = candidates.find(candidate => String(candidate.id) !== preferredSelect.value);
+          if (next) secondSelect.value = next.id;
         }
-      });
-      
-  });
-  
\ No newline at end of file
+      })
+      .catch(error => console.error("Failed to load contractors:", error));
+  }
+
+  businessTypeSelect.addEventListener('change', updateContractors);
+  if (clientSelect) clientSelect.addEventListener('change', updateContractors);
+  if (unitSelect) unitSelect.addEventListener('change', updateContractors);
+});
@@ -1,28 +1,39 @@
 document.addEventListener('DOMContentLoaded', function () {
-    const searchInput = document.getElementById('searchInput');
+    const form = document.getElementById('unitsForm');
     const selectAllCheckbox = document.getElementById('selectAll');
-    const tableRows = document.querySelectorAll('tbody tr');
-  
-    searchInput.addEventListener('input', function () {
-      const searchTerm = this.value.toLowerCase();
-  
-      tableRows.forEach(row => {
-        const rowText = row.textContent.toLowerCase();
-        const visible = rowText.includes(searchTerm);
-        row.style.display = visible ? '' : 'none';
-      });
+    const unitRows = document.querySelectorAll('tbody tr.unit-row');
+
+    // Mark a row dirty as soon as one of its fields is edited
+    unitRows.forEach(row => {
+      row.addEventListener('input', () => row.dataset.dirty = '1');
+      row.addEventListener('change', () => row.dataset.dirty = '1');
     });
-  
+
     selectAllCheckbox.addEventListener('change', function () {
       const checked = this.checked;
-  
-      tableRows.forEach(row => {
-        // Always toggle DELETE even if hidden — Django needs it
-        const deleteCheckbox = row.querySelector('input[type="checkbox"][name$="DELETE"]');
+
+      unitRows.forEach(row => {
+        const deleteCheckbox = row.querySelector('input[type="checkbox"][name="delete"]');
         if (deleteCheckbox) {
           deleteCheckbox.checked = checked;
         }
       });
     });
+
+    // Only send the rows that changed: disabled inputs are not submitted
+    form.addEventListener('submit', function (event) {
+      const action = event.submitter ? event.submitter.value : 'save';
+      if (action !== 'save') {
+        return;
+      }
+      unitRows.forEach(row => {
+        if (!row.dataset.dirty) {
+          row.querySelectorAll('input, select, textarea').forEach(input => {
+            if (input.name !== 'delete') {
+              input.disabled = true;
+            }
+          });
+        }
+      });
+    });
   });
-  
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Content-addressed storage for work order attachments.
+
+ContentAddressedStorage wraps an ordinary Django storage backend (the
+"inner" backend: local disk, an S3-compatible bucket, or memory in tests;
+see STORAGES["attachments"] in settings) and stores every file under the
+SHA-256 of its content:
+
+    ab/cd/abcdef0123...   (the name saved in WorkOrder.attachment)
+
+Saving reads the upload once in ATTACHMENT_CHUNK_SIZE chunks to hash it
+(uploads are already on disk, see FILE_UPLOAD_HANDLERS), then writes it to
+the inner backend only if that content is not stored yet. The same photo
+attached to a hundred work orders is stored once.
+
+Each stored blob has an AttachmentBlob row counting the names that point
+at it: save() adds a reference, delete() drops one. When the last
+reference goes the row is left at ref_count 0 and, after the transaction
+commits, the file and row are removed under the row lock, but only if
+nothing has taken a new reference meanwhile. A save() of the same content
+racing that removal either re-uses the row (and the file stays) or waits
+for it and writes the file again. Callers keep using the normal storage
+API, so FileField, workflow.complete() and the WorkOrder post_delete
+signal all keep the counts right.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage, storages
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+
+def attachment_storage():
+    """The configured attachment storage (callable for FileField(storage=...))."""
+    return storages['attachments']
+
+
+def blob_name(sha256):
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_hash(name):
+    """The SHA-256 a blob name was derived from."""
+    return os.path.basename(name)
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    def __init__(self, backend='django.core.files.storage.FileSystemStorage', options=None, chunk_size=None):
+        self.backend = backend
+        self.options = options or {}
+        self.chunk_size = chunk_size or settings.ATTACHMENT_CHUNK_SIZE
+        try:
+            self.inner = import_string(backend)(**self.options)
+        except ImportError as e:
+            raise ImproperlyConfigured(f"Attachment storage backend {backend!r} is not installed: {e}")
+
+    # --------------------------
+    # Writing
+    # --------------------------
+    def _hash(self, content):
+        """
+        (seekable file, sha256 hex, size). Uploads and files on disk are
+        hashed in place; anything that cannot seek is copied to a temporary
+        file while hashing, so the content is never held in memory.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek') and getattr(content, 'seekable', lambda: True)():
+            content.seek(0)
+            for chunk in content.chunks(self.chunk_size):
+                digest.update(chunk)
+                size += len(chunk)
+            content.seek(0)
+            return content, digest.hexdigest(), size
+
+        spool = tempfile.TemporaryFile()
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+            size += len(chunk)
+            spool.write(chunk)
+        spool.seek(0)
+        return File(spool), digest.hexdigest(), size
+
+    def get_available_name(self, name, max_length=None):
+        # The name is replaced by the content hash in _save()
+        return name
+
+    def _save(self, name, content):
+        from core.models import AttachmentBlob
+
+        content, sha256, size = self._hash(content)
+        name = blob_name(sha256)
+        with transaction.atomic():
+            blob, _ = AttachmentBlob.objects.select_for_update().get_or_create(
+                sha256=sha256, defaults={'size': size},
+            )
+            if not self.inner.exists(name):
+                stored = self.inner.save(name, content)
+                if stored != name:
+                    # An identical upload won the race to write the blob
+                    self.inner.delete(stored)
+            AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        return name
+
+    def delete(self, name):
+        """Drop one reference to `name`; the file goes with the last one."""
+        from core.models import AttachmentBlob
+
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(pk=blob_hash(name)).first()
+            if blob is None:
+                return
+            AttachmentBlob.objects.filter(pk=blob.pk, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+            if blob.ref_count <= 1:
+                transaction.on_commit(lambda: self._remove_unreferenced(name))
+
+    def _remove_unreferenced(self, name):
+        """Delete the blob file and row if no reference was taken since the last one was dropped."""
+        from core.models import AttachmentBlob
+
+        with transaction.atomic():
+            blob = AttachmentBlob.objects.select_for_update().filter(pk=blob_hash(name)).first()
+            if blob is None or blob.ref_count > 0:
+                return
+            # Under the row lock: a concurrent _save() of this content waits, then writes it again
+            self.inner.delete(name)
+            blob.delete()
+
+    # --------------------------
+    # Reading (delegated)
+    # --------------------------
+    def _open(self, name, mode='rb'):
+        return self.inner.open(name, mode)
+
+    def exists(self, name):
+        return self.inner.exists(name)
+
+    def size(self, name):
+        return self.inner.size(name)
+
+    def url(self, name):
+        return self.inner.url(name)
+
+    def path(self, name):
+        return self.inner.path(name)
+
+    def local_path(self, name):
+        """Absolute path of `name` when the blobs are on local disk (for X-Sendfile), else None."""
+        if isinstance(self.inner, FileSystemStorage):
+            return self.inner.path(name)
+        return None
+
+    def listdir(self, path):
+        return self.inner.listdir(path)
+
+    def get_modified_time(self, name):
+        return self.inner.get_modified_time(name)
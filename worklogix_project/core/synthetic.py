@@ -0,0 +1,188 @@
+"""
+Synthetic data generator for load testing.
+
+Creates N contractor/PM companies, users, clients, units and work orders
+with realistic-looking distributions, using bulk inserts. Used by the
+`generate_synthetic_data` and `benchmark_views` management commands.
+
+Everything it creates is tagged with a short run id in names/usernames,
+so several runs can coexist with real data.
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from core.caching import bump_version
+from core.counters import ENTITY_COUNTS, WORK_ORDER_COUNTS
+from core.models import (
+    BusinessType, Client, Company, CustomUser, Unit, WorkOrder, WorkOrderCandidate, WorkOrderEvent,
+)
+from core.models.work_order import OFFER_STATUSES
+from core.services.events import events_from_timestamps
+from core.services.search import index_work_orders
+from core.services.work_queue import sync_work_queue
+from core.services.workflow import candidate_rows
+
+BUSINESS_TYPES = [
+    "Plumbing", "Electrical", "Carpentry", "Painting", "Cleaning", "HVAC",
+    "Landscaping", "Pest Control", "Security", "General Contractor", "Other",
+]
+
+# (status, weight) — roughly what a live system looks like
+STATUS_WEIGHTS = [
+    ('new', 20), ('assigned', 10), ('accepted', 20),
+    ('completed', 40), ('returned', 5), ('rejected', 5),
+]
+PRIORITY_WEIGHTS = [('low', 25), ('medium', 45), ('high', 22), ('critical', 8)]
+UNIT_TYPE_WEIGHTS = [('apartment', 60), ('duplex', 10), ('house', 25), ('commercial', 5)]
+
+DEFAULT_PASSWORD = "ChangeMe!2025"
+
+
+def _pick(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights=weights)[0]
+
+
+def generate(contractors=20, property_managers=3, clients=50, units_per_client=40,
+             users_per_company=2, work_orders=5000, seed=42, batch_size=1000, log=print):
+    """
+    Create a synthetic dataset and return a dict of created row counts.
+    Call inside transaction.atomic() if you want to roll it back afterwards.
+    """
+    rng = random.Random(seed)
+    run = uuid.uuid4().hex[:6]
+    now = timezone.now()
+    password = make_password(DEFAULT_PASSWORD)  # hash once, reuse for every user
+
+    business_types = [BusinessType.objects.get_or_create(name=name)[0] for name in BUSINESS_TYPES]
+
+    # Companies
+    contractor_companies = Company.objects.bulk_create([
+        Company(
+            name=f"Synth Contractor {run}-{i}",
+            is_contractor=True,
+            business_type=business_types[i % len(business_types)],
+            email=f"contractor{i}.{run}@example.com",
+        )
+        for i in range(contractors)
+    ], batch_size=batch_size)
+    pm_companies = Company.objects.bulk_create([
+        Company(name=f"Synth PM {run}-{i}", is_property_manager=True)
+        for i in range(property_managers)
+    ], batch_size=batch_size)
+    log(f"companies: {len(contractor_companies)} contractors, {len(pm_companies)} PMs")
+
+    # Users
+    users = [CustomUser(username=f"synth_{run}_admin", role='admin', password=password)]
+    for company in contractor_companies:
+        users += [
+            CustomUser(username=f"synth_{run}_c{company.id}_{n}", role='contractor',
+                       company=company, password=password)
+            for n in range(users_per_company)
+        ]
+    for company in pm_companies:
+        users += [
+            CustomUser(username=f"synth_{run}_pm{company.id}_{n}", role='property_manager',
+                       company=company, password=password)
+            for n in range(users_per_company)
+        ]
+        users.append(CustomUser(username=f"synth_{run}_as{company.id}", role='assistant',
+                                company=company, password=password))
+    users = CustomUser.objects.bulk_create(users, batch_size=batch_size)
+    creators = [u for u in users if u.role in ('property_manager', 'assistant')]
+    log(f"users: {len(users)}")
+
+    # Clients and units
+    client_rows = Client.objects.bulk_create([
+        Client(name=f"Synth Estate {run}-{i}", address=f"{i} Synthetic Road",
+               company=pm_companies[i % len(pm_companies)])
+        for i in range(clients)
+    ], batch_size=batch_size)
+    Unit.objects.bulk_create([
+        Unit(client=client, name=f"Unit {n}", unit_type=_pick(rng, UNIT_TYPE_WEIGHTS))
+        for client in client_rows
+        for n in range(1, units_per_client + 1)
+    ], batch_size=batch_size)
+    units_by_client = {}
+    for unit_id, client_id in Unit.objects.filter(client__in=client_rows).values_list('id', 'client_id'):
+        units_by_client.setdefault(client_id, []).append(unit_id)
+    log(f"clients: {len(client_rows)}, units: {len(client_rows) * units_per_client}")
+
+    # Work orders
+    contractors_by_type = {}
+    for company in contractor_companies:
+        contractors_by_type.setdefault(company.business_type_id, []).append(company)
+
+    def build_work_order(i):
+        business_type_id = rng.choice(list(contractors_by_type))
+        candidates = contractors_by_type[business_type_id]
+        preferred = rng.choice(candidates)
+        second = rng.choice(candidates) if len(candidates) > 1 and rng.random() < 0.6 else None
+        if second == preferred:
+            second = None
+        client = rng.choice(client_rows)
+        status = _pick(rng, STATUS_WEIGHTS)
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        common_area = rng.random() < 0.3 or not units_by_client.get(client.id)
+
+        order = WorkOrder(
+            title=f"Synthetic job {i}",
+            description="Synthetic work order for load testing.",
+            priority=_pick(rng, PRIORITY_WEIGHTS),
+            status=status,
+            client=client,
+            unit_id=None if common_area else rng.choice(units_by_client[client.id]),
+            is_common_area=common_area,
+            created_by=rng.choice(creators),
+            business_type_id=business_type_id,
+            preferred_contractor=preferred,
+            second_contractor=second,
+            due_date=(created_at + timedelta(days=rng.randint(3, 21))).date(),
+            created_at=created_at,
+        )
+        if status in ('accepted', 'completed'):
+            order.assigned_contractor = preferred
+            order.accepted_at = created_at + timedelta(hours=rng.randint(1, 72))
+        elif status == 'assigned' and second:
+            order.assigned_contractor = second
+            order.rejected_by_first = True
+            order.candidate_position = 1
+        if status == 'completed':
+            order.completed_at = order.accepted_at + timedelta(hours=rng.randint(2, 24 * 14))
+            order.completion_notes = "Done."
+        if status == 'returned':
+            order.rejected_by_first = True
+            order.rejected_by_second = second is not None
+            order.returned_to_creator = True
+        return order
+
+    for start in range(0, work_orders, batch_size):
+        batch = WorkOrder.objects.bulk_create(
+            [build_work_order(i) for i in range(start, min(start + batch_size, work_orders))]
+        )
+        # bulk_create skips the post_save hooks
+        sync_work_queue(batch)
+        index_work_orders(order.id for order in batch)
+        WorkOrderCandidate.objects.bulk_create(
+            [row for order in batch if order.status in OFFER_STATUSES for row in candidate_rows(order)]
+        )
+        WorkOrderEvent.objects.bulk_create(
+            [event for order in batch for event in events_from_timestamps(order)]
+        )
+    log(f"work orders: {work_orders}")
+
+    # bulk_create skips the signals that invalidate cached counts and lookups
+    bump_version(ENTITY_COUNTS, WORK_ORDER_COUNTS, 'units', 'clients', 'contractors', 'business_types')
+
+    return {
+        'run': run,
+        'companies': len(contractor_companies) + len(pm_companies),
+        'users': len(users),
+        'clients': len(client_rows),
+        'units': len(client_rows) * units_per_client,
+        'work_orders': work_orders,
+    }
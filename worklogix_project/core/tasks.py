@@ -0,0 +1,82 @@
+"""
+Background job handlers (see core/services/jobs.py).
+
+Imported from CoreConfig.ready() so every process knows the task names.
+Each handler takes the job payload as keyword arguments and returns a
+JSON-serialisable result, stored on the Job.
+"""
+import codecs
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+
+from core.models import Client, UnitGroup
+from core.services.geocoding import fill_addresses, resolve_eircodes
+from core.services.importer import ImportFormatError, import_clients_and_units
+from core.services.jobs import task
+from core.services.notifications import deliver_pending
+from core.services.workflow import expire_offers
+from core.services.units import provision_units
+from core.storage import attachment_storage
+
+
+@task('geocode.resolve')
+def geocode_resolve(eircodes):
+    """Warm the geocode cache for `eircodes`."""
+    return {'resolved': len(resolve_eircodes(eircodes))}
+
+
+@task('email.send')
+def send_email(subject, body, to, from_email=None, html_body=None):
+    message = EmailMultiAlternatives(
+        subject, body, from_email or settings.DEFAULT_FROM_EMAIL, to,
+    )
+    if html_body:
+        message.attach_alternative(html_body, 'text/html')
+    return {'sent': message.send()}
+
+
+@task('units.provision')
+def provision(client_id, specs, group_id=None):
+    """
+    Create units for a client (provision_units). Blank street/city/county
+    are filled from the unit's Eircode here, so the geocoder is only ever
+    called from a worker.
+    """
+    client = Client.objects.get(pk=client_id)
+    group = UnitGroup.objects.get(pk=group_id) if group_id else None
+
+    fill_addresses(specs)
+
+    result = provision_units(client, specs, group=group)
+    return {'created': result.created, 'skipped': result.skipped}
+
+
+@task('clients.import', atomic=False)
+def import_clients(name):
+    """
+    Import a client/unit CSV the import_clients view stored in the
+    attachment storage under `name`; each chunk commits on its own. The
+    upload is dropped once it has been read (kept for a retry after a crash).
+    """
+    storage = attachment_storage()
+    try:
+        with storage.open(name, 'rb') as upload:
+            result = import_clients_and_units(codecs.iterdecode(upload, 'utf-8-sig')).as_dict()
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        result = {'format_error': str(e)}
+    storage.delete(name)
+    return result
+
+
+@task('notifications.deliver', atomic=False)
+def deliver_notifications():
+    """Send the notification outbox; each batch commits once its emails are out."""
+    emails, delivered = deliver_pending()
+    return {'emails': emails, 'notifications': delivered}
+
+
+@task('work_orders.expire_offers', atomic=False)
+def expire_work_order_offers():
+    """Pass offers nobody accepted in time to the next candidate; each batch commits on its own."""
+    return {'moved': expire_offers()}
@@ -1,3 +1,707 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.forms import WorkOrderForm
+from core.models import (
+    AttachmentBlob, BusinessType, Client, Company, CustomUser, DailyWorkOrderStats, GeocodeCacheEntry, Job,
+    Notification, ReportWatermark, Unit, WorkOrder, WorkOrderCandidate,
+)
+from core.storage import ContentAddressedStorage, attachment_storage, blob_name
+from core.services import dispatch, geocoding, jobs, notifications, reporting, workflow
+
+# Handlers for JobTests: every run is logged as (name, payload)
+job_runs = []
+
+
+@jobs.task('tests.record')
+def record_job(label, fail=0):
+    job_runs.append(label)
+    if len([run for run in job_runs if run == label]) <= fail:
+        raise RuntimeError(f"{label} failed")
+    return label
+
+
+class WorkOrderFixtures:
+    """
+    A property manager company with a creating user and a client, plus
+    helpers for contractors and work orders. Mix into TestCase or
+    TransactionTestCase.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.manager = Company.objects.create(name="Manager", is_property_manager=True)
+        self.creator = CustomUser.objects.create_user(
+            "pm", email="pm@example.com", password="x", role="property_manager", company=self.manager,
+        )
+        self.client_obj = Client.objects.create(name="Client", address="1 Main Street", company=self.manager)
+
+    def contractor(self, name, **fields):
+        return Company.objects.create(name=name, is_contractor=True, **fields)
+
+    def order(self, title="Leak", **fields):
+        fields.setdefault('status', workflow.NEW)
+        return WorkOrder.objects.create(
+            title=title, description="d", created_by=self.creator, client=self.client_obj, **fields
+        )
+
+
+class StubGeocoder(BaseHTTPRequestHandler):
+    """Answers like the Google Geocoding API; Eircodes starting with 'X' fail."""
+    requests = []
+
+    def do_GET(self):
+        eircode = parse_qs(urlparse(self.path).query)['address'][0]
+        self.requests.append(eircode)
+        if eircode.startswith('X'):
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({'status': 'OK', 'results': [{
+            'formatted_address': f"1 Main Street, Dublin, {eircode}",
+            'address_components': [
+                {'long_name': f"Street {eircode}", 'types': ['route']},
+                {'long_name': 'Dublin', 'types': ['locality']},
+                {'long_name': 'County Dublin', 'types': ['administrative_area_level_1']},
+            ],
+        }]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GeocodingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGeocoder)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/geocode/json"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubGeocoder.requests = []
+        settings = override_settings(GEOCODER_URL=self.url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_misses_are_fetched_once_and_cached(self):
+        # One query for the cache, one upsert for everything fetched
+        with self.assertNumQueries(2):
+            addresses = geocoding.resolve_eircodes(['d02 x285', 'D02X285', 'A65F4E2', 'T12AB34'])
+        self.assertEqual(sorted(StubGeocoder.requests), ['A65F4E2', 'D02X285', 'T12AB34'])
+        self.assertEqual(addresses['D02X285']['street'], 'Street D02X285')
+        self.assertEqual(GeocodeCacheEntry.objects.count(), 3)
+
+        StubGeocoder.requests = []
+        with self.assertNumQueries(1):
+            addresses = geocoding.resolve_eircodes(['D02X285', 'A65F4E2'])
+        self.assertEqual(StubGeocoder.requests, [])
+        self.assertEqual(addresses['A65F4E2']['city'], 'Dublin')
+
+    def test_only_uncached_eircodes_hit_the_geocoder(self):
+        geocoding.resolve_eircodes(['D02X285'])
+        StubGeocoder.requests = []
+        geocoding.resolve_eircodes(['D02X285', 'A65F4E2'])
+        self.assertEqual(StubGeocoder.requests, ['A65F4E2'])
+
+    def test_failures_are_not_cached(self):
+        with self.assertLogs('core.services.geocoding', 'WARNING'):
+            addresses = geocoding.resolve_eircodes(['X99X999'])
+        self.assertEqual(addresses['X99X999'], geocoding.EMPTY_ADDRESS)
+        self.assertFalse(GeocodeCacheEntry.objects.exists())
+
+
+def run_concurrently(*calls):
+    """
+    Start `calls` at the same moment, each in its own thread and database
+    connection, and return their results in order.
+    """
+    start = threading.Barrier(len(calls))
+    results = {}
+
+    def run(i, call):
+        start.wait()
+        try:
+            for _ in range(200):
+                try:
+                    results[i] = call()
+                    return
+                except OperationalError:
+                    # The in-memory SQLite test database refuses a second
+                    # writer instead of making it wait; wait here instead
+                    time.sleep(0.01)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [results.get(i) for i in range(len(calls))]
+
+
+class ConcurrentAcceptTests(WorkOrderFixtures, TransactionTestCase):
+    """Both contractors offered a 'new' order accept it at the same moment."""
+    threads = 8
+
+    def setUp(self):
+        super().setUp()
+        self.preferred = self.contractor("Preferred")
+        self.second = self.contractor("Second")
+        self.work_order = self.order(preferred_contractor=self.preferred, second_contractor=self.second)
+
+    def test_exactly_one_accept_wins(self):
+        companies = [self.preferred if i % 2 else self.second for i in range(self.threads)]
+        results = run_concurrently(*(
+            lambda company=company: (company.id, workflow.accept(self.work_order.id, company.id))
+            for company in companies
+        ))
+
+        self.assertNotIn(None, results)
+        updated = [company_id for company_id, rows in results if rows]
+        self.assertEqual(len(updated), 1, results)
+
+        self.work_order.refresh_from_db()
+        self.assertEqual(self.work_order.status, workflow.ACCEPTED)
+        self.assertEqual(self.work_order.assigned_contractor_id, updated[0])
+
+
+class CascadeTests(WorkOrderFixtures, TestCase):
+    """Passing an offer down the candidate list: preferred, second, then the extra candidates."""
+
+    def setUp(self):
+        super().setUp()
+        self.first, self.second, self.third = (self.contractor(name) for name in ("First", "Second", "Third"))
+        self.work_order = self.order(preferred_contractor=self.first, second_contractor=self.second)
+        workflow.extend_candidates(self.work_order, [self.third.id])
+
+    def assertHeldBy(self, company, status=workflow.ASSIGNED):
+        self.work_order.refresh_from_db()
+        self.assertEqual(self.work_order.status, status)
+        self.assertEqual(self.work_order.assigned_contractor, company)
+
+    def test_reject_passes_the_offer_to_the_next_candidate(self):
+        self.assertEqual(workflow.reject(self.work_order.id, self.first.id), 1)
+        self.assertHeldBy(self.second)
+        self.assertEqual(workflow.accept(self.work_order.id, self.first.id), 0)
+        self.assertEqual(workflow.accept(self.work_order.id, self.second.id), 1)
+        self.assertHeldBy(self.second, workflow.ACCEPTED)
+
+    def test_expired_offer_passes_to_the_next_candidate(self):
+        WorkOrder.objects.filter(pk=self.work_order.pk).update(offered_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(workflow.expire_offers(), 1)
+        self.assertHeldBy(self.second)
+        self.assertEqual(
+            list(self.work_order.events.values_list('event_type', 'company_id')),
+            [('expired', self.first.id)],
+        )
+        self.assertEqual(workflow.expire_offers(), 0)  # the new offer has a fresh offered_at
+
+    def test_last_candidate_rejecting_returns_the_order(self):
+        for company in (self.first, self.second, self.third):
+            self.assertEqual(workflow.reject(self.work_order.id, company.id), 1)
+        self.assertHeldBy(None, workflow.RETURNED)
+        self.assertTrue(self.work_order.returned_to_creator)
+
+    def test_deleted_and_deactivated_candidates_are_skipped(self):
+        fourth = self.contractor("Fourth")
+        WorkOrderCandidate.objects.create(work_order=self.work_order, contractor=fourth, position=3)
+        Company.objects.filter(pk=self.second.pk).update(is_contractor=False)
+        self.third.delete()
+
+        workflow.reject(self.work_order.id, self.first.id)
+        self.assertHeldBy(fourth)
+
+
+class ConcurrentExpiryTests(WorkOrderFixtures, TransactionTestCase):
+    """The holder accepts an offer while the timeout sweep passes it on."""
+
+    def test_accept_and_expiry_do_not_both_win(self):
+        preferred, second = self.contractor("Preferred"), self.contractor("Second")
+        order = self.order(preferred_contractor=preferred, second_contractor=second)
+        WorkOrder.objects.filter(pk=order.pk).update(offered_at=timezone.now() - timedelta(days=30))
+
+        accepted, expired = run_concurrently(
+            lambda: workflow.accept(order.id, preferred.id),
+            workflow.expire_offers,
+        )
+
+        self.assertEqual(accepted + expired, 1, (accepted, expired))
+        order.refresh_from_db()
+        if accepted:
+            self.assertEqual((order.status, order.assigned_contractor_id), (workflow.ACCEPTED, preferred.id))
+        else:
+            self.assertEqual((order.status, order.assigned_contractor_id), (workflow.ASSIGNED, second.id))
+        self.assertEqual(order.events.count(), 1)
+
+
+@override_settings(JOB_RETRY_BASE_DELAY=10, JOB_RETRY_MAX_DELAY=60)
+class JobTests(TestCase):
+    def setUp(self):
+        job_runs.clear()
+
+    def test_higher_priority_runs_first(self):
+        jobs.enqueue('tests.record', {'label': 'low'})
+        jobs.enqueue('tests.record', {'label': 'high'}, priority=5)
+        jobs.enqueue('tests.record', {'label': 'later'}, priority=9, delay=60)
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(job_runs, ['high', 'low'])
+
+    def test_failure_is_retried_with_backoff(self):
+        job = jobs.enqueue('tests.record', {'label': 'flaky', 'fail': 2})
+        with self.assertLogs('core.services.jobs', 'WARNING'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 10, delta=1.5)
+        self.assertEqual(jobs.run_pending(), 0)  # not due yet
+
+        for _ in range(2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            with self.assertNoLogs('core.services.jobs', 'ERROR'):
+                jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (Job.DONE, 3, 'flaky'))
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        for attempts, expected in ((1, 10), (2, 20), (3, 40), (4, 60), (10, 60)):
+            self.assertAlmostEqual(jobs.retry_delay(attempts), expected, delta=expected * 0.1)
+
+    def test_last_attempt_fails_permanently(self):
+        job = jobs.enqueue('tests.record', {'label': 'broken', 'fail': 5}, max_attempts=1)
+        with self.assertLogs('core.services.jobs', 'ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('broken failed', job.last_error)
+
+    def test_idempotency_key_returns_the_pending_job(self):
+        first = jobs.enqueue('tests.record', {'label': 'a'}, key='tests:1')
+        again = jobs.enqueue('tests.record', {'label': 'b'}, key='tests:1')
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(job_runs, ['a'])
+
+    def test_idempotency_key_is_released_when_the_job_finishes(self):
+        first = jobs.enqueue('tests.record', {'label': 'a'}, key='tests:1')
+        jobs.run_pending()
+        second = jobs.enqueue('tests.record', {'label': 'b'}, key='tests:1')
+        self.assertNotEqual(second.pk, first.pk)
+        jobs.run_pending()
+        self.assertEqual(job_runs, ['a', 'b'])
+
+    def test_prune_finished(self):
+        old = jobs.enqueue('tests.record', {'label': 'old'}, key='tests:old')
+        recent = jobs.enqueue('tests.record', {'label': 'recent'})
+        queued = jobs.enqueue('tests.record', {'label': 'queued'}, delay=60)
+        jobs.run_pending()
+        Job.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(days=8))
+
+        self.assertEqual(jobs.prune_finished(days=7), 1)
+        self.assertQuerySetEqual(Job.objects.order_by('pk'), [recent, queued])
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP server went away")
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', APP_BASE_URL='')
+class NotificationTests(WorkOrderFixtures, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.company = self.contractor("Contractor")
+        self.users = [
+            CustomUser.objects.create_user(
+                f"c{i}", email=f"c{i}@example.com", password="x", role="contractor", company=self.company,
+            )
+            for i in range(3)
+        ]
+
+    def queue(self, user, count):
+        for i in range(count):
+            Notification.objects.create(
+                recipient=user, email=user.email, work_order=self.order(f"{user.username}-{i}"),
+                kind=Notification.ASSIGNED, message=f"update {i} for {user.username}",
+            )
+
+    def test_one_email_per_recipient(self):
+        self.queue(self.users[0], 3)
+        self.queue(self.users[1], 1)
+
+        self.assertEqual(notifications.deliver_pending(), (2, 4))
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(by_recipient), {'c0@example.com', 'c1@example.com'})
+        self.assertEqual(by_recipient['c0@example.com'].subject, "Work Logix: 3 work order updates")
+        self.assertEqual(by_recipient['c1@example.com'].subject, "Work Logix: update 0 for c1")
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(notifications.deliver_pending(), (0, 0))
+
+    def test_batches_never_split_a_recipient(self):
+        for user, count in zip(self.users, (1, 4, 2)):
+            self.queue(user, count)
+
+        self.assertEqual(notifications.deliver_pending(batch_size=1), (3, 7))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['c0@example.com', 'c1@example.com', 'c2@example.com'])
+        digest = next(message for message in mail.outbox if message.to == ['c1@example.com'])
+        for i in range(4):
+            self.assertIn(f"update {i} for c1", digest.body)
+
+    def test_failed_send_releases_the_claim(self):
+        self.queue(self.users[0], 2)
+        with override_settings(EMAIL_BACKEND='core.tests.FailingEmailBackend'):
+            with self.assertRaises(ConnectionError):
+                notifications.deliver_pending()
+        self.assertEqual(Notification.objects.filter(sent_at__isnull=True, locked_at__isnull=True).count(), 2)
+        self.assertEqual(notifications.deliver_pending(), (1, 2))
+
+    def test_expired_offer_passed_on_tells_the_creator(self):
+        order = self.order(status=workflow.ASSIGNED, assigned_contractor=self.company)
+        notifications.notify(order, 'expired')
+        creator_note = Notification.objects.get(recipient=self.creator)
+        self.assertEqual(creator_note.kind, Notification.REJECTED)
+        self.assertIn("passed to the next contractor", creator_note.message)
+        self.assertEqual(Notification.objects.filter(kind=Notification.ASSIGNED).count(), 3)
+
+
+class RollupTests(WorkOrderFixtures, TestCase):
+    def created_today(self):
+        return DailyWorkOrderStats.objects.get(
+            dimension=DailyWorkOrderStats.PRIORITY, key='high', day=timezone.localdate(),
+        ).created_count
+
+    def test_late_commit_behind_the_watermark_is_picked_up(self):
+        self.order(priority='high')
+        reporting.build_rollups(full=True)
+        mark = ReportWatermark.objects.get(name=reporting.WATERMARK_NAME).updated_at
+
+        # Written by a transaction that started before the build but committed after it
+        late = self.order(priority='high')
+        WorkOrder.objects.filter(pk=late.pk).update(updated_at=mark - timedelta(minutes=1))
+        reporting.build_rollups()
+        self.assertEqual(self.created_today(), 2)
+
+    def test_full_rebuild_is_all_or_nothing(self):
+        self.order(priority='high')
+        reporting.build_rollups(full=True)
+        with mock.patch.object(reporting, '_aggregate_days', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                reporting.build_rollups(full=True)
+        self.assertEqual(self.created_today(), 1)
+
+    def test_contractor_rollup_charges_each_step_of_the_cascade_to_its_company(self):
+        first, second, third = (self.contractor(name) for name in ("First", "Second", "Third"))
+        order = self.order(preferred_contractor=first, second_contractor=second)
+        workflow.extend_candidates(order, [third.id])
+        self.order(preferred_contractor=first)  # still open with First
+
+        workflow.reject(order.id, first.id)
+        WorkOrder.objects.filter(pk=order.pk).update(offered_at=timezone.now() - timedelta(days=30))
+        workflow.expire_offers()
+        workflow.accept(order.id, third.id)
+        reporting.build_rollups(full=True)
+
+        rows = {
+            row.key: (row.created_count, row.accepted_count, row.rejected_count)
+            for row in DailyWorkOrderStats.objects.filter(dimension=DailyWorkOrderStats.CONTRACTOR)
+        }
+        self.assertEqual(rows, {
+            str(first.id): (2, 0, 1),   # offered both orders, rejected one
+            str(second.id): (1, 0, 0),  # its offer expired
+            str(third.id): (1, 1, 0),
+        })
+
+        contractors = dispatch.build_snapshot().contractors
+        self.assertEqual((contractors[first.id].offered, contractors[first.id].accepted), (2, 0))
+        self.assertEqual((contractors[third.id].offered, contractors[third.id].accepted), (1, 1))
+
+
+class WorkOrderFormDispatchTests(WorkOrderFixtures, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.business_type = BusinessType.objects.create(name="Plumbing")
+        self.best, self.next, self.gone = (
+            self.contractor(name, business_type=self.business_type) for name in ("Best", "Next", "Gone")
+        )
+        # The in-memory ranking still lists a contractor deleted since the snapshot was built
+        ranked = [dispatch.Candidate(c.id, c.name, 1.0, {}) for c in (self.gone, self.best, self.next)]
+        self.gone.delete()
+        patcher = mock.patch.object(dispatch, 'rank', return_value=ranked)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def form(self, **data):
+        return WorkOrderForm({
+            'title': "Leak", 'description': "d", 'priority': 'medium', 'client': self.client_obj.id,
+            'business_type': self.business_type.id, 'is_common_area': 'on', **data,
+        })
+
+    def test_blank_contractors_stay_blank(self):
+        form = self.form()
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIsNone(form.cleaned_data['preferred_contractor'])
+        self.assertIsNone(form.cleaned_data['second_contractor'])
+
+    def test_auto_dispatch_fills_blanks_skipping_stale_candidates(self):
+        form = self.form(auto_dispatch='on', second_contractor=self.best.id)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['preferred_contractor'], self.next)
+        self.assertEqual(form.cleaned_data['second_contractor'], self.best)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.storage = ContentAddressedStorage(backend='django.core.files.storage.InMemoryStorage')
+
+    def refs(self, name):
+        return AttachmentBlob.objects.filter(pk=name.rsplit('/', 1)[-1]).values_list('ref_count', flat=True).first()
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save("a.pdf", ContentFile(b"%PDF-1 same"))
+        second = self.storage.save("b.pdf", ContentFile(b"%PDF-1 same"))
+        other = self.storage.save("c.pdf", ContentFile(b"%PDF-1 other"))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(first, blob_name(first.rsplit('/', 1)[-1]))
+        self.assertEqual(self.refs(first), 2)
+        self.assertEqual(self.storage.open(first).read(), b"%PDF-1 same")
+
+    def test_file_goes_with_the_last_reference(self):
+        name = self.storage.save("a.pdf", ContentFile(b"data"))
+        self.storage.save("b.pdf", ContentFile(b"data"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertEqual(self.refs(name), 1)
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertIsNone(self.refs(name))
+        self.assertFalse(self.storage.exists(name))
+
+    def test_save_racing_the_last_delete_keeps_the_file(self):
+        name = self.storage.save("a.pdf", ContentFile(b"data"))
+        with self.captureOnCommitCallbacks() as removals:
+            self.storage.delete(name)
+        # Same content saved again before the deferred removal runs
+        self.assertEqual(self.storage.save("b.pdf", ContentFile(b"data")), name)
+        for removal in removals:
+            removal()
+        self.assertEqual(self.refs(name), 1)
+        self.assertEqual(self.storage.open(name).read(), b"data")
+
+    def test_save_after_the_removal_writes_the_file_again(self):
+        name = self.storage.save("a.pdf", ContentFile(b"data"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.storage.save("b.pdf", ContentFile(b"data"))
+        self.assertEqual(self.refs(name), 1)
+        self.assertEqual(self.storage.open(name).read(), b"data")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ATTACHMENT_SENDFILE='', ATTACHMENT_CHUNK_SIZE=4)
+class AttachmentDownloadTests(WorkOrderFixtures, TestCase):
+    content = b"0123456789abcdef"
+
+    def setUp(self):
+        super().setUp()
+        storage = WorkOrder._meta.get_field('attachment').storage
+        order = self.order(
+            attachment=storage.save("photo.jpg", ContentFile(self.content)), attachment_name="photo.jpg",
+        )
+        self.etag = f'"{order.attachment.name.rsplit("/", 1)[-1]}"'
+        self.url = f"/work-orders/{order.id}/attachment/"
+        self.client.force_login(self.creator)
+
+    def test_whole_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-9'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[2:10])
+        self.assertEqual(response['Content-Range'], 'bytes 2-9/16')
+        self.assertEqual(response['Content-Length'], '8')
+
+    def test_suffix_range(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+    def test_range_past_the_end(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=16-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */16')
+
+    def test_if_range_with_another_etag_sends_the_whole_file(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-9', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class VisibilityTests(WorkOrderFixtures, TestCase):
+    """WorkOrderQuerySet.visible_to per role, through the views that scope with it."""
+
+    def setUp(self):
+        super().setUp()
+        preferred, second, assigned, unrelated = (
+            self.contractor(name) for name in ("Preferred", "Second", "Assigned", "Unrelated")
+        )
+        self.work_order = self.order(
+            title="Boiler leak", status=workflow.ASSIGNED,
+            preferred_contractor=preferred, second_contractor=second, assigned_contractor=assigned,
+        )
+        users = {
+            'admin': dict(role='admin'),
+            'other_manager': dict(role='property_manager', company=self.manager),
+            'preferred': dict(role='contractor', company=preferred),
+            'second': dict(role='contractor', company=second),
+            'assigned': dict(role='contractor', company=assigned),
+            'unrelated': dict(role='contractor', company=unrelated),
+        }
+        self.users = {name: CustomUser.objects.create_user(name, **fields)
+                      for name, fields in users.items()}
+        self.users['creator'] = self.creator
+        self.visible = {'admin', 'creator', 'preferred', 'second', 'assigned'}
+
+    def test_queryset(self):
+        for name, user in self.users.items():
+            with self.subTest(name):
+                self.assertEqual(WorkOrder.objects.visible_to(user).exists(), name in self.visible)
+
+    def test_detail_view(self):
+        for name, user in self.users.items():
+            with self.subTest(name):
+                self.client.force_login(user)
+                response = self.client.get(f"/work-orders/{self.work_order.id}/")
+                self.assertEqual(response.status_code, 200 if name in self.visible else 403)
+
+    def test_export(self):
+        for name, user in self.users.items():
+            with self.subTest(name):
+                self.client.force_login(user)
+                response = self.client.get("/work-orders/export/", {'format': 'csv'})
+                body = b"".join(response.streaming_content).decode()
+                self.assertEqual("Boiler leak" in body, name in self.visible)
+
+    def test_search(self):
+        for name, user in self.users.items():
+            with self.subTest(name):
+                self.client.force_login(user)
+                response = self.client.get("/work-orders/search/", {'q': "boiler"})
+                self.assertEqual("Boiler leak" in response.content.decode(), name in self.visible)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ContractorDashboardTests(WorkOrderFixtures, TestCase):
+    def test_company_card_is_cached(self):
+        company = self.contractor("Fix-It", email="jobs@fixit.example")
+        self.client.force_login(CustomUser.objects.create_user("fixit", role="contractor", company=company))
+        self.assertContains(self.client.get("/dashboard/contractor/"), "jobs@fixit.example")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get("/dashboard/contractor/"), "Fix-It")
+        self.assertFalse([q['sql'] for q in queries if 'FROM "core_company"' in q['sql']])
+
+        company.name = "Fixed"
+        company.save()  # bumps the 'companies' namespace
+        self.assertContains(self.client.get("/dashboard/contractor/"), "Fixed")
+
+
+class OfferIndexTests(WorkOrderFixtures, TestCase):
+    def test_offer_sweep_uses_the_partial_index(self):
+        self.order(offered_at=timezone.now() - timedelta(days=2))
+        self.order(status=workflow.ACCEPTED, offered_at=timezone.now() - timedelta(days=2))
+        expired = WorkOrder.objects.awaiting_acceptance().filter(offered_at__lt=timezone.now())
+        self.assertIn('wo_offer_open_idx', expired.explain())
+        self.assertEqual(expired.count(), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnitJobStatusTests(WorkOrderFixtures, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(CustomUser.objects.create_user("admin", password="x", role="admin"))
+
+    def test_generator_reports_created_and_skipped_counts(self):
+        Unit.objects.create(client=self.client_obj, name="Apt 2")
+        response = self.client.post("/units/generator/", {
+            'client': self.client_obj.id, 'prefix': "Apt", 'start': 1, 'end': 4,
+        })
+        job = Job.objects.get(name='units.provision')
+        self.assertRedirects(response, f"/jobs/{job.id}/", fetch_redirect_response=False)
+        self.assertContains(self.client.get(response.url), "Waiting for a worker")
+
+        jobs.run_pending()
+        self.assertContains(self.client.get(response.url), "3 units created, 1 skipped (already existed: Apt 2).")
+
+    def test_job_status_is_admin_only(self):
+        job = jobs.enqueue('units.provision', {'client_id': self.client_obj.id, 'specs': []})
+        self.client.force_login(self.creator)
+        self.assertEqual(self.client.get(f"/jobs/{job.id}/").status_code, 302)
+
+    def test_client_import_runs_as_a_job_with_an_error_report(self):
+        upload = ContentFile(
+            "client_name,client_address,company,unit_name,unit_type\n"
+            "Oak Court,2 Oak Road,Manager,Apt 1,apartment\n"
+            "Oak Court,2 Oak Road,Manager,Apt 2,apartment\n"
+            "Elm Court,3 Elm Road,Nobody,Apt 1,apartment\n".encode(),
+            name="clients.csv",
+        )
+        response = self.client.post("/clients/import/", {'csv_file': upload})
+        job = Job.objects.get(name='clients.import')
+        self.assertRedirects(response, f"/jobs/{job.id}/", fetch_redirect_response=False)
+        self.assertFalse(Client.objects.filter(name="Oak Court").exists())
+
+        with self.captureOnCommitCallbacks(execute=True):  # the upload is dropped on commit
+            jobs.run_pending()
+        page = self.client.get(response.url)
+        self.assertContains(page, "3 rows read: 1 clients and 2 units created")
+        self.assertContains(page, "unknown property manager company")
+        self.assertEqual(Unit.objects.filter(client__name="Oak Court").count(), 2)
+
+        report = self.client.get(f"/clients/import/{job.id}/errors.csv")
+        self.assertEqual(report.content.decode().splitlines()[1].split(',')[0], "4")
+        self.assertFalse(attachment_storage().exists(job.payload['name']))
+
+    def test_client_import_rejects_a_bad_header_without_a_job(self):
+        upload = ContentFile(b"name,address\nOak Court,2 Oak Road\n", name="clients.csv")
+        response = self.client.post("/clients/import/", {'csv_file': upload})
+        self.assertContains(response, "Missing required column(s): client_name")
+        self.assertFalse(Job.objects.filter(name='clients.import').exists())
@@ -7,10 +7,11 @@ from django.contrib.auth import views as auth_views
 
 # Auth
 from core.views.auth import CustomLoginView, custom_logout, redirect_after_login
+from core.forms import QueuedPasswordResetForm
 
 # Dashboards
 from core.views.dashboard import (
-    admin_dashboard, pm_dashboard, contractor_dashboard, assistant_dashboard
+    admin_dashboard, pm_dashboard, contractor_dashboard, assistant_dashboard, sla_report_view,
 )
 
 # Work orders
@@ -18,6 +19,7 @@ from core.views.work_order import (
     create_work_order, view_work_order_detail,
     accept_work_order, reject_work_order, complete_work_order,
     my_contractor_orders, my_work_orders, admin_work_orders_view,
+    search_work_orders_view, export_work_orders, download_work_order_attachment,
 )
 
 # Units
@@ -25,7 +27,8 @@ from core.views.unit import client_units, review_units, delete_unit, unit_genera
 
 # Clients
 from core.views.client import (
-    create_client, manage_clients, view_client, edit_client, delete_client
+    create_client, manage_clients, view_client, edit_client, delete_client,
+    import_clients, import_error_report,
 )
 
 # Companies
@@ -35,11 +38,14 @@ from core.views.company import (
 
 # Users (admin area)
 from core.views.admin import (
-    create_user, manage_users, view_user, edit_user, delete_user, reset_user_password
+    create_user, manage_users, view_user, edit_user, delete_user, reset_user_password, job_status,
 )
 
 # API
-from core.views.api import get_contractors_by_business_type, get_units_by_client
+from core.views.api import (
+    get_contractors_by_business_type, get_units_by_client, admin_work_orders_api,
+    query_stats_api, work_order_timeline_api, dispatch_rank_api,
+)
 
 # Build context for email links if APP_BASE_URL is set (prod).
 _reset_email_ctx = None
@@ -60,6 +66,7 @@ urlpatterns = [
     path("dashboard/pm/", pm_dashboard, name="pm_dashboard"),
     path("dashboard/contractor/", contractor_dashboard, name="contractor_dashboard"),
     path("dashboard/assistant/", assistant_dashboard, name="assistant_dashboard"),
+    path("reports/sla/", sla_report_view, name="sla_report"),
 
     # Work orders
     path("work-orders/create/", create_work_order, name="create_work_order"),
@@ -67,19 +74,26 @@ urlpatterns = [
     path("work-orders/<int:work_order_id>/accept/", accept_work_order, name="accept_work_order"),
     path("work-orders/<int:work_order_id>/reject/", reject_work_order, name="reject_work_order"),
     path("work-orders/<int:work_order_id>/complete/", complete_work_order, name="complete_work_order"),
+    path("work-orders/<int:work_order_id>/attachment/", download_work_order_attachment,
+         name="download_work_order_attachment"),
     path("contractor/work-orders/", my_contractor_orders, name="my_contractor_orders"),
     path("my-work-orders/", my_work_orders, name="my_work_orders"),
     path("work-orders/admin/", admin_work_orders_view, name="admin_work_orders"),
+    path("work-orders/search/", search_work_orders_view, name="search_work_orders"),
+    path("work-orders/export/", export_work_orders, name="export_work_orders"),
 
     # Units
     path("clients/<int:client_id>/units/", client_units, name="client_units"),
     path("units/review/", review_units, name="review_units"),
     path("units/delete/<int:unit_id>/", delete_unit, name="delete_unit"),
     path("units/generator/", unit_generator, name="unit_generator"),
+    path("jobs/<int:job_id>/", job_status, name="job_status"),
 
     # Clients
     path("clients/", manage_clients, name="manage_clients"),
     path("clients/create/", create_client, name="create_client"),
+    path("clients/import/", import_clients, name="import_clients"),
+    path("clients/import/<int:job_id>/errors.csv", import_error_report, name="import_error_report"),
     path("clients/<int:client_id>/view/", view_client, name="view_client"),
     path("clients/<int:client_id>/edit/", edit_client, name="edit_client"),
     path("clients/<int:client_id>/delete/", delete_client, name="delete_client"),
@@ -103,12 +117,18 @@ urlpatterns = [
     path("api/contractors/<int:business_type_id>/", get_contractors_by_business_type,
          name="get_contractors_by_business_type"),
     path("api/units/<int:client_id>/", get_units_by_client, name="get_units_by_client"),
+    path("api/work-orders/", admin_work_orders_api, name="admin_work_orders_api"),
+    path("api/work-orders/<int:work_order_id>/timeline/", work_order_timeline_api,
+         name="work_order_timeline_api"),
+    path("api/query-stats/", query_stats_api, name="query_stats_api"),
+    path("api/dispatch/rank/", dispatch_rank_api, name="dispatch_rank_api"),
 
     # 1) Request reset (user enters email)
     path(
         "password-reset/",
         auth_views.PasswordResetView.as_view(
             template_name="core/auth/password_reset_form.html",
+            form_class=QueuedPasswordResetForm,  # email sent by the job worker
             email_template_name="core/auth/password_reset_email.txt",
             subject_template_name="core/auth/password_reset_subject.txt",
             success_url="/password-reset/done/",
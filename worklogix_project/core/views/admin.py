@@ -3,8 +3,11 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import SetPasswordForm
 from core.decorators import admin_required
-from core.models import Company, CustomUser, WorkOrder, Unit, UnitGroup
+from core.models import Company, CustomUser, Job, WorkOrder, Unit, UnitGroup
+from core.services import jobs
+from core.services.units import numbered_specs
 from django.http import HttpResponseForbidden
+from django.urls import reverse
 from core.forms import (
     CustomUserCreationForm,
     CompanyCreationForm,
@@ -200,23 +203,77 @@ def create_unit_group(request):
         unit_group.created_by = request.user
         unit_group.save()
 
-        # Helper: Bulk create units based on counts
-        def create_units(prefix, count, unit_type):
-            for i in range(1, count + 1):
-                Unit.objects.create(
-                    client=unit_group.client,
-                    name=f"{prefix} {i}",
-                    unit_type=unit_type,
-                    group=unit_group
-                )
-
-        # Create units by type
-        create_units("Apartment", unit_group.num_apartments, "apartment")
-        create_units("Duplex", unit_group.num_duplexes, "duplex")
-        create_units("House", unit_group.num_houses, "house")
-        create_units("Commercial Unit", unit_group.num_commercial_units, "commercial")
-
-        messages.success(request, "Unit group and units created successfully.")
+        # Create units by type in one transaction
+        specs = (
+            numbered_specs("Apartment", 1, unit_group.num_apartments, unit_type="apartment")
+            + numbered_specs("Duplex", 1, unit_group.num_duplexes, unit_type="duplex")
+            + numbered_specs("House", 1, unit_group.num_houses, unit_type="house")
+            + numbered_specs("Commercial Unit", 1, unit_group.num_commercial_units, unit_type="commercial")
+        )
+        jobs.enqueue(
+            'units.provision',
+            {'client_id': unit_group.client_id, 'specs': specs, 'group_id': unit_group.id},
+            priority=5, key=f"unit_group:{unit_group.id}",
+        )
+
+        messages.success(request, f"Unit group created; {len(specs)} units are being created.")
         return redirect('admin_dashboard')
 
     return render(request, 'core/create_unit_group.html', {'form': form})
+
+
+# ==========================
+# Background Jobs
+# ==========================
+
+def _units_summary(result):
+    skipped = result['skipped']  # names that already existed
+    summary = f"{result['created']} units created, {len(skipped)} skipped"
+    if skipped:
+        shown = ", ".join(skipped[:20]) + (", …" if len(skipped) > 20 else "")
+        summary += f" (already existed: {shown})"
+    return summary + "."
+
+
+def _import_summary(result):
+    if 'format_error' in result:
+        return None
+    return (
+        f"{result['rows']} rows read: {result['clients_created']} clients and "
+        f"{result['units_created']} units created, {result['units_skipped']} existing units "
+        f"skipped, {len(result['errors'])} rows with errors."
+    )
+
+
+# Job name -> (page title, summary of a finished job's result)
+JOB_DESCRIPTIONS = {
+    'units.provision': ("Creating units", _units_summary),
+    'clients.import': ("Importing clients & units", _import_summary),
+}
+
+# Row errors listed on the page; the import's CSV report has all of them
+JOB_ERRORS_SHOWN = 200
+
+
+@admin_required
+def job_status(request, job_id):
+    """
+    Progress and outcome of a background job an admin started (unit
+    creation, imports). Reloads itself until the job has finished.
+    """
+    job = get_object_or_404(Job, id=job_id)
+    title, summarize = JOB_DESCRIPTIONS.get(job.name, (job.name, None))
+    finished = job.status in (Job.DONE, Job.FAILED)
+    result = job.result if job.status == Job.DONE and job.result else {}
+    errors = result.get('errors', [])
+    return render(request, 'core/admin/job_status.html', {
+        'job': job,
+        'title': title,
+        'finished': finished,
+        'summary': summarize(result) if summarize and result else None,
+        'format_error': result.get('format_error', ''),
+        'errors': errors[:JOB_ERRORS_SHOWN],
+        'error_count': len(errors),
+        'report_url': reverse('import_error_report', args=[job.id]) if errors and job.name == 'clients.import' else '',
+        'error': job.last_error.splitlines()[0] if job.status == Job.FAILED and job.last_error else '',
+    })
@@ -1,23 +1,117 @@
+from django.conf import settings
 from django.http import JsonResponse
-from core.models import Company, Unit
+from django.contrib.auth.decorators import login_required
+from core.services.lookups import (
+    contractors_for_business_type, units_for_client, parse_paging, lookup_response
+)
+from core.pagination import keyset_paginate, parse_page_size
+from django.shortcuts import get_object_or_404
+from core.models import WorkOrder
+from core.services import dispatch, events
+from core.permissions import get_principal
+from core.views.work_order import admin_work_orders_queryset
+from core import middleware as query_profiler
 
 def get_contractors_by_business_type(request, business_type_id):
     """
     Return contractors matching the selected business type.
+    Optional GET params: q (name search), limit, offset.
     """
-    contractors = Company.objects.filter(
-        is_contractor=True,
-        business_type_id=business_type_id
-    ).order_by('name')
+    q, limit, offset = parse_paging(request.GET)
+    rows, etag = contractors_for_business_type(business_type_id, q, limit, offset)
+    return lookup_response(request, 'contractors', rows, etag, limit)
+
+def get_units_by_client(request, client_id):
+    """
+    Return the units of a client.
+    Optional GET params: q (name search), limit, offset.
+    """
+    q, limit, offset = parse_paging(request.GET)
+    rows, etag = units_for_client(client_id, q, limit, offset)
+    return lookup_response(request, 'units', rows, etag, limit)
+
+@login_required
+def admin_work_orders_api(request):
+    """
+    Keyset-paginated JSON list of all work orders (admin only).
+    Accepts the same filters as the admin list page plus `cursor` and `page_size`.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+
+    work_orders, next_cursor = keyset_paginate(
+        admin_work_orders_queryset(request.GET),
+        cursor=request.GET.get('cursor'),
+        page_size=parse_page_size(request.GET.get('page_size')),
+    )
 
     data = [
-        {'id': contractor.id, 'name': contractor.name}
-        for contractor in contractors
+        {
+            'id': order.id,
+            'title': order.title,
+            'status': order.status,
+            'priority': order.priority,
+            'created_at': order.created_at.isoformat(),
+            'created_by': order.created_by.username,
+            'assigned_contractor': (
+                order.assigned_contractor.name if order.assigned_contractor_id else None
+            ),
+        }
+        for order in work_orders
     ]
 
-    return JsonResponse({'contractors': data})
+    return JsonResponse({'work_orders': data, 'next_cursor': next_cursor})
 
-def get_units_by_client(request, client_id):
-    units = Unit.objects.filter(client_id=client_id).order_by('name')
-    data = [{'id': u.id, 'name': u.name} for u in units]
-    return JsonResponse({'units': data})
\ No newline at end of file
+
+@login_required
+def work_order_timeline_api(request, work_order_id):
+    """Event history of one work order, oldest first, with seconds spent in each status."""
+    get_object_or_404(WorkOrder.objects.only('id'), pk=work_order_id)
+    if not WorkOrder.objects.visible_to(get_principal(request)).filter(pk=work_order_id).exists():
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+
+    timeline = events.timeline(work_order_id)
+    return JsonResponse({
+        'work_order': work_order_id,
+        'events': [{**event, 'at': event['at'].isoformat()} for event in timeline],
+        'time_in_status': events.time_in_status(timeline) if timeline else {},
+    })
+
+
+@login_required
+def query_stats_api(request):
+    """
+    Per-URL-name SQL stats collected by QueryProfilerMiddleware (admin only).
+    Stats are per worker process and reset on restart.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+
+    return JsonResponse({
+        'enabled': settings.QUERY_PROFILER,
+        'views': query_profiler.summary(),
+    })
+
+
+def _int_param(params, name):
+    value = params.get(name, '')
+    return int(value) if value.isdigit() else None
+
+
+@login_required
+def dispatch_rank_api(request):
+    """
+    Contractors ranked for a new work order, best first (work order creators only).
+    GET params: business_type, client, unit (ids, all optional), limit (default 10, max 100).
+    """
+    if request.user.role not in ['admin', 'property_manager', 'assistant']:
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+
+    limit = min(_int_param(request.GET, 'limit') or 10, 100)
+    candidates = dispatch.rank(
+        _int_param(request.GET, 'business_type'),
+        _int_param(request.GET, 'client'),
+        _int_param(request.GET, 'unit'),
+        limit=limit,
+    )
+    return JsonResponse({'candidates': [candidate.as_dict() for candidate in candidates]})
@@ -2,10 +2,15 @@
 from core.decorators import admin_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.http import Http404, HttpResponse
 
 # Models and forms
-from core.models import Client, Company, CustomUser, Unit, UnitGroup
-from core.forms import ClientCreationForm
+from core.models import Client, Company, CustomUser, Job, Unit, UnitGroup
+from core.forms import ClientCreationForm, ClientUnitImportForm
+from core.services import jobs
+from core.services.importer import ImportFormatError, ImportResult, check_header, write_report
+from core.services.unit_wizard import save_wizard
+from core.storage import attachment_storage
 
 @admin_required
 def create_client(request):
@@ -19,18 +24,14 @@ def create_client(request):
         # 1. Save the client instance
         client = form.save()
 
-        # 2. Store unit creation info in the session for use in the next step
-        request.session['client_id'] = client.id
-        request.session['default_eircode'] = form.cleaned_data['default_eircode']
-        request.session['num_apartments'] = form.cleaned_data['num_apartments']
-        request.session['num_duplexes'] = form.cleaned_data['num_duplexes']
-        request.session['num_houses'] = form.cleaned_data['num_houses']
-        request.session['num_commercial_units'] = form.cleaned_data['num_commercial_units']
-        request.session['unit_contact_name'] = form.cleaned_data.get('unit_contact_name')
-        request.session['unit_contact_email'] = form.cleaned_data.get('unit_contact_email')
-        request.session['unit_contact_number'] = form.cleaned_data.get('unit_contact_number')
-
-        # 3. OPTIONAL: create UnitGroup for grouped tracking (can skip if not needed)
+        # 2. Store unit creation info in the session (one key) for the next step
+        save_wizard(request.session, client.id, form.cleaned_data)
+
+        # 3. Resolve the Eircode in the background so review_units can prefill addresses
+        if form.cleaned_data['default_eircode']:
+            jobs.enqueue('geocode.resolve', {'eircodes': [form.cleaned_data['default_eircode']]})
+
+        # 4. OPTIONAL: create UnitGroup for grouped tracking (can skip if not needed)
         UnitGroup.objects.create(
             client=client,
             num_apartments=form.cleaned_data['num_apartments'],
@@ -40,7 +41,7 @@ def create_client(request):
             created_by=request.user
         )
 
-        # 4. Redirect to unit review/confirmation page
+        # 5. Redirect to unit review/confirmation page
         messages.info(request, "Client created. Please review and confirm the units.")
         return redirect('review_units')  # This should match your URL name for the next view
 
@@ -72,4 +73,39 @@ def delete_client(request, client_id):
     client = get_object_or_404(Client, id=client_id)
     client.delete()
     messages.success(request, "Client deleted.")
-    return redirect('manage_clients')
\ No newline at end of file
+    return redirect('manage_clients')
+
+@admin_required
+def import_clients(request):
+    """
+    Admin view to bulk import clients and units from a CSV upload.
+    The header is checked here; the rows are imported by a background job
+    (core.tasks.import_clients) and the job page lists the rows with errors.
+    """
+    form = ClientUnitImportForm(request.POST or None, request.FILES or None)
+
+    if form.is_valid():
+        upload = form.cleaned_data['csv_file']
+        try:
+            check_header(upload.readline().decode('utf-8-sig'))
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            form.add_error('csv_file', str(e))
+        else:
+            # Private storage is shared by web and worker hosts; the job drops it
+            name = attachment_storage().save(upload.name, upload)
+            job = jobs.enqueue('clients.import', {'name': name}, priority=5)
+            messages.info(request, f"{upload.name} uploaded; the import is running in the background.")
+            return redirect('job_status', job_id=job.id)
+
+    return render(request, 'core/admin/import_clients.html', {'form': form})
+
+@admin_required
+def import_error_report(request, job_id):
+    """CSV of every row error of a finished import job."""
+    job = get_object_or_404(Job, id=job_id, name='clients.import', status=Job.DONE)
+    if 'errors' not in (job.result or {}):
+        raise Http404("This import has no error report.")
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="import-{job.id}-errors.csv"'
+    write_report(ImportResult.from_dict(job.result), response)
+    return response
@@ -3,35 +3,35 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.db.models import Q
 from django.http import HttpResponseForbidden
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from core.models import DailyWorkOrderStats, ReportWatermark
 from core.models.work_order import WorkOrder
-from core.models import CustomUser, Company, Client
+from core.counters import get_entity_counts, get_work_order_counts
+from core.permissions import get_principal
+from core.services.lookups import company_card
+from core.services.work_queue import contractor_queue
+from core.services.reporting import DIMENSIONS, WATERMARK_NAME, sla_report
+from core.decorators import admin_required
+
+REPORT_DEFAULT_DAYS = 30
 
 # --- Admin Dashboard ---
 @login_required
 def admin_dashboard(request):
-    # Work Orders
-    open_work_count = WorkOrder.objects.filter(status__in=['new', 'assigned']).count()
-    in_progress_count = WorkOrder.objects.filter(status='accepted').count()
-    completed_work_count = WorkOrder.objects.filter(status='completed').count()
-
-    # Users
-    users = CustomUser.objects.all()
+    # Work Orders: all status buckets in one conditional-aggregation query (cached)
+    work_counts = get_work_order_counts()
 
-    # Companies
-    managers = Company.objects.filter(is_property_manager=True) 
-    contractors = Company.objects.filter(is_contractor=True)
-
-    # Clients
-    clients = Client.objects.all()
+    # Users, companies and clients: cached, invalidated by signals
+    entity_counts = get_entity_counts()
 
     return render(request, 'core/admin/admin_dashboard.html', {
-        'open_work_count': open_work_count,
-        'in_progress_count': in_progress_count,
-        'completed_work_count': completed_work_count,
-        'users': users,
-        'managers': managers,
-        'contractors': contractors,
-        'clients': clients,
+        **work_counts,
+        'user_count': entity_counts['users'],
+        'manager_count': entity_counts['managers'],
+        'contractor_count': entity_counts['contractors'],
+        'client_count': entity_counts['clients'],
     })
 
 
@@ -50,19 +50,41 @@ def assistant_dashboard(request):
 # --- Contractor Dashboard ---
 @login_required
 def contractor_dashboard(request):
-    contractor = request.user.company
-    
-    active_work_orders = WorkOrder.objects.filter(
-        Q(status='new', preferred_contractor=contractor) |
-        Q(status='new', second_contractor=contractor) |
-        Q(status='accepted', assigned_contractor=contractor)
-    ).exclude(status='completed').order_by('due_date')
+    company_id = get_principal(request).company_id
 
-    print("Active Work Orders:", active_work_orders)
+    # Denormalized queue: one index range scan, only the rendered fields
+    active_work_orders = contractor_queue(company_id)
 
     return render(request, 'core/contractor/contractor_dashboard.html', {
-        'company': contractor,
+        'company': company_card(company_id),  # cached; no Company query per page view
         'work_orders': active_work_orders
     })
 
 
+# --- SLA / Contractor Performance Report (Admin) ---
+def _date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:  # well-formed but impossible, e.g. 2025-02-30
+        return None
+
+
+@admin_required
+def sla_report_view(request):
+    """Turnaround and rejection figures per contractor / business type / client / priority, from the daily rollups."""
+    end = _date_param(request, 'end') or timezone.localdate()
+    start = _date_param(request, 'start') or end - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    group_by = request.GET.get('group_by')
+    if group_by not in DIMENSIONS:
+        group_by = 'contractor'
+
+    rows, totals = sla_report(start, end, group_by)
+    return render(request, 'core/admin/sla_report.html', {
+        'rows': rows,
+        'totals': totals,
+        'start': start,
+        'end': end,
+        'group_by': group_by,
+        'groupings': DailyWorkOrderStats.DIMENSION_CHOICES,
+        'watermark': ReportWatermark.objects.filter(name=WATERMARK_NAME).first(),
+    })
@@ -1,28 +1,35 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.forms import modelformset_factory, modelformset_factory
-from django.conf import settings
+from django.core.paginator import Paginator
+from django.forms import modelformset_factory
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
-import requests
 
 from core.forms import UnitForm, UnitGeneratorForm
 from core.models import Unit, Client
+from core.services import jobs
+from core.services.units import (
+    UNIT_SPEC_FIELDS, provision_units, numbered_specs, apply_unit_edits, unit_row_hash,
+)
+from core.services.geocoding import cached_address
+from core.services.unit_wizard import UNIT_COUNTS, clear_wizard, load_wizard
 
 
 # --------------------------
 # Formsets
 # --------------------------
-UnitFormSet = modelformset_factory(
-    Unit,
-    form=UnitForm,
-    fields=[
-        'name', 'unit_type', 'eircode', 'street', 'city', 'county',
-        'unit_contact_name', 'unit_contact_email', 'unit_contact_number'
-    ],
-    extra=0,
-    can_delete=True
-)
+def unit_formset(extra=0):
+    """Formset for new units only (never bound to existing Unit rows)."""
+    return modelformset_factory(
+        Unit,
+        form=UnitForm,
+        fields=[
+            'name', 'unit_type', 'eircode', 'street', 'city', 'county',
+            'unit_contact_name', 'unit_contact_email', 'unit_contact_number'
+        ],
+        extra=extra,
+        can_delete=True
+    )
 
 # --------------------------
 # Views
@@ -30,62 +37,52 @@ UnitFormSet = modelformset_factory(
 
 def review_units(request):
     """Review and confirm bulk unit creation via formset. Uses session data to prepopulate."""
-    client_id = request.session.get('client_id')
-    eircode = request.session.get('default_eircode', '')
+    wizard = load_wizard(request.session)
 
-    if not client_id:
+    if not wizard:
         messages.error(request, "Session expired. Please re-create the client.")
         return redirect('create_client')
 
-    address_data = google_address_lookup(eircode) if eircode else {'street': '', 'city': '', 'county': ''}
-    contact_name = request.session.get('unit_contact_name', '')
-    contact_email = request.session.get('unit_contact_email', '')
-    contact_number = request.session.get('unit_contact_number', '')
-
     if request.method == 'GET':
-        initial = []
-
-        def generate(unit_type, count, prefix):
-            for i in range(count):
-                initial.append({
-                    'unit_number': f"{prefix} {i + 1}",
-                    'unit_type': unit_type,
-                    'eircode': eircode,
-                    'street': address_data.get('street', ''),
-                    'city': address_data.get('city', ''),
-                    'county': address_data.get('county', ''),
-                    'unit_contact_name': contact_name,
-                    'unit_contact_email': contact_email,
-                    'unit_contact_number': contact_number,
-                })
-
-        generate('apartment', request.session.get('num_apartments', 0), 'Apartment')
-        generate('duplex', request.session.get('num_duplexes', 0), 'Duplex')
-        generate('house', request.session.get('num_houses', 0), 'House')
-        generate('commercial', request.session.get('num_commercial_units', 0), 'Commercial')
-
-        formset = UnitFormSet(initial=initial)
+        eircode = wizard['default_eircode']
+        # Filled by the geocode job create_client queued; blanks are resolved by the provisioning job
+        address_data = cached_address(eircode)
+        initial = [
+            {
+                'name': f"{prefix} {i + 1}",
+                'unit_type': unit_type,
+                'eircode': eircode,
+                'street': address_data.get('street', ''),
+                'city': address_data.get('city', ''),
+                'county': address_data.get('county', ''),
+                'unit_contact_name': wizard['unit_contact_name'],
+                'unit_contact_email': wizard['unit_contact_email'],
+                'unit_contact_number': wizard['unit_contact_number'],
+            }
+            for unit_type, count_field, prefix in UNIT_COUNTS
+            for i in range(wizard[count_field])
+        ]
+
+        formset = unit_formset(extra=len(initial))(queryset=Unit.objects.none(), initial=initial)
         return render(request, 'core/admin/review_units.html', {'formset': formset})
 
     else:
-        formset = UnitFormSet(request.POST)
+        formset = unit_formset()(request.POST, queryset=Unit.objects.none())
         if formset.is_valid():
-            client = get_object_or_404(Client, id=client_id)
-            for form in formset:
-                Unit.objects.create(
-                    client=client,
-                    name=form.cleaned_data['unit_number'],
-                    unit_type=form.cleaned_data['unit_type'],
-                    eircode=form.cleaned_data['eircode'],
-                    street=form.cleaned_data['street'],
-                    city=form.cleaned_data['city'],
-                    county=form.cleaned_data['county'],
-                    unit_contact_name=form.cleaned_data['unit_contact_name'],
-                    unit_contact_email=form.cleaned_data['unit_contact_email'],
-                    unit_contact_number=form.cleaned_data['unit_contact_number'],
-                )
-            messages.success(request, "Units created successfully.")
-            return redirect('manage_clients')
+            client = get_object_or_404(Client, id=wizard['client_id'])
+            specs = [
+                {name: data.get(name) for name in UNIT_SPEC_FIELDS}
+                for data in formset.cleaned_data
+                if data and not data.get('DELETE')
+            ]
+            # Keyed by client: a double submit of the review page queues one job
+            job = jobs.enqueue(
+                'units.provision', {'client_id': client.id, 'specs': specs},
+                priority=5, key=f"review_units:{client.id}",
+            )
+            clear_wizard(request.session)
+            messages.success(request, f"{len(specs)} units are being created for {client.name}.")
+            return redirect('job_status', job_id=job.id)  # shows the created/skipped counts
 
         return render(request, 'core/admin/review_units.html', {'formset': formset})
 
@@ -110,19 +107,17 @@ def unit_generator(request):
             start = form.cleaned_data['start']
             end = form.cleaned_data['end']
 
-            existing_names = set(Unit.objects.filter(client=client).values_list('name', flat=True))
-            created = 0
-
-            for i in range(start, end + 1):
-                name = f"{prefix} {i}"
-                if name not in existing_names:
-                    Unit.objects.create(client=client, name=name)
-                    created += 1
-                else:
-                    messages.warning(request, f"Skipped duplicate unit: {name}")
-
-            messages.success(request, f"{created} units created for {client.name}.")
-            return redirect('manage_clients')
+            # Existing names are skipped by the job (provision_units)
+            job = jobs.enqueue(
+                'units.provision',
+                {'client_id': client.id, 'specs': numbered_specs(prefix, start, end)},
+                priority=5,
+            )
+            messages.success(
+                request, f"{end - start + 1} units are being created for {client.name}; "
+                         "names that already exist will be skipped."
+            )
+            return redirect('job_status', job_id=job.id)  # shows the created/skipped counts
     else:
         form = UnitGeneratorForm(initial=initial)
 
@@ -142,107 +137,99 @@ def delete_unit(request, unit_id):
     return redirect('review_units')
 
 
+# Units per page in the client_units editor
+UNITS_PER_PAGE = 50
+
+
 @login_required
 def client_units(request, client_id):
+    """
+    Paginated unit editor. Every row posts a hidden `row` id and the hash
+    of the values it was rendered with; edit_units.js drops unchanged rows
+    before submitting, and anything that still arrives unchanged is skipped
+    here, so saving one edit touches one row.
+    """
     client = get_object_or_404(Client, id=client_id)
-    units = client.unit_set.all()
+    query = request.GET.get('q', '').strip()
 
-    UnitInlineFormSet = modelformset_factory(
-        Unit,
-        fields=[
-            'name', 'unit_type', 'eircode', 'street', 'city', 'county',
-            'unit_contact_name', 'unit_contact_email', 'unit_contact_number'
-        ],
-        extra=1,
-        can_delete=True
-    )
+    units = client.unit_set.order_by('name', 'id')
+    if query:
+        units = units.filter(name__icontains=query)
 
     if request.method == 'POST':
-        formset = UnitInlineFormSet(request.POST, queryset=Unit.objects.filter(client=client))
-
-        if formset.is_valid():
-            action = request.POST.get('action')
-
-            if action == 'delete':
-                formset.save()  # Required to process deletions
-
-                deleted_count = 0
-                for obj in formset.deleted_objects:
-                    if obj.id:
-                        print(f"Deleting unit: {obj.name}")
-                        obj.delete()
-                        deleted_count += 1
-
-                messages.success(request, f"{deleted_count} unit(s) deleted successfully.")
-                return redirect('client_units', client_id=client.id)
-
-
-
-            elif action == 'save':
-                instances = formset.save(commit=False)
-                for unit in instances:
-                    unit.client = client
-                    unit.save()
-                formset.save_m2m()
-                messages.success(request, "Units updated successfully.")
-                return redirect('client_units', client_id=client.id)
-
-        else:
-            messages.error(request, "There was a problem processing the form.")
-
-
+        action = request.POST.get('action')
+
+        if action == 'delete':
+            delete_ids = [int(pk) for pk in request.POST.getlist('delete') if pk.isdigit()]
+            result = apply_unit_edits(client, [], delete_ids)
+            if result.protected:
+                messages.warning(
+                    request,
+                    f"{len(result.protected)} unit(s) are used by work orders and were kept: "
+                    + ", ".join(result.protected[:10])
+                )
+            messages.success(request, f"{result.deleted} unit(s) deleted successfully.")
+            return redirect(request.get_full_path())
+
+        if action == 'save':
+            row_ids = [int(pk) for pk in request.POST.getlist('row') if pk.isdigit()]
+            posted = {unit.id: unit for unit in Unit.objects.filter(client=client, id__in=row_ids)}
+
+            edits, invalid = [], []
+            for unit_id, unit in posted.items():
+                prefix = f"u-{unit_id}"
+                form = UnitForm(request.POST, prefix=prefix, instance=unit)
+                if not form.has_changed():
+                    continue
+                if form.is_valid():
+                    edits.append((form.instance, request.POST.get(f"{prefix}-hash", '')))
+                else:
+                    invalid.append(unit.name)
+
+            # The blank "add a unit" row only counts once it has a name
+            new_form = UnitForm(request.POST, prefix='new')
+            wants_new = bool(request.POST.get('new-name', '').strip())
+            new_unit = wants_new and new_form.is_valid()
+            if wants_new and not new_unit:
+                invalid.append("new unit")
+
+            if invalid:
+                messages.error(request, "Please fix the errors in: " + ", ".join(invalid[:10]))
+            else:
+                result = apply_unit_edits(client, edits)
+                created = provision_units(client, [new_form.cleaned_data]).created if new_unit else 0
+                if result.conflicts:
+                    messages.warning(
+                        request,
+                        "These units were changed by someone else and were not saved: "
+                        + ", ".join(result.conflicts[:10])
+                    )
+                messages.success(
+                    request,
+                    f"{result.updated} unit(s) updated" + (f", {created} added." if created else ".")
+                )
+                return redirect(request.get_full_path())
 
+    page_obj = Paginator(units, UNITS_PER_PAGE).get_page(request.GET.get('page'))
+    rows = [
+        (unit, UnitForm(instance=unit, prefix=f"u-{unit.id}"), unit_row_hash(unit))
+        for unit in page_obj.object_list
+    ]
+    if request.method == 'POST':
+        # Re-render the posted values (with their errors) for the rows that were sent
+        rows = [
+            (unit, UnitForm(request.POST, instance=unit, prefix=f"u-{unit.id}")
+             if str(unit.id) in request.POST.getlist('row') else form, row_hash)
+            for unit, form, row_hash in rows
+        ]
+        new_form = UnitForm(request.POST, prefix='new')
     else:
-        formset = UnitInlineFormSet(queryset=units)
+        new_form = UnitForm(prefix='new')
 
     return render(request, 'core/admin/client_units.html', {
         'client': client,
-        'formset': formset
+        'rows': rows,
+        'new_form': new_form,
+        'page_obj': page_obj,
+        'query': query,
     })
-
-
-
-# --------------------------
-# External: Google Eircode Lookup
-# --------------------------
-
-def google_address_lookup(eircode):
-    """
-    Uses Google Maps Geocoding API to fetch address components based on Eircode.
-    """
-    base_url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {"address": eircode, "key": settings.GOOGLE_MAPS_API_KEY}
-
-    try:
-        response = requests.get(base_url, params=params)
-        data = response.json()
-
-        if data.get("status") == "OK":
-            result = data["results"][0]
-            components = result.get("address_components", [])
-            formatted = result.get("formatted_address", "")
-            street = city = county = ""
-
-            for comp in components:
-                if "route" in comp["types"] or "premise" in comp["types"]:
-                    street = comp["long_name"]
-                elif "locality" in comp["types"] and not city:
-                    city = comp["long_name"]
-                elif "administrative_area_level_1" in comp["types"]:
-                    county = comp["long_name"]
-
-            if not street and formatted:
-                parts = formatted.split(",")
-                if parts:
-                    street = parts[0].strip()
-
-            return {
-                "street": street or "Unknown Street",
-                "city": city or "Unknown City",
-                "county": county or "Unknown County"
-            }
-
-    except Exception as e:
-        print("Geocoding failed:", e)
-
-    return {'street': '', 'city': '', 'county': ''}
@@ -1,14 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.utils import timezone
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import Http404, JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db import transaction
 from django.views.decorators.http import require_POST
 from core.decorators import contractor_required
-from core.models import WorkOrder, Unit, Company
+from core.permissions import get_principal, work_order_company_ids
+from core.models import WorkOrder, Unit, Company, Client
 from core.forms import WorkOrderForm
+from core.models.work_order import WorkOrderStatus, PRIORITY_CHOICES
+from core.pagination import keyset_paginate, parse_page_size
+from core.services.lookups import units_for_client, contractor_choices, parse_paging, lookup_response
+from core.services.search import search_work_orders
+from core.services.export import export_rows, stream_csv, stream_xlsx
+from core.services.attachments import attachment_response
+from core.services import events, notifications, workflow
 from django.urls import reverse
+from django.core.paginator import Paginator
+from django.utils import timezone
 
 # -------------------------------
 # Create Work Order (PM/Admin/Assistant)
@@ -24,15 +33,24 @@ def create_work_order(request):
             work_order = form.save(commit=False)
             work_order.created_by = request.user
             work_order.status = 'new'
-            work_order.save()
+            with transaction.atomic():
+                work_order.save()
+                workflow.extend_candidates(work_order, form.extra_candidate_ids())
+                events.record(work_order.id, 'created', work_order.status,
+                              actor=request.user, company_id=request.user.company_id)
+                notifications.notify(work_order, 'created', actor=request.user)
             messages.success(request, "Work order created successfully.")
             return redirect('redirect_after_login')
     else:
         form = WorkOrderForm()
 
-    contractors = Company.objects.filter(is_contractor=True)
-    form.fields['preferred_contractor'].queryset = contractors
-    form.fields['second_contractor'].queryset = contractors
+    # A re-rendered POST keeps the form's dispatch-ranked choices for its business type
+    if not form.data.get('business_type'):
+        contractors = Company.objects.filter(is_contractor=True)
+        choices = [('', '---------')] + contractor_choices()
+        for name in ('preferred_contractor', 'second_contractor'):
+            form.fields[name].queryset = contractors
+            form.fields[name].widget.choices = choices  # rendered from the shared cache
 
     return render(request, 'core/create_work_order.html', {'form': form})
 
@@ -42,18 +60,14 @@ def create_work_order(request):
 # -------------------------------
 @login_required
 def my_work_orders(request):
-    user = request.user
-
-    if user.role == 'property_manager':
-        work_orders = WorkOrder.objects.filter(created_by=user)
+    principal = get_principal(request)
+    work_orders = WorkOrder.objects.visible_to(principal)
 
-    elif user.role == 'assistant':
-        work_orders = WorkOrder.objects.filter(created_by=user)
+    if principal.role == 'contractor':
+        # Contractors list what they are working on, not every invitation
+        work_orders = work_orders.filter(assigned_contractor_id=principal.company_id)
 
-    elif user.role == 'contractor':
-        work_orders = WorkOrder.objects.filter(assigned_contractor=user.company)
-
-    else:
+    elif principal.role not in ('property_manager', 'assistant'):
         return HttpResponseForbidden("Not allowed")
 
     return render(request, 'core/my_work_orders.html', {'work_orders': work_orders})
@@ -63,23 +77,21 @@ def my_work_orders(request):
 # -------------------------------
 # Contractor accepts a work order
 # -------------------------------
-@login_required
+@contractor_required
 @require_POST
 def accept_work_order(request, work_order_id):
     order = get_object_or_404(WorkOrder, pk=work_order_id)
+    principal = get_principal(request)
 
-    if request.user.role != 'contractor' or not request.user.company:
-        return HttpResponseForbidden("Not allowed")
-
-    contractor_company = request.user.company
-    if contractor_company not in [order.preferred_contractor, order.second_contractor]:
+    if not principal.in_company(*work_order_company_ids(order)):
         return HttpResponseForbidden("Not authorized for this order.")
+    contractor_id = principal.company_id
 
-    order.status = 'accepted'
-    order.assigned_contractor = contractor_company
-    order.save()
-
-    messages.success(request, "Work order accepted.")
+    # Conditional UPDATE: exactly one contractor can win a race to accept
+    if workflow.accept(order.id, contractor_id, request.user):
+        messages.success(request, "Work order accepted.")
+    else:
+        messages.error(request, "This work order is no longer available to accept.")
     return redirect('view_work_order_detail', work_order_id=order.id)
 
 # -------------------------------
@@ -89,22 +101,17 @@ def accept_work_order(request, work_order_id):
 @require_POST
 def reject_work_order(request, work_order_id):
     work_order = get_object_or_404(WorkOrder, id=work_order_id)
-    contractor_company = request.user.company
+    principal = get_principal(request)
 
-    if contractor_company not in [work_order.preferred_contractor, work_order.second_contractor]:
+    if not principal.in_company(*work_order_company_ids(work_order)):
         return HttpResponseForbidden("Not authorized to reject this work order.")
+    contractor_id = principal.company_id
 
-    # keep your existing “return/assign second contractor” logic
-    if work_order.status in ['new', 'assigned']:
-        if contractor_company == work_order.preferred_contractor and work_order.second_contractor:
-            work_order.assigned_contractor = work_order.second_contractor
-            work_order.status = 'assigned'
-        else:
-            work_order.assigned_contractor = None
-            work_order.status = 'returned'
-        work_order.save(update_fields=['assigned_contractor', 'status'])
-
-    messages.success(request, "You have rejected the work order.")
+    # Passes the order to the second contractor, or returns it to the creator
+    if workflow.reject(work_order.id, contractor_id, request.user):
+        messages.success(request, "You have rejected the work order.")
+    else:
+        messages.error(request, "This work order can no longer be rejected.")
     return redirect('view_work_order_detail', work_order_id=work_order.id)
 
 
@@ -112,9 +119,9 @@ def reject_work_order(request, work_order_id):
 @require_POST
 def complete_work_order(request, work_order_id):
     work_order = get_object_or_404(WorkOrder, id=work_order_id)
-    contractor = request.user.company
+    contractor_id = get_principal(request).company_id
 
-    if work_order.status != 'accepted' or work_order.assigned_contractor != contractor:
+    if not workflow.can_apply('complete', work_order, contractor_id):
         return HttpResponseForbidden("You are not authorized to complete this work order.")
 
     uploaded_file = request.FILES.get('file')
@@ -124,13 +131,10 @@ def complete_work_order(request, work_order_id):
         messages.error(request, "Both file and notes are required.")
         return redirect('view_work_order_detail', work_order_id=work_order.id)
 
-    work_order.attachment = uploaded_file
-    work_order.completion_notes = notes
-    work_order.completed_at = timezone.now()
-    work_order.status = 'completed'
-    work_order.save()
-
-    messages.success(request, "Work order marked as completed.")
+    if workflow.complete(work_order.id, contractor_id, notes, uploaded_file, request.user):
+        messages.success(request, "Work order marked as completed.")
+    else:
+        messages.error(request, "This work order can no longer be completed.")
     return redirect('view_work_order_detail', work_order_id=work_order.id)
 
 # -------------------------------
@@ -141,38 +145,38 @@ def load_units_for_client(request):
     client_id = request.GET.get('client_id')
     if not client_id:
         return JsonResponse({'error': 'Missing client ID'}, status=400)
-    
-    units = Unit.objects.filter(client_id=client_id).order_by('name')
-    unit_list = [{'id': unit.id, 'name': unit.name} for unit in units]
-    return JsonResponse({'units': unit_list})
+
+    # Same cached lookup as /api/units/<client_id>/
+    q, limit, offset = parse_paging(request.GET)
+    rows, etag = units_for_client(client_id, q, limit, offset)
+    return lookup_response(request, 'units', rows, etag, limit)
 
 
 # -------------------------------
 # View details of a specific work order
 # -------------------------------
-@login_required
-def view_work_order_detail(request, work_order_id):
-    order = get_object_or_404(WorkOrder, id=work_order_id)
+def _visible_order(principal, work_order_id, queryset):
+    """
+    The order from `queryset` if `principal` may see it, else None (Not
+    allowed). Raises Http404 if there is no such order at all.
+    """
+    order = queryset.visible_to(principal).filter(id=work_order_id).first()
+    if order is None and not WorkOrder.objects.filter(id=work_order_id).exists():
+        raise Http404("No WorkOrder matches the given query.")
+    return order
 
-    user = request.user
-    role = getattr(user, "role", "")
-    company = getattr(user, "company", None)
 
-    # --- Authorization ---
-    if role == "admin":
-        allowed = True
-    else:
-        allowed = (
-            order.created_by_id == user.id
-            or (
-                company is not None
-                and company in [order.preferred_contractor,
-                                order.second_contractor,
-                                order.assigned_contractor]
-            )
-        )
-
-    if not allowed:
+@login_required
+def view_work_order_detail(request, work_order_id):
+    principal = get_principal(request)
+    role = principal.role
+
+    # --- Authorization: fetch through the visibility scope (everything the template shows, in one query) ---
+    order = _visible_order(principal, work_order_id, WorkOrder.objects.select_related(
+        'created_by', 'client', 'unit',
+        'preferred_contractor', 'second_contractor', 'assigned_contractor',
+    ))
+    if order is None:
         return HttpResponseForbidden("Not allowed")
 
     # --- Role-aware back URL ---
@@ -185,19 +189,19 @@ def view_work_order_detail(request, work_order_id):
     else:
         back_url = reverse("redirect_after_login")
 
-    # --- Contractor-only action flags (unchanged logic) ---
+    # --- Contractor-only action flags (same rules as the transitions) ---
     can_accept_or_reject = (
         role == 'contractor'
-        and order.status == 'new'
-        and company in [order.preferred_contractor, order.second_contractor]
+        and workflow.can_apply('accept', order, principal.company_id)
     )
 
     can_mark_complete = (
         role == 'contractor'
-        and order.status == 'accepted'
-        and order.assigned_contractor == company
+        and workflow.can_apply('complete', order, principal.company_id)
     )
 
+    timeline = events.timeline(order.id)
+
     return render(
         request,
         'core/work_order_detail.html',  # keep your existing template
@@ -206,19 +210,130 @@ def view_work_order_detail(request, work_order_id):
             'can_accept_or_reject': can_accept_or_reject,
             'can_mark_complete': can_mark_complete,
             'back_url': back_url,   # <-- use this in the template
+            'timeline': timeline,
+            'time_in_status': events.time_in_status(timeline) if timeline else {},
         }
     )
 
+# -------------------------------
+# Download a work order's attachment (same visibility as the detail page)
+# -------------------------------
+@login_required
+def download_work_order_attachment(request, work_order_id):
+    order = _visible_order(
+        get_principal(request), work_order_id,
+        WorkOrder.objects.only('id', 'attachment', 'attachment_name'),
+    )
+    if order is None:
+        return HttpResponseForbidden("Not allowed")
+    if not order.attachment:
+        raise Http404("This work order has no attachment.")
+
+    filename = order.attachment_name or f"work-order-{order.id}-attachment"
+    return attachment_response(request, order.attachment, filename,
+                               as_attachment='download' in request.GET)
+
+
+# -------------------------------
+# Admin: list of all work orders
+# -------------------------------
+# Only the columns work_orders_list.html renders; related names come in via JOINs.
+ADMIN_LIST_FIELDS = (
+    'id', 'title', 'status', 'priority', 'created_at',
+    'created_by__username', 'created_by__role',
+    'assigned_contractor__name',
+)
+
+# The workflow views store lowercase status names ('new', 'accepted', ...)
+STATUS_FILTER_CHOICES = [(status.name.lower(), status.value) for status in WorkOrderStatus]
+
+
+def admin_work_orders_queryset(params):
+    """
+    Build the admin work order queryset from GET params
+    (status, priority, client, contractor).
+    """
+    return filter_work_orders(
+        WorkOrder.objects
+        .select_related('created_by', 'assigned_contractor')
+        .only(*ADMIN_LIST_FIELDS),
+        params,
+    )
+
+
+def filter_work_orders(work_orders, params):
+    """Apply the list filters (status, priority, client, contractor) from GET params."""
+    status = params.get('status', '')
+    if status:
+        work_orders = work_orders.filter(status=status)
+
+    priority = params.get('priority', '')
+    if priority:
+        work_orders = work_orders.filter(priority=priority)
+
+    client_id = params.get('client', '')
+    if client_id.isdigit():
+        work_orders = work_orders.filter(client_id=client_id)
+
+    contractor_id = params.get('contractor', '')
+    if contractor_id.isdigit():
+        work_orders = work_orders.filter(assigned_contractor_id=contractor_id)
+
+    return work_orders
+
+
 @login_required
 def admin_work_orders_view(request):
     if not request.user.role == 'admin':
         return redirect('dashboard') 
 
-    work_orders = WorkOrder.objects.all().order_by('-created_at')
+    work_orders, next_cursor = keyset_paginate(
+        admin_work_orders_queryset(request.GET),
+        cursor=request.GET.get('cursor'),
+        page_size=parse_page_size(request.GET.get('page_size')),
+    )
+
+    # Keep the active filters when following the "next page" link
+    filters = request.GET.copy()
+    filters.pop('cursor', None)
+
     return render(request, 'core/admin/work_orders_list.html', {
-        'work_orders': work_orders
+        'work_orders': work_orders,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'filter_query': filters.urlencode(),
+        'filters': request.GET,
+        'status_choices': STATUS_FILTER_CHOICES,
+        'priority_choices': PRIORITY_CHOICES,
+        'clients': Client.objects.order_by('name').values_list('id', 'name'),
+        'contractors': Company.objects.filter(is_contractor=True).order_by('name').values_list('id', 'name'),
     })
 
+# -------------------------------
+# Export (CSV / XLSX), streamed
+# -------------------------------
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
+
+
+@login_required
+def export_work_orders(request):
+    scope = WorkOrder.objects.visible_to(get_principal(request))
+
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Unsupported export format.")
+    content_type, stream = EXPORT_FORMATS[file_format]
+
+    rows = export_rows(filter_work_orders(scope, request.GET))
+    response = StreamingHttpResponse(stream(rows), content_type=content_type)
+    filename = f"work-orders-{timezone.localdate():%Y%m%d}.{file_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # -------------------------------
 # Contractor: View assigned work orders
 # -------------------------------
@@ -227,28 +342,26 @@ def my_contractor_orders(request):
     if request.user.role != 'contractor':
         return HttpResponseForbidden("Not allowed")
     
-    contractor_company = request.user.company
+    principal = get_principal(request)
     query = request.GET.get('q', '')
     status_filter = request.GET.get('status', '')
 
     # Only show accepted, rejected, or completed work orders assigned to this contractor
-    assigned_orders = WorkOrder.objects.filter(
-        assigned_contractor=contractor_company,
+    assigned_orders = WorkOrder.objects.visible_to(principal).filter(
+        assigned_contractor_id=principal.company_id,
         status__in=['accepted', 'rejected', 'completed']
     )
 
-    # Apply search
-    if query:
-        assigned_orders = assigned_orders.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )
-
     # Apply status filter
     VALID_STATUSES = ['accepted', 'rejected', 'completed']
     if status_filter in VALID_STATUSES:
         assigned_orders = assigned_orders.filter(status=status_filter)
 
-    assigned_orders = assigned_orders.order_by('-created_at')
+    # Apply search (ranked full-text) or default to newest first
+    if query:
+        assigned_orders = search_work_orders(assigned_orders, query)
+    else:
+        assigned_orders = assigned_orders.order_by('-created_at')
 
     return render(request, 'core/contractor/my_work_orders.html', {
         'work_orders': assigned_orders,
@@ -257,3 +370,24 @@ def my_contractor_orders(request):
     })
 
 
+# -------------------------------
+# Full-text search (admins, PMs/assistants, contractors)
+# -------------------------------
+@login_required
+def search_work_orders_view(request):
+    query = request.GET.get('q', '').strip()
+
+    results = WorkOrder.objects.none()
+    if query:
+        results = search_work_orders(
+            WorkOrder.objects.visible_to(get_principal(request)).select_related('client', 'unit'),
+            query,
+        )
+
+    page_obj = Paginator(results, 25).get_page(request.GET.get('page'))
+
+    return render(request, 'core/work_order_search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'work_orders': page_obj.object_list,
+    })
@@ -11,6 +11,8 @@ Tip: never commit .env or SECRET_KEY.
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 
 from dotenv import load_dotenv
 import dj_database_url
@@ -26,10 +28,19 @@ load_dotenv(BASE_DIR / ".env")
 #
 # Default (dev): console backend prints emails to the terminal.
 # To use SMTP in prod, set the EMAIL_* env vars in your hosting dashboard.
+# EMAIL_BACKEND also accepts the short names console / file / locmem / smtp;
+# "file" writes one .log file per connection under EMAIL_FILE_PATH.
 # ---------------------------------------------------------------------
-EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+_EMAIL_BACKENDS = {
+    "console": "django.core.mail.backends.console.EmailBackend",
+    "file": "django.core.mail.backends.filebased.EmailBackend",
+    "locmem": "django.core.mail.backends.locmem.EmailBackend",
+    "smtp": "django.core.mail.backends.smtp.EmailBackend",
+}
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "console").strip()
+EMAIL_BACKEND = _EMAIL_BACKENDS.get(EMAIL_BACKEND, EMAIL_BACKEND)
 
-EMAIL_FILE_PATH = BASE_DIR / "tmp" / "emails"
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", "") or BASE_DIR / "tmp" / "emails"
 
 
 # These are only used when EMAIL_BACKEND is SMTP
@@ -115,6 +126,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Opt-in SQL profiler: query count/time per request, N+1 detection,
+# Server-Timing headers and per-URL stats at /api/query-stats/.
+QUERY_PROFILER = os.getenv("QUERY_PROFILER", "false").strip().lower() == "true"
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_PROFILER_N_PLUS_ONE_THRESHOLD", "5"))
+if QUERY_PROFILER:
+    MIDDLEWARE.insert(0, "core.middleware.QueryProfilerMiddleware")
+
 # ---------------------------------------------------------------------
 # URLs / Templates / WSGI
 # ---------------------------------------------------------------------
@@ -180,6 +198,62 @@ else:
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
         }
+
+# ---------------------------------------------------------------------
+# Cache
+#   CACHE_URL picks the backend shared by all workers:
+#     redis://host:6379/0  (or rediss://)  -> Redis (needs the `redis` package)
+#     db://cache_table                     -> database table (run createcachetable)
+#     file:///var/tmp/worklogix-cache      -> files on local disk
+#     locmem://                            -> per-process memory
+#   Unset: LocMem under `manage.py test`, otherwise a file cache in the
+#   temp dir, so local gunicorn workers still share cached counts.
+#   Cached keys are versioned per model, see core/caching.py.
+# ---------------------------------------------------------------------
+def _cache_from_url(url):
+    scheme, _, rest = url.partition("://")
+    scheme = scheme.lower()
+    if scheme in ("redis", "rediss"):
+        return {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    if scheme == "db":
+        return {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": rest or "cache_table"}
+    if scheme == "file":
+        return {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": rest}
+    if scheme == "locmem":
+        return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": rest or "worklogix"}
+    raise ValueError(f"Unsupported CACHE_URL scheme: {scheme!r}")
+
+
+CACHE_URL = os.getenv("CACHE_URL", "").strip()
+if not CACHE_URL:
+    CACHE_URL = "locmem://" if "test" in sys.argv[1:2] else "file://" + os.path.join(tempfile.gettempdir(), "worklogix-cache")
+
+CACHES = {
+    "default": {
+        **_cache_from_url(CACHE_URL),
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "worklogix"),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "3600")),
+    }
+}
+
+# ---------------------------------------------------------------------
+# Sessions
+#   SESSION_ENGINE: cached_db (default) reads sessions from the cache above
+#   and only falls back to the django_session table on a miss; "db",
+#   "cache" (no table at all, needs Redis) and "signed_cookies" (no
+#   server-side storage) are also accepted, as is a full module path.
+#   Expired rows: `python manage.py clear_expired_sessions` (daily cron).
+# ---------------------------------------------------------------------
+_SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "cached_db").strip()
+SESSION_ENGINE = _SESSION_ENGINES.get(SESSION_ENGINE, SESSION_ENGINE)
+SESSION_COOKIE_AGE = int(os.getenv("SESSION_COOKIE_AGE", str(60 * 60 * 24 * 14)))  # seconds (2 weeks)
+
 # ---------------------------------------------------------------------
 # Password validation (kept default)
 # ---------------------------------------------------------------------
@@ -216,6 +290,53 @@ STORAGES = {
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# ---------------------------------------------------------------------
+# Work order attachments (core/storage.py)
+#   Stored once per distinct content (SHA-256), reference counted, and
+#   only served by the permission-checked download view. ATTACHMENT_STORAGE
+#   picks where the files live:
+#     file    -> ATTACHMENT_ROOT on local disk (default; outside MEDIA_ROOT)
+#     s3      -> an S3-compatible bucket (needs `django-storages[s3]`);
+#                AWS_S3_ENDPOINT_URL points it at MinIO or another stand-in
+#     memory  -> process memory (default under `manage.py test`)
+#   ATTACHMENT_SENDFILE hands downloads from disk to the web server:
+#     x-accel-redirect (nginx, internal location ATTACHMENT_SENDFILE_PREFIX)
+#     x-sendfile       (Apache mod_xsendfile, lighttpd)
+# ---------------------------------------------------------------------
+ATTACHMENT_ROOT = Path(os.getenv("ATTACHMENT_ROOT", BASE_DIR / "attachments"))
+ATTACHMENT_CHUNK_SIZE = int(os.getenv("ATTACHMENT_CHUNK_SIZE", str(64 * 1024)))
+ATTACHMENT_SENDFILE = os.getenv("ATTACHMENT_SENDFILE", "").strip().lower()
+ATTACHMENT_SENDFILE_PREFIX = os.getenv("ATTACHMENT_SENDFILE_PREFIX", "/protected-attachments/")
+
+ATTACHMENT_STORAGE = os.getenv("ATTACHMENT_STORAGE", "").strip().lower()
+if not ATTACHMENT_STORAGE:
+    ATTACHMENT_STORAGE = "memory" if "test" in sys.argv[1:2] else "file"
+
+_ATTACHMENT_BACKENDS = {
+    "file": ("django.core.files.storage.FileSystemStorage", {"location": ATTACHMENT_ROOT}),
+    "memory": ("django.core.files.storage.InMemoryStorage", {}),
+    "s3": ("storages.backends.s3.S3Storage", {
+        "bucket_name": os.getenv("AWS_STORAGE_BUCKET_NAME", "worklogix-attachments"),
+        "endpoint_url": os.getenv("AWS_S3_ENDPOINT_URL") or None,
+        "region_name": os.getenv("AWS_S3_REGION_NAME") or None,
+        "access_key": os.getenv("AWS_ACCESS_KEY_ID") or None,
+        "secret_key": os.getenv("AWS_SECRET_ACCESS_KEY") or None,
+        "location": os.getenv("AWS_S3_LOCATION", "attachments"),
+        "default_acl": None,
+        "file_overwrite": True,  # same name == same content
+    }),
+}
+if ATTACHMENT_STORAGE not in _ATTACHMENT_BACKENDS:
+    raise ValueError(f"Unsupported ATTACHMENT_STORAGE: {ATTACHMENT_STORAGE!r}")
+
+STORAGES["attachments"] = {
+    "BACKEND": "core.storage.ContentAddressedStorage",
+    "OPTIONS": dict(zip(("backend", "options"), _ATTACHMENT_BACKENDS[ATTACHMENT_STORAGE])),
+}
+
+# Uploads are streamed to a temporary file in chunks, never held in memory
+FILE_UPLOAD_HANDLERS = ["django.core.files.uploadhandler.TemporaryFileUploadHandler"]
+
 # ---------------------------------------------------------------------
 # Security (production)
 # ---------------------------------------------------------------------
@@ -242,5 +363,36 @@ LOGOUT_REDIRECT_URL = "login"
 # Project-specific
 # ---------------------------------------------------------------------
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
+
+# Eircode geocoding (core/services/geocoding.py)
+#   GEOCODER_URL can point at a local stub geocoder for tests/dev.
+GEOCODER_URL = os.getenv("GEOCODER_URL", "https://maps.googleapis.com/maps/api/geocode/json")
+GEOCODER_CONNECT_TIMEOUT = float(os.getenv("GEOCODER_CONNECT_TIMEOUT", "3"))
+GEOCODER_READ_TIMEOUT = float(os.getenv("GEOCODER_READ_TIMEOUT", "5"))
+GEOCODER_MAX_WORKERS = int(os.getenv("GEOCODER_MAX_WORKERS", "8"))
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", str(60 * 60 * 24 * 30)))  # seconds (30 days)
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 50_000
+
+# Background jobs (core/services/jobs.py), run by `python manage.py run_jobs`
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "10"))   # seconds, doubled per attempt
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "3600"))
+JOB_LOCK_TIMEOUT = int(os.getenv("JOB_LOCK_TIMEOUT", "600"))  # a 'running' job older than this is re-run
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))  # done/failed jobs are deleted after this
+
+# Contractor auto-dispatch (core/services/dispatch.py)
+DISPATCH_STATS_TTL = int(os.getenv("DISPATCH_STATS_TTL", "300"))        # seconds an in-memory snapshot is reused
+DISPATCH_HISTORY_DAYS = int(os.getenv("DISPATCH_HISTORY_DAYS", "90"))   # acceptance/speed look-back
+
+# Work order rejection cascade (core/services/workflow.py)
+WORK_ORDER_CANDIDATES = int(os.getenv("WORK_ORDER_CANDIDATES", "5"))   # preferred + second + dispatch extras
+WORK_ORDER_OFFER_TIMEOUT_HOURS = float(os.getenv("WORK_ORDER_OFFER_TIMEOUT_HOURS", "48"))
+WORK_ORDER_OFFER_SWEEP_INTERVAL = int(os.getenv("WORK_ORDER_OFFER_SWEEP_INTERVAL", "300"))  # seconds per sweep window
+WORK_ORDER_OFFER_SWEEP_BATCH = int(os.getenv("WORK_ORDER_OFFER_SWEEP_BATCH", "500"))
+
+# Work order email notifications (core/services/notifications.py)
+#   Updates for the same recipient within one window go out as one digest.
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv("NOTIFICATION_DIGEST_WINDOW", "60"))  # seconds
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))  # recipients (emails) per SMTP batch
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"